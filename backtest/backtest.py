@@ -1,18 +1,19 @@
-from Queue import Empty
 import logging
+from trading.event_bus import make_event_bus
+from trading.events import MARKET, ORDER, FILL, NEW_DAY
 logging.basicConfig(level=logging.INFO, format='%(asctime)s: %(message)s')
 log = logging.getLogger('Backtest')
 
 
 class Backtest():
     def __init__(self, events, strategy, data, execution, start_date, end_date, analytics=None,
-                 start_time=None, end_time=None):
+                 start_time=None, end_time=None, verbose=True):
 
         self.start_time = start_time
         self.end_time = end_time
         self.cash = 0
 
-        self.events = events
+        self.events = make_event_bus(events)
         self.strategy = strategy
         self.data = data
         self.execution = execution
@@ -20,6 +21,7 @@ class Backtest():
         self.start_date = start_date
         self.end_date = end_date
         self.continue_backtest = True
+        self.verbose = verbose  # print and log every order and fill
 
 
     def run(self):
@@ -46,39 +48,37 @@ class Backtest():
         print(info)
 
     def event_handler(self):
-        event_handlers = {
-            'MARKET': self._handle_market_event,
-            'ORDER': self._handle_order_event,
-            'FILL': self._handle_fill_event,
-            'NEW_DAY': self._handle_new_day_event
-        }
+        event_handlers = [None]*4
+        event_handlers[MARKET] = self._handle_market_event
+        event_handlers[ORDER] = self._handle_order_event
+        event_handlers[FILL] = self._handle_fill_event
+        event_handlers[NEW_DAY] = self._handle_new_day_event
+        get_event = self.events.get
         while True:
             if self.data.continue_backtest:
                 self.data.update()
             else:
                 self.strategy.finished()
                 return
-            while True:
-                try:
-                    event = self.events.get(False)
-                except Empty:
-                    break
-                else:
-                    if event is not None:
-                        event_handlers[event.type](event)
+            event = get_event()
+            while event is not None:
+                event_handlers[event.code](event)
+                event = get_event()
 
     def _handle_market_event(self, market_event):
         self.strategy.new_tick_update(market_event)
         self.execution.process_resting_orders(market_event)
 
     def _handle_order_event(self, order_event):
-        print str(order_event)
-        log.info(str(order_event))
+        if self.verbose:
+            print str(order_event)
+            log.info(str(order_event))
         self.execution.process_new_order(order_event)
 
     def _handle_fill_event(self, fill_event):
-        print str(fill_event)
-        log.info(str(fill_event))
+        if self.verbose:
+            print str(fill_event)
+            log.info(str(fill_event))
         self.strategy.new_fill_update(fill_event)
 
     def _handle_new_day_event(self, new_day_event):
@@ -0,0 +1,133 @@
+import pandas as pd
+from collections import OrderedDict
+
+
+class DayBlock(object):
+    """
+    Columnar view of one day of multi-symbol data: an int64 ns time index plus one numpy array per
+    (symbol, column). Built once per day so that the event loop never materializes a row.
+    """
+    __slots__ = ('index', 'datetimes', 'symbols', 'columns', 'symbol_columns')
+
+    def __init__(self, index, columns):
+        """
+        :param index: (ndarray) int64 ns timestamps
+        :param columns: (OrderedDict) (symbol, column): ndarray, all of len(index)
+        """
+        self.index = index
+        self.datetimes = pd.DatetimeIndex(index).to_pydatetime()
+        self.columns = columns
+        self.symbol_columns = OrderedDict()
+        for (symbol, column), values in columns.items():
+            self.symbol_columns.setdefault(symbol, OrderedDict())[column] = values
+        self.symbols = list(self.symbol_columns.keys())
+
+    @classmethod
+    def from_frame(cls, data):
+        """
+        :param data: (Multi-Index DataFrame) as returned by get_data_multi, columns are (symbol, column)
+        :return: (DayBlock)
+        """
+        columns = OrderedDict((key, data[key].values) for key in data.columns)
+        return cls(data.index.asi8, columns)
+
+    def __len__(self):
+        return len(self.index)
+
+    def column(self, symbol, column):
+        return self.symbol_columns[symbol][column]
+
+    def bar(self, position):
+        return BarView(self, position)
+
+
+class BarView(object):
+    """
+    A lightweight bar: a position in a DayBlock. Supports the same lookups strategies used on the
+    iterrows Series, e.g. bar['GCG6']['level_1_price_buy'] or bar[('GCG6', 'level_1_price_buy')].
+    """
+    __slots__ = ('block', 'position')
+
+    def __init__(self, block, position):
+        self.block = block
+        self.position = position
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            return self.block.columns[key][self.position]
+        return SymbolBarView(self.block.symbol_columns[key], self.position)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in self.block.columns if isinstance(key, tuple) else key in self.block.symbol_columns
+
+    def keys(self):
+        return self.block.symbols
+
+    @property
+    def name(self):
+        return pd.Timestamp(self.block.index[self.position])
+
+    def to_series(self):
+        """
+        Materialize the bar as the (symbol, column) Series DataFrame.iterrows used to produce.
+        """
+        columns = self.block.columns
+        return pd.Series([values[self.position] for values in columns.values()],
+                         index=pd.MultiIndex.from_tuples(list(columns.keys())), name=self.name, dtype=object)
+
+
+class SymbolBarView(object):
+    """
+    One symbol's columns of a BarView.
+    """
+    __slots__ = ('columns', 'position')
+
+    def __init__(self, columns, position):
+        self.columns = columns
+        self.position = position
+
+    def __getitem__(self, column):
+        return self.columns[column][self.position]
+
+    def get(self, column, default=None):
+        values = self.columns.get(column)
+        return default if values is None else values[self.position]
+
+    def __contains__(self, column):
+        return column in self.columns
+
+    def keys(self):
+        return list(self.columns.keys())
+
+    def to_dict(self):
+        return {column: values[self.position] for column, values in self.columns.items()}
+
+
+class BarCursor(object):
+    """
+    Iterates the positions of a DayBlock.
+    """
+    __slots__ = ('block', 'position', 'length')
+
+    def __init__(self, block):
+        self.block = block
+        self.position = -1
+        self.length = len(block)
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        self.position += 1
+        if self.position >= self.length:
+            self.position = self.length
+            raise StopIteration
+        return self.position
+
+    __next__ = next
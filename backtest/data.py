@@ -1,17 +1,45 @@
 import logging
 import datetime as dt
-from trading.events import MarketEvent
+from trading.events import MarketEvent, NewDayEvent
 from trading.data import DataHandler
-from data_utils.quantgo_utils import get_data_multi
+from prefetch import DayPrefetcher
+from bar_cursor import DayBlock, BarView, BarCursor
+from data_utils.day_data_cache import DAY_DATA_CACHE
+from data_utils.bar_specs import make_bar_spec
+from trading.trading_calendar import TradingCalendar
 logging.basicConfig(level=logging.INFO, format='%(asctime)s: %(message)s')
 log = logging.getLogger('Backtest')
 
+SESSION_START_TIME = dt.time(hour=3)
+SESSION_END_TIME = dt.time(hour=20)
+
 
 class BacktestData(DataHandler):
     def __init__(self, events, products, start_date, end_date,
-                 start_time=dt.time(hour=3),
-                 end_time=dt.time(hour=20),
-                 second_bars=True):
+                 start_time=SESSION_START_TIME,
+                 end_time=SESSION_END_TIME,
+                 second_bars=True,
+                 day_cache=None,
+                 prefetch=0,
+                 prefetch_max_bytes=None,
+                 bars=None,
+                 calendar=None,
+                 availability=None):
+        """
+        :param events: (EventBus) shared with the strategy and execution, BacktestEventBus for backtests
+        :param products: (list) (FuturesContract)
+        :param start_date: (DateTime)
+        :param end_date: (DateTime)
+        :param start_time: (dt.time) session window start
+        :param end_time: (dt.time) session window end
+        :param second_bars: (bool) shorthand for bars=TimeBars(1, label='start'), ignored when bars is given
+        :param day_cache: (DayDataCache) defaults to the process-wide DAY_DATA_CACHE
+        :param prefetch: (int) number of days to load ahead on a background thread, 0 to load synchronously
+        :param prefetch_max_bytes: (int) memory cap on days loaded ahead but not yet consumed
+        :param bars: (BarSpec) bar aggregation streamed as market events, e.g. TimeBars(60) or TickBars(100)
+        :param calendar: (TradingCalendar) sessions to run, defaults to the calendar of the products
+        :param availability: (AvailabilityIndex) if given, sessions without data are skipped (and reported) up front
+        """
 
         super(BacktestData, self).__init__(events)
 
@@ -23,53 +51,138 @@ class BacktestData(DataHandler):
         self.start_time = start_time
         self.end_time = end_time
 
-
-        self.second_bars = second_bars
-        self.curr_day = dt.datetime(year=start_date.year, month=start_date.month, day=start_date.day)
+        self.bars = make_bar_spec(second_bars if bars is None else bars)
+        self.day_cache = day_cache if day_cache is not None else DAY_DATA_CACHE
+        self.calendar = calendar if calendar is not None else TradingCalendar.for_products(products)
+        self.availability = availability
+        self.missing_days = []  # (date, reason) of the sessions skipped for missing or bad data
+        self._session_symbols = {}  # date: symbols of the products, resolved on this thread
+        self.sessions = self._find_sessions()
+        self.session_position = -1
+        self.curr_day = None
         self.prev_day = None
         self.curr_day_data = None
-        self.curr_day_index = 0
+        self.curr_day_block = None
+        self.cursor = iter([])
         self.curr_dt = None
         self.last_bar = {}
+
+        self.prefetcher = None
+        if prefetch > 0:
+            self.prefetcher = DayPrefetcher(self._fetch_day, depth=prefetch, max_bytes=prefetch_max_bytes,
+                                            sizeof=lambda day: int(day[1].memory_usage(index=True).sum()))
+            self._schedule_prefetch()
         self.update()
 
+    def _find_sessions(self):
+        """
+        The trading sessions from start_date to end_date, without the ones the availability index has no data for.
+        """
+        sessions = self.calendar.sessions(self.start_date, self.end_date)
+        if self.availability is None:
+            return sessions
+
+        extension = self.bars.extension if self.bars is not None else None
+        available = []
+        for date in sessions:
+            missing = self.availability.missing(self._resolve_symbols(date), date, extension)
+            if missing:
+                self._report_missing(date, "no data for {}".format(', '.join(missing)))
+            else:
+                available.append(date)
+        return available
+
+    def _report_missing(self, date, reason):
+        log.warning("Skipping {}: {}".format(date.strftime("%Y-%m-%d"), reason))
+        self.missing_days.append((date, reason))
+
+    def _resolve_symbols(self, date):
+        """
+        The product symbols for date (continuous contracts roll). Resolving them may rebuild a product's roll
+        schedule, so it is done on the main thread, before the day is handed to the prefetcher.
+        :return: (list) symbols
+        """
+        if date not in self._session_symbols:
+            self._session_symbols[date] = [product.roll_symbol(year=date.year, month=date.month, day=date.day)
+                                           for product in self.products]
+        return self._session_symbols[date]
+
+    def _fetch_day(self, date):
+        """
+        Loads the data of date for the symbols _resolve_symbols resolved. Only reads the resolved symbols and the
+        day cache, so it can run on the prefetch thread.
+        :return: (list) symbols, (DataFrame) day data, (DayBlock) columnar view of the day data
+        """
+        symbols = self._session_symbols[date]
+        data = self.day_cache.get(symbols, date,
+                                  bars=self.bars,
+                                  start_time=self.start_time,
+                                  end_time=self.end_time)
+        return symbols, data, DayBlock.from_frame(data)
+
+    def _schedule_prefetch(self):
+        upcoming = self.sessions[self.session_position + 1:self.session_position + 1 + self.prefetcher.depth]
+        for date in upcoming:
+            self._resolve_symbols(date)
+        self.prefetcher.schedule(upcoming)
 
     def _load_day_data(self):
         """
         Updates the current_day_data.
         """
+        self._resolve_symbols(self.curr_day)
+        if self.prefetcher is not None:
+            self._schedule_prefetch()
+            symbols, self.curr_day_data, self.curr_day_block = self.prefetcher.get(self.curr_day)
+        else:
+            symbols, self.curr_day_data, self.curr_day_block = self._fetch_day(self.curr_day)
 
         # for continuous contracts, update the symbol on new day
-        for product in self.products:
-            product.update(year=self.curr_day.year, month=self.curr_day.month, day=self.curr_day.day)
+        for product, symbol in zip(self.products, symbols):
+            product.set_symbol(symbol)
+        self.symbols = symbols
 
-        self.symbols = [product.symbol for product in self.products]
+        self.cursor = BarCursor(self.curr_day_block)
 
-
-        self.curr_day_data = get_data_multi(self.symbols, self.curr_day,
-                                            download=False,
-                                            second_bars=True,
-                                            start_time=self.start_time,
-                                            end_time=self.end_time)
-        self.curr_day_data_it = self.curr_day_data.iterrows()
+    def _next_session(self):
+        """
+        Load the next session with data and put a NewDayEvent ahead of its first market event, ends the backtest
+        after the last one.
+        """
+        while True:
+            self.session_position += 1
+            if self.session_position >= len(self.sessions):
+                self._finish()
+                return
+            day = self.sessions[self.session_position]
+            try:
+                self.curr_day = day
+                self._load_day_data()
+            except (IOError, ValueError) as e:
+                self._report_missing(day, str(e))
+                continue
+            self.events.put(NewDayEvent())
+            return
 
     def update(self):
-        if self.curr_day > self.end_date:
-            self.continue_backtest = False
-            return
+        while self.continue_backtest:
+            try:
+                self._push_next_data()
+                return
+            except StopIteration:
+                self.prev_day = self.curr_day
+                self._next_session()
 
-        try:
-            self._push_next_data()
-        except (StopIteration, AttributeError, ValueError):
-            self.prev_day = self.curr_day
-            self.curr_day += dt.timedelta(days=1)
-            self._load_day_data()
-            self.update()
+    def _finish(self):
+        self.continue_backtest = False
+        if self.prefetcher is not None:
+            self.prefetcher.close()
 
     def _push_next_data(self):
         """
         Push the next tick from curr_day_data to latest_data (for all symbols).
         """
-        timestamp, self.last_bar = next(self.curr_day_data_it)
-        self.curr_dt = timestamp.to_datetime()
+        position = next(self.cursor)
+        self.last_bar = BarView(self.curr_day_block, position)
+        self.curr_dt = self.curr_day_block.datetimes[position]
         self.events.put(MarketEvent(self.curr_dt, self.last_bar))
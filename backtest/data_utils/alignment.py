@@ -0,0 +1,85 @@
+"""
+As-of alignment of several symbols' day data onto one time index.
+
+Every symbol's timestamps are sorted int64 ns, so the merged index is a k-way merge of the sorted indices and
+the row of each symbol as of a merged timestamp is one searchsorted. Values are then gathered column by column
+straight into the output arrays: (symbol, column) -> ndarray, the layout DayBlock and get_data_multi use.
+"""
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+
+
+def merge_indices(indices):
+    """
+    Sorted union of sorted int64 indices. A single index is returned as is (duplicate timestamps kept).
+    :param indices: (list) of ndarray
+    :return: (ndarray) int64
+    """
+    if len(indices) == 1:
+        return indices[0]
+    return np.unique(np.concatenate(indices))
+
+
+def asof_positions(index, merged):
+    """
+    Row of index as of each merged timestamp (last row at or before it), -1 before the first row.
+    """
+    if index is merged:
+        return np.arange(len(index))
+    return np.searchsorted(index, merged, side='right') - 1
+
+
+def last_valid_positions(values, positions):
+    """
+    For every position, the last row at or before it holding a non null value, -1 if none.
+    """
+    valid = ~pd.isnull(values)
+    if valid.all():
+        return positions
+    last_valid = np.maximum.accumulate(np.where(valid, np.arange(len(values)), -1))
+    return np.where(positions >= 0, last_valid[np.maximum(positions, 0)], -1)
+
+
+def take_rows(values, rows):
+    """
+    values[rows] with rows == -1 giving a missing value (NaN, or NaT for datetimes); integer and boolean columns
+    with missing values become float.
+    """
+    missing = rows < 0
+    taken = values[np.maximum(rows, 0)] if len(values) else np.empty(len(rows), dtype=values.dtype)
+    if missing.any():
+        if taken.dtype.kind in 'biu':
+            taken = taken.astype(np.float64)
+        taken[missing] = np.datetime64('NaT') if taken.dtype.kind == 'M' else np.nan
+    return taken
+
+
+def align_asof(data):
+    """
+    Align the day data of several symbols on the union of their timestamps. Each column takes its last
+    non null value as of every timestamp, as Series.asof followed by a forward fill would.
+    :param data: (dict) symbol: DataFrame indexed on time (sorted)
+    :return: (ndarray) int64 ns merged index, (OrderedDict) (symbol, column): ndarray, sorted on (symbol, column)
+    """
+    symbols = sorted(data.keys())
+    indices = [data[symbol].index.asi8 for symbol in symbols]
+    merged = merge_indices(indices)
+
+    columns = OrderedDict()
+    for symbol, index in zip(symbols, indices):
+        frame = data[symbol]
+        positions = asof_positions(index, merged)
+        for name in sorted(frame.columns):
+            values = frame[name].values
+            columns[(symbol, name)] = take_rows(values, last_valid_positions(values, positions))
+    return merged, columns
+
+
+def aligned_frame(index, columns, index_name='time'):
+    """
+    Build the (symbol, column) Multi-Index DataFrame of align_asof output.
+    """
+    frame = pd.DataFrame(columns, index=pd.DatetimeIndex(index, name=index_name))
+    frame.columns = pd.MultiIndex.from_tuples(list(columns.keys()))
+    return frame
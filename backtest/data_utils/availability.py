@@ -0,0 +1,101 @@
+"""
+On-disk index of which days of data exist, so that callers can tell missing days apart up front instead of
+probing the filesystem (or failing a load) day by day.
+
+The index lives at DATA_DIR/<subscription>/availability.json and records, per symbol, the day files found and
+the modification time of the symbol directory when it was scanned. A symbol is re-scanned only when its
+directory changed (files added, removed or renamed into it).
+"""
+import os
+import json
+import datetime as dt
+from collections import defaultdict
+from backtest.data_utils import data_path
+
+AVAILABILITY_FILE = 'availability.json'
+SOURCE_EXTENSIONS = ('', '_parsed')  # raw downloads and parsed data, any bars can be built from those
+
+
+class AvailabilityIndex(object):
+
+    def __init__(self, subscription='CME_Level_2'):
+        """
+        :param subscription: (str)
+        """
+        self.subscription = subscription
+        self.subscription_dir = os.path.join(data_path.DATA_DIR, subscription)
+        self.fpath = os.path.join(self.subscription_dir, AVAILABILITY_FILE)
+        self._symbols = {}  # symbol: {'mtime': float, 'days': {'YYYYMMDD': [extensions]}}
+        self._checked = set()
+        if os.path.exists(self.fpath):
+            with open(self.fpath) as f:
+                self._symbols = json.load(f)
+
+    def _scan(self, symbol):
+        symbol_dir = os.path.join(self.subscription_dir, symbol)
+        days = defaultdict(set)
+        for fname in os.listdir(symbol_dir):
+            base, file_type = os.path.splitext(fname)
+            if file_type in ('.csv', '.col') and len(base) >= 8 and base[:8].isdigit():
+                days[base[:8]].add(base[8:])
+        return {day: sorted(extensions) for day, extensions in days.items()}
+
+    def _entry(self, symbol):
+        """
+        The index entry of symbol, re-scanned (once per instance) if its directory changed since it was indexed.
+        """
+        symbol = symbol.upper()
+        if symbol not in self._checked:
+            self._checked.add(symbol)
+            symbol_dir = os.path.join(self.subscription_dir, symbol)
+            if not os.path.isdir(symbol_dir):
+                self._symbols.pop(symbol, None)
+            else:
+                mtime = os.path.getmtime(symbol_dir)
+                entry = self._symbols.get(symbol)
+                if entry is None or entry['mtime'] != mtime:
+                    self._symbols[symbol] = {'mtime': mtime, 'days': self._scan(symbol)}
+                    self.save()
+        return self._symbols.get(symbol, {'days': {}})
+
+    def refresh(self, symbols=None):
+        """
+        Re-check symbols (defaults to every symbol directory) for new or removed files.
+        """
+        if symbols is None:
+            symbols = sorted(os.listdir(self.subscription_dir)) if os.path.isdir(self.subscription_dir) else []
+            symbols = [s for s in symbols if os.path.isdir(os.path.join(self.subscription_dir, s))]
+        for symbol in symbols:
+            self._checked.discard(symbol.upper())
+            self._entry(symbol)
+
+    def save(self):
+        if not os.path.isdir(self.subscription_dir):
+            return
+        tmp_fpath = self.fpath + '.tmp'
+        with open(tmp_fpath, 'w') as f:
+            json.dump(self._symbols, f)
+        os.rename(tmp_fpath, self.fpath)
+
+    def days(self, symbol):
+        """
+        :return: (list) of DateTime with any data for symbol, sorted
+        """
+        return [dt.datetime.strptime(day, '%Y%m%d') for day in sorted(self._entry(symbol)['days'])]
+
+    def has(self, symbol, date, extension=None):
+        """
+        Whether the day can be loaded without downloading: the raw or parsed data exists, or the cache with
+        the given extension (e.g. a bar spec extension) does.
+        :param symbol: (str)
+        :param date: (DateTime)
+        :param extension: (str)
+        """
+        extensions = self._entry(symbol)['days'].get(date.strftime('%Y%m%d'), ())
+        return any(e in extensions for e in SOURCE_EXTENSIONS + ((extension,) if extension else ()))
+
+    def missing(self, symbols, date, extension=None):
+        """
+        :return: (list) of the symbols without data on date
+        """
+        return [symbol for symbol in symbols if not self.has(symbol, date, extension)]
@@ -0,0 +1,180 @@
+"""
+Bar specifications: how a parsed day of updates is aggregated before it is streamed to a strategy.
+
+A spec builds the bars for one symbol-day (make_bars) and names the day cache file they are stored in
+(extension), so every bar type is computed once per day and loaded from disk afterwards. Specs are immutable
+and hashable, they are part of the DayDataCache key.
+
+    TimeBars(60)            the last quote of every minute, stamped at the end of the minute, forward filled
+    make_bar_spec(60)       the legacy time bars: the mean of every minute, stamped at its start
+    TickBars(100)           one bar per 100 book updates
+    VolumeBars(50)          one bar per 50 traded contracts (needs a traded volume column)
+    BookChangeBars()        one bar per top of book change
+"""
+from backtest.data_utils.data_aggregation import make_time_bars, make_tick_bars, make_volume_bars, \
+    make_book_change_bars
+from backtest.data_utils.day_cache import SECOND_BARS_EXTENSION
+
+TIME_BAR_LABELS = ('end', 'start')
+
+
+class BarSpec(object):
+    """
+    Base class, subclasses define tag (unique per parameters) and _aggregate.
+    """
+    def __init__(self, how=None):
+        """
+        :param how: (dict) column: 'mean' or 'last', see aggregate_segments
+        """
+        self.how = tuple(sorted(how.items())) if how else ()
+
+    @property
+    def tag(self):
+        raise NotImplementedError("Should implement tag")
+
+    @property
+    def extension(self):
+        """
+        Day cache extension of these bars, e.g. '_bars_tick_100'.
+        """
+        extension = '_bars_' + self.tag
+        for name, aggregation in self.how:
+            extension += '_{}-{}'.format(name, aggregation)
+        return extension
+
+    def make_bars(self, data):
+        """
+        :param data: (DataFrame) parsed day data of a single symbol, indexed on time
+        :return: (DataFrame) bars indexed on time, numeric columns + 'symbol'
+        """
+        bars = self._aggregate(data, dict(self.how))
+        bars['symbol'] = data['symbol'].values[0]
+        return bars
+
+    def _aggregate(self, data, how):
+        raise NotImplementedError("Should implement _aggregate")
+
+    def _key(self):
+        return type(self), self.tag, self.how
+
+    def __eq__(self, other):
+        return isinstance(other, BarSpec) and self._key() == other._key()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, self.tag)
+
+
+class TimeBars(BarSpec):
+    """
+    Fixed width time bars, stamped with the bar end time so a bar never contains updates from after its timestamp.
+    Columns default to 'last' (the quote as of the bar end) and bars without updates are forward filled unless
+    fill=False.
+
+    label='start' gives the legacy bars that second_bars=True and make_bar_spec(seconds) stand for: columns
+    averaged by default and stamped with the bar start, so they hold updates from after their timestamp. They keep
+    their cache files ('_second_bars' for the plain 1 second bars), the end stamped bars are cached apart.
+    """
+    def __init__(self, seconds=1, how=None, fill=True, label='end'):
+        super(TimeBars, self).__init__(how)
+        if seconds <= 0:
+            raise ValueError("seconds must be positive, got {}".format(seconds))
+        if label not in TIME_BAR_LABELS:
+            raise ValueError("Unknown bar label {}".format(label))
+        self.seconds = seconds
+        self.fill = fill
+        self.label = label
+
+    @property
+    def tag(self):
+        return 'time_{}s'.format(self.seconds) + ('' if self.fill else '_nofill') + \
+            ('_end' if self.label == 'end' else '')
+
+    @property
+    def extension(self):
+        # plain legacy 1 second bars keep the cache files written before bar specs existed
+        if self.seconds == 1 and self.fill and not self.how and self.label == 'start':
+            return SECOND_BARS_EXTENSION
+        return super(TimeBars, self).extension
+
+    def _aggregate(self, data, how):
+        return make_time_bars(data, seconds=self.seconds, how=how, fill=self.fill,
+                              default='last' if self.label == 'end' else 'mean', label=self.label)
+
+
+class TickBars(BarSpec):
+    """
+    One bar per ticks book updates, stamped with the time of the last update. Columns default to 'last'.
+    """
+    def __init__(self, ticks, how=None):
+        super(TickBars, self).__init__(how)
+        self.ticks = int(ticks)
+
+    @property
+    def tag(self):
+        return 'tick_{}'.format(self.ticks)
+
+    def _aggregate(self, data, how):
+        return make_tick_bars(data, self.ticks, how=how)
+
+
+class VolumeBars(BarSpec):
+    """
+    One bar per volume traded contracts, stamped with the time of the last update. Columns default to 'last'.
+    The CME level 2 feed carries no trades, so this needs data with a per update traded volume column.
+    """
+    def __init__(self, volume, column='volume', how=None):
+        super(VolumeBars, self).__init__(how)
+        self.volume = volume
+        self.column = column
+
+    @property
+    def tag(self):
+        return 'volume_{}_{}'.format(self.volume, self.column)
+
+    def _aggregate(self, data, how):
+        return make_volume_bars(data, self.volume, column=self.column, how=how)
+
+
+class BookChangeBars(BarSpec):
+    """
+    One bar per change of the price or volume of the top levels of the book, the book as of that update.
+    """
+    def __init__(self, levels=1):
+        super(BookChangeBars, self).__init__()
+        self.levels = levels
+
+    @property
+    def columns(self):
+        return ['level_{}_{}_{}'.format(i, field, side) for i in range(1, self.levels + 1)
+                for side in ['buy', 'sell'] for field in ['price', 'volume']]
+
+    @property
+    def tag(self):
+        return 'book_{}'.format(self.levels)
+
+    def _aggregate(self, data, how):
+        return make_book_change_bars(data, self.columns)
+
+
+def make_bar_spec(bars):
+    """
+    Normalize the bars argument accepted by get_data and the backtest handlers.
+    :param bars: (BarSpec), (bool) True for 1 second bars, False/None for the raw updates, or (int) seconds. The
+        bool and int shorthands are the legacy start stamped mean bars, end stamped bars need an explicit TimeBars.
+    :return: (BarSpec) or None
+    """
+    if bars is None or bars is False:
+        return None
+    if bars is True:
+        return TimeBars(1, label='start')
+    if isinstance(bars, BarSpec):
+        return bars
+    if isinstance(bars, (int, long)):
+        return TimeBars(bars, label='start')
+    raise ValueError("Unknown bar specification {!r}".format(bars))
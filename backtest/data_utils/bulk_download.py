@@ -0,0 +1,226 @@
+"""
+Bulk, resumable download of QuantGo day files: every (symbol, session) job is downloaded by a bounded pool of
+worker threads, retried with exponential backoff, then parsed and cached (get_data) straight away.
+
+Each job's outcome is recorded in a manifest, DATA_DIR/<subscription>/download_manifest.json, saved after every
+job: 'done', 'empty' (the service had no data for the day) or 'failed' (with the last error). Running the same
+backfill again skips the done and empty days and retries the failed ones.
+
+    python -m backtest.data_utils.bulk_download GCG6 GCJ6 --start 2015-12-01 --end 2015-12-31 --workers 4
+"""
+import os
+import json
+import time
+import logging
+import argparse
+import threading
+import datetime as dt
+from Queue import Queue, Empty
+from collections import Counter
+from backtest.data_utils import data_path
+from service_cli.qgservice import QuantGoService
+from backtest.data_utils.quantgo_download import download_data, EmptyDownload
+from backtest.data_utils.quantgo_utils import get_data
+from trading.trading_calendar import TradingCalendar
+log = logging.getLogger('Backtest')
+
+MANIFEST_FILE = 'download_manifest.json'
+DONE = 'done'
+EMPTY = 'empty'
+FAILED = 'failed'
+
+
+class DownloadManifest(object):
+    """
+    Outcome of every downloaded symbol-day, shared by the download workers.
+    """
+
+    def __init__(self, fpath):
+        """
+        :param fpath: (str) json file, loaded if it exists
+        """
+        self.fpath = fpath
+        self._entries = {}  # 'SYMBOL/YYYYMMDD': {'status': str, 'attempts': int, 'error': str}
+        self._lock = threading.Lock()
+        if os.path.exists(fpath):
+            with open(fpath) as f:
+                self._entries = json.load(f)
+
+    @classmethod
+    def for_subscription(cls, subscription='CME_Level_2'):
+        return cls(os.path.join(data_path.DATA_DIR, subscription, MANIFEST_FILE))
+
+    @staticmethod
+    def _key(symbol, date):
+        return '{}/{}'.format(symbol.upper(), date.strftime('%Y%m%d'))
+
+    def status(self, symbol, date):
+        """
+        :return: (str) DONE, EMPTY, FAILED or None if the day was never downloaded
+        """
+        entry = self._entries.get(self._key(symbol, date))
+        return entry['status'] if entry is not None else None
+
+    def entry(self, symbol, date):
+        entry = self._entries.get(self._key(symbol, date))
+        return dict(entry) if entry is not None else None
+
+    def record(self, symbol, date, status, attempts, error=None):
+        with self._lock:
+            self._entries[self._key(symbol, date)] = {'status': status, 'attempts': attempts, 'error': error}
+            self.save()
+
+    def days(self, status):
+        """
+        :return: (list) of (symbol, DateTime) with the given status, sorted
+        """
+        days = []
+        for key, entry in sorted(self._entries.items()):
+            if entry['status'] == status:
+                symbol, date_str = key.split('/')
+                days.append((symbol, dt.datetime.strptime(date_str, '%Y%m%d')))
+        return days
+
+    def save(self):
+        if not os.path.exists(os.path.dirname(self.fpath)):
+            os.makedirs(os.path.dirname(self.fpath))
+        tmp_fpath = self.fpath + '.tmp'
+        with open(tmp_fpath, 'w') as f:
+            json.dump(self._entries, f, indent=0, sort_keys=True)
+        os.rename(tmp_fpath, self.fpath)
+
+
+class BulkDownloader(object):
+
+    def __init__(self, subscription='CME_Level_2', workers=4, retries=3, backoff=1., bars=True,
+                 service_factory=None, manifest=None, sleep=time.sleep):
+        """
+        :param subscription: (str)
+        :param workers: (int) concurrent downloads
+        :param retries: (int) retries of a failed download (an empty day is not retried)
+        :param backoff: (float) seconds before the first retry, doubled on each retry
+        :param bars: (BarSpec) bars cached after parsing (see make_bar_spec), False to cache the parsed data only,
+            None to skip parsing
+        :param service_factory: (function) service_factory() -> service for one worker, QuantGoService by default
+        :param manifest: (DownloadManifest) defaults to the subscription's manifest
+        :param sleep: (function) sleep(seconds), between retries
+        """
+        self.subscription = subscription
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.bars = bars
+        self.service_factory = service_factory if service_factory is not None else QuantGoService
+        self.manifest = manifest if manifest is not None else DownloadManifest.for_subscription(subscription)
+        self.sleep = sleep
+
+    def jobs(self, symbols, start_date, end_date, calendar=None, retry_failed=True):
+        """
+        The (symbol, session) days still to download, in date order.
+        """
+        calendar = calendar if calendar is not None else TradingCalendar()
+        skip = (DONE, EMPTY) if retry_failed else (DONE, EMPTY, FAILED)
+        return [(symbol, date) for date in calendar.sessions(start_date, end_date) for symbol in symbols
+                if self.manifest.status(symbol, date) not in skip]
+
+    def run(self, jobs):
+        """
+        Download, parse and cache jobs on the worker pool.
+        :param jobs: (list) of (symbol, DateTime)
+        :return: (Counter) status: number of jobs
+        """
+        queue = Queue()
+        for job in jobs:
+            queue.put(job)
+        results = Counter()
+        results_lock = threading.Lock()
+
+        def work():
+            service = self.service_factory()
+            while True:
+                try:
+                    symbol, date = queue.get_nowait()
+                except Empty:
+                    return
+                status = self.process(symbol, date, service)
+                with results_lock:
+                    results[status] += 1
+
+        threads = [threading.Thread(target=work) for _ in range(min(self.workers, len(jobs)))]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+        log.info("Downloaded {} days: {}".format(len(jobs), dict(results)))
+        return results
+
+    def process(self, symbol, date, service):
+        """
+        Download (unless the raw file exists), parse and cache one symbol-day and record the outcome.
+        :return: (str) DONE, EMPTY or FAILED
+        """
+        fpath = data_path.get_file_path(symbol, date, self.subscription)
+        attempts = 0
+        while not os.path.exists(fpath):
+            attempts += 1
+            try:
+                download_data(symbol, date, self.subscription, fpath, service=service)
+            except EmptyDownload:
+                self.manifest.record(symbol, date, EMPTY, attempts)
+                return EMPTY
+            except Exception as e:
+                if attempts > self.retries:
+                    log.warning("Download of {} on {} failed: {}".format(symbol, date.strftime('%Y-%m-%d'), e))
+                    self.manifest.record(symbol, date, FAILED, attempts, 'download: {}'.format(e))
+                    return FAILED
+                self.sleep(self.backoff*2**(attempts - 1))
+
+        if self.bars is not None:
+            try:
+                get_data(symbol, date, save=True, second_bars=False, subscription=self.subscription, bars=self.bars)
+            except Exception as e:
+                log.warning("Parsing {} on {} failed: {}".format(symbol, date.strftime('%Y-%m-%d'), e))
+                self.manifest.record(symbol, date, FAILED, attempts, 'parse: {}'.format(e))
+                return FAILED
+        self.manifest.record(symbol, date, DONE, attempts)
+        return DONE
+
+
+def bulk_download(symbols, start_date, end_date, subscription='CME_Level_2', calendar=None, retry_failed=True,
+                  **kwargs):
+    """
+    Download, parse and cache every session of symbols from start_date to end_date not downloaded yet.
+    :param symbols: (list) of str
+    :param start_date: (DateTime)
+    :param end_date: (DateTime)
+    :param subscription: (str)
+    :param calendar: (TradingCalendar) defaults to the CME calendar
+    :param retry_failed: (bool) retry the days that failed on a previous run
+    :param kwargs: passed to BulkDownloader
+    :return: (Counter) status: number of days
+    """
+    downloader = BulkDownloader(subscription, **kwargs)
+    return downloader.run(downloader.jobs(symbols, start_date, end_date, calendar, retry_failed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--start', required=True, help='YYYY-MM-DD')
+    parser.add_argument('--end', required=True, help='YYYY-MM-DD')
+    parser.add_argument('--subscription', default='CME_Level_2')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--no-parse', action='store_true', help='download only')
+    args = parser.parse_args()
+
+    results = bulk_download(args.symbols, dt.datetime.strptime(args.start, '%Y-%m-%d'),
+                            dt.datetime.strptime(args.end, '%Y-%m-%d'), subscription=args.subscription,
+                            workers=args.workers, retries=args.retries, bars=None if args.no_parse else True)
+    for status in (DONE, EMPTY, FAILED):
+        print("{:<8} {:>6}".format(status, results[status]))
+
+
+if __name__ == '__main__':
+    main()
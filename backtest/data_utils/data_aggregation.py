@@ -1,79 +1,192 @@
 import os
-import datetime as dt
+import numpy as np
 import pandas as pd
+from collections import OrderedDict
 from backtest.data_utils.data_path import get_file_path, get_date_and_sym
+from backtest.data_utils.day_cache import get_cache_path, read_day_cache, write_day_cache, SECOND_BARS_EXTENSION
+from backtest.data_utils.order_book import OrderBook, BOOK_FIELDS, SIDES
 
+NS_PER_SECOND = 10**9
+BAR_AGGREGATIONS = ('mean', 'last')
 
-def make_second_bars(data, subscription='CME_Level_2', save=False, load_if_exists=True):
 
+def make_second_bars(data, subscription='CME_Level_2', save=False, load_if_exists=True, how=None):
+    """
+    The legacy '_second_bars' files: the mean of every second stamped with the start of the second, forward filled
+    over every second of the session (the bars of second_bars=True, see TimeBars).
+    :param data: (DataFrame) parsed day data indexed on time
+    :param subscription: (str)
+    :param save: (bool) write the bars to the day cache
+    :param load_if_exists: (bool) load previously saved bars instead
+    :param how: (dict) column: 'mean' or 'last', columns default to 'mean'
+    :return: (DataFrame)
+    """
     date, sym = get_date_and_sym(data)
-    fpath = get_file_path(sym, date, subscription, extension='_second_bars')
+    fpath = get_file_path(sym, date, subscription, extension=SECOND_BARS_EXTENSION)
+    cache_fpath = get_cache_path(sym, date, subscription, extension=SECOND_BARS_EXTENSION)
 
-    if load_if_exists and os.path.exists(fpath):
+    if load_if_exists and os.path.exists(cache_fpath):
+        data = read_day_cache(cache_fpath)
+    elif load_if_exists and os.path.exists(fpath):
         data = pd.read_csv(fpath, parse_dates=[0], index_col=[0])
     else:
-        data = data.groupby(lambda x: dt.datetime(x.year, x.month, x.day, x.hour, x.minute, x.second)).mean()
+        data = make_time_bars(data, seconds=1, how=how, default='mean', label='start')
         data['symbol'] = sym
 
-        start_date = data.index[0]
-        end_date = data.index[-1]
+        if save:
+            write_day_cache(data, cache_fpath)
 
-        time_index = pd.date_range(start=start_date, end=end_date, freq='s')
-        data = data.reindex(time_index, method='ffill')
+    return data
 
-        data.index.name = 'time'
 
-        if save:
-            data.to_csv(fpath)
+def make_time_bars(data, seconds=1, how=None, fill=True, default='last', label='end'):
+    """
+    Aggregate the numeric columns of data into fixed width time bars.
+    Timestamps are floored to the bar width on the int64 ns index and each bar is reduced with segment
+    reductions over the (sorted) rows, so no Python code runs per row.
+    A bar holds the updates of [start, start + seconds) and is stamped with its end, so that, like the event bars,
+    it never contains updates from after its timestamp.
+    :param data: (DataFrame) indexed on time, sorted
+    :param seconds: (int) bar width
+    :param how: (dict) column: 'mean' or 'last'
+    :param fill: (bool) forward fill the bars onto every bar of the session (bars without updates)
+    :param default: (str) aggregation of the columns not in how, the last quote of the bar by default
+    :param label: (str) 'end' or 'start' (the legacy second bars) of the bar
+    :return: (DataFrame) indexed on the bar end (or start) time
+    """
+    if label not in ('start', 'end'):
+        raise ValueError("Unknown bar label {}".format(label))
+    width = int(seconds*NS_PER_SECOND)
+    ns = data.index.asi8
+    bar_ns = ns - ns % width
+    starts = np.flatnonzero(np.concatenate([[True], bar_ns[1:] != bar_ns[:-1]]))
+    bar_ns = bar_ns[starts]
+    columns = aggregate_segments(data, starts, how, default=default)
 
-    return data
+    if fill:
+        grid = np.arange(bar_ns[0], bar_ns[-1] + 1, width)
+        positions = np.searchsorted(bar_ns, grid, side='right') - 1
+        columns = OrderedDict((name, values[positions]) for name, values in columns.items())
+        bar_ns = grid
 
+    if label == 'end':
+        bar_ns = bar_ns + width
+    return pd.DataFrame(columns, index=pd.DatetimeIndex(bar_ns, name='time'))
 
-def make_concise(data):
+
+def make_tick_bars(data, ticks, how=None):
     """
-    Replace 'level_x_column' with just 'column' (list that represents the aggregate levels)
-    :param data:
-    :return:
-    """
-    data = data.apply(make_lists, axis=1)
-    for i in range(1, 11):
-        data = data.drop('level_'+str(i)+'_price_buy', axis=1)
-        data = data.drop('level_'+str(i)+'_price_sell', axis=1)
-        data = data.drop('level_'+str(i)+'_volume_buy', axis=1)
-        data = data.drop('level_'+str(i)+'_volume_sell', axis=1)
-        data = data.drop('level_'+str(i)+'_orders_buy', axis=1)
-        data = data.drop('level_'+str(i)+'_orders_sell', axis=1)
-    return data
+    Aggregate every ticks consecutive updates into one bar.
+    :param data: (DataFrame) indexed on time, sorted
+    :param ticks: (int) updates per bar
+    :param how: (dict) column: 'mean' or 'last', columns default to 'last'
+    :return: (DataFrame) indexed on the time of the last update of each bar
+    """
+    if ticks < 1:
+        raise ValueError("ticks must be positive, got {}".format(ticks))
+    return _make_event_bars(data, np.arange(0, len(data), ticks), how)
+
+
+def make_volume_bars(data, volume, column='volume', how=None):
+    """
+    Aggregate updates into bars of (at least) volume traded contracts: a bar closes on the update that brings
+    its cumulative column volume to volume. A single update larger than volume closes a bar on its own.
+    :param data: (DataFrame) indexed on time, sorted
+    :param volume: (float) traded volume per bar
+    :param column: (str) per update traded volume column
+    :param how: (dict) column: 'mean' or 'last', columns default to 'last'
+    :return: (DataFrame) indexed on the time of the last update of each bar
+    """
+    if volume <= 0:
+        raise ValueError("volume must be positive, got {}".format(volume))
+    if column not in data.columns:
+        raise ValueError("Volume bars need a traded volume column, {} not in data".format(column))
+    traded = np.nan_to_num(data[column].values.astype(np.float64))
+    bucket = np.floor((np.cumsum(traded) - traded)/volume)
+    starts = np.flatnonzero(np.concatenate([[True], bucket[1:] != bucket[:-1]]))
+    return _make_event_bars(data, starts, how)
+
+
+def make_book_change_bars(data, columns):
+    """
+    Keep only the updates where any of columns (e.g. the top of book) changed.
+    :param data: (DataFrame) indexed on time, sorted
+    :param columns: (list) of str
+    :return: (DataFrame) numeric columns of the changing updates
+    """
+    values = data[list(columns)].values.astype(np.float64)
+    nans = np.isnan(values)
+    changed = (values[1:] != values[:-1]) & ~(nans[1:] & nans[:-1])
+    rows = np.flatnonzero(np.concatenate([[True], changed.any(axis=1)]))
+    numeric = [name for name in data.columns if data[name].dtype.kind in 'biuf']
+    return pd.DataFrame(OrderedDict((name, data[name].values[rows]) for name in numeric),
+                        index=pd.DatetimeIndex(data.index.asi8[rows], name='time'))
+
+
+def _make_event_bars(data, starts, how):
+    """
+    Bars over the row segments starting at starts, stamped with the time of their last update so that a bar
+    never contains updates from after its timestamp.
+    """
+    ends = np.concatenate([starts[1:], [len(data)]]) - 1
+    columns = aggregate_segments(data, starts, how, default='last')
+    return pd.DataFrame(columns, index=pd.DatetimeIndex(data.index.asi8[ends], name='time'))
+
+
+def aggregate_segments(data, starts, how=None, default='mean'):
+    """
+    Reduce the numeric columns of data over the row segments [starts[i], starts[i + 1]).
+    Like groupby, NaNs are skipped: 'mean' averages the valid values, 'last' takes the last valid value.
+    :param data: (DataFrame)
+    :param starts: (ndarray) int, first row of each segment, increasing and starting at 0
+    :param how: (dict) column: 'mean' or 'last'
+    :param default: (str) aggregation of the columns not in how
+    :return: (OrderedDict) column: ndarray of len(starts)
+    """
+    how = how if how is not None else {}
+    for name, aggregation in list(how.items()) + [('default', default)]:
+        if aggregation not in BAR_AGGREGATIONS:
+            raise ValueError("Unknown aggregation {} for {}".format(aggregation, name))
+
+    numeric = [name for name in data.columns if data[name].dtype.kind in 'biuf']
+    mean_columns = [name for name in numeric if how.get(name, default) == 'mean']
+    ends = np.concatenate([starts[1:], [len(data)]]) - 1
+
+    reduced = {}
+    if mean_columns:
+        values = data[mean_columns].values.astype(np.float64)
+        valid = ~np.isnan(values)
+        sums = np.add.reduceat(np.where(valid, values, 0), starts, axis=0)
+        counts = np.add.reduceat(valid.astype(np.int64), starts, axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums / counts
+        for i, name in enumerate(mean_columns):
+            reduced[name] = means[:, i]
+
+    for name in numeric:
+        if name in reduced:
+            continue
+        values = data[name].values
+        if values.dtype.kind != 'f':
+            reduced[name] = values[ends]
+            continue
+        last_valid = np.maximum.accumulate(np.where(np.isnan(values), -1, np.arange(len(values))))[ends]
+        reduced[name] = np.where(last_valid >= starts, values[np.maximum(last_valid, 0)], np.nan)
+
+    return OrderedDict((name, reduced[name]) for name in numeric)
 
 
-def make_lists(bar):
-    """
-    Combines the individual 'level_x_column' into a list
-    :param bar:
-    :return:
-    """
-    buy_price = []
-    sell_price = []
-    buy_volume = []
-    sell_volume = []
-    buy_orders = []
-    sell_orders = []
-
-    for i in range(1, 11):
-        try:
-            buy_price.append(bar['level_'+str(i)+'_price_buy'])
-            sell_price.append(bar['level_'+str(i)+'_price_sell'])
-            buy_volume.append(bar['level_'+str(i)+'_volume_buy'])
-            sell_volume.append(bar['level_'+str(i)+'_volume_sell'])
-            buy_orders.append(bar['level_'+str(i)+'_orders_buy'])
-            sell_orders.append(bar['level_'+str(i)+'_orders_sell'])
-        except IndexError:
-            pass
-    bar['price_buy'] = buy_price
-    bar['price_sell'] = sell_price
-    bar['volume_buy'] = buy_volume
-    bar['volume_sell'] = sell_volume
-    bar['orders_buy'] = buy_orders
-    bar['orders_sell'] = sell_orders
-
-    return bar
\ No newline at end of file
+def make_concise(data):
+    """
+    Replace the 'level_x_field_side' columns with 'field_side' columns holding the list of all levels.
+    Prefer OrderBook.from_frame, which keeps the levels as arrays.
+    :param data: (DataFrame)
+    :return: (DataFrame)
+    """
+    book = OrderBook.from_frame(data)
+    data = data.drop([name for name in data.columns if name.startswith('level_')], axis=1)
+    for field in BOOK_FIELDS:
+        values = getattr(book, field)
+        for side, side_name in enumerate(SIDES):
+            data['{}_{}'.format(field, side_name)] = pd.Series(values[:, side].tolist(), index=data.index)
+    return data
@@ -13,9 +13,9 @@ def get_date_and_sym(data):
     return date, sym
 
 
-def get_file_path(symbol, date, subscription, extension=''):
+def get_file_path(symbol, date, subscription, extension='', file_type='csv'):
     date_str = date.strftime("%Y%m%d")
     symbol = symbol.upper()
-    fpath = os.path.join(DATA_DIR, subscription, symbol, "{}{}.csv".format(date_str, extension))
+    fpath = os.path.join(DATA_DIR, subscription, symbol, "{}{}.{}".format(date_str, extension, file_type))
     return fpath
 
@@ -0,0 +1,253 @@
+"""
+Columnar binary day cache.
+
+A day file is laid out as:
+    MAGIC (8 bytes) | header length (uint64, little-endian) | JSON header | column blocks
+
+The index is stored as int64 nanoseconds since epoch and every column block starts on a BLOCK_ALIGN boundary,
+so each column can be memory-mapped (or read) straight into a typed numpy array without any parsing.
+Object columns holding a single value for the whole day (e.g. 'symbol') are stored in the header as constants,
+other object columns (e.g. the raw level_6..10 strings) are stored as fixed width byte strings.
+Columns with more than one dimension (e.g. OrderBook arrays) record their trailing shape in the header.
+"""
+import os
+import json
+import struct
+import argparse
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from backtest.data_utils import data_path
+from backtest.data_utils.data_path import get_file_path
+
+MAGIC = b'BTDAYC01'
+DAY_CACHE_FILE_TYPE = 'col'
+BLOCK_ALIGN = 64
+PARSED_EXTENSION = '_parsed'
+SECOND_BARS_EXTENSION = '_second_bars'
+# the CSV caches get_data reads (and converts) when there is no day cache file, the other bar caches only
+# ever exist as day cache files
+CACHED_EXTENSIONS = (PARSED_EXTENSION, SECOND_BARS_EXTENSION)
+
+
+def get_cache_path(symbol, date, subscription, extension=''):
+    """
+    Path of the binary day cache corresponding to the CSV returned by get_file_path.
+    """
+    return get_file_path(symbol, date, subscription, extension=extension, file_type=DAY_CACHE_FILE_TYPE)
+
+
+def _align(offset):
+    return offset + (-offset % BLOCK_ALIGN)
+
+
+def _column_block(name, values):
+    """
+    Returns (header entry, array to write) for a single column.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind != 'O':
+        return {'name': name, 'dtype': values.dtype.str}, np.ascontiguousarray(values)
+
+    nulls = pd.isnull(values)
+    non_null = values[~nulls]
+    if not nulls.any() and len(non_null) > 0 and (non_null == non_null[0]).all():
+        return {'name': name, 'constant': non_null[0]}, None
+
+    strings = np.where(nulls, '', values).astype(str)
+    return {'name': name, 'dtype': strings.dtype.str, 'nulls': bool(nulls.any())}, strings
+
+
+def write_day_cache(data, fpath):
+    """
+    Write a (time indexed) day DataFrame to the binary day cache.
+    :param data: (DataFrame) indexed on time
+    :param fpath: (str)
+    """
+    columns = OrderedDict((name, data[name].values) for name in data.columns)
+    return write_day_arrays(data.index.asi8, columns, fpath, index_name=data.index.name)
+
+
+def write_day_arrays(index, arrays, fpath, index_name='time'):
+    """
+    Write a int64 ns time index and arrays sharing its first dimension to the binary day cache.
+    Arrays with more than one dimension (e.g. (time, side, level) book arrays) keep their shape.
+    :param index: (ndarray) int64 ns timestamps
+    :param arrays: (OrderedDict) name: ndarray of len(index)
+    :param fpath: (str)
+    :param index_name: (str)
+    """
+    columns = []
+    blocks = []
+    for name, values in arrays.items():
+        values = np.asarray(values)
+        if values.ndim > 1:
+            entry, block = {'name': name, 'dtype': values.dtype.str, 'shape': list(values.shape[1:])}, \
+                np.ascontiguousarray(values)
+        else:
+            entry, block = _column_block(name, values)
+        columns.append(entry)
+        blocks.append(block)
+
+    index = np.ascontiguousarray(index, dtype=np.int64)
+    header = {
+        'nrows': len(index),
+        'index': {'name': index_name, 'dtype': index.dtype.str},
+        'columns': columns
+    }
+
+    # offsets depend on the header length, so lay the blocks out relative to the start of the data section
+    offset = 0
+    header['index']['offset'] = offset
+    offset = _align(offset + index.nbytes)
+    for entry, block in zip(columns, blocks):
+        if block is not None:
+            entry['offset'] = offset
+            offset = _align(offset + block.nbytes)
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _align(len(MAGIC) + 8 + len(header_bytes))
+
+    if not os.path.exists(os.path.dirname(fpath)):
+        os.makedirs(os.path.dirname(fpath))
+
+    tmp_fpath = fpath + '.tmp'
+    with open(tmp_fpath, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+        for block, block_offset in [(index, 0)] + [(b, e.get('offset')) for e, b in zip(columns, blocks)]:
+            if block is None:
+                continue
+            f.seek(data_start + block_offset)
+            f.write(block.tostring())
+    os.rename(tmp_fpath, fpath)
+    return fpath
+
+
+def _read_header(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise IOError("Not a day cache file: {}".format(f.name))
+    header_len = struct.unpack('<Q', f.read(8))[0]
+    header = json.loads(f.read(header_len).decode('utf-8'))
+    data_start = _align(len(MAGIC) + 8 + header_len)
+    return header, data_start
+
+
+def load_day_columns(fpath, columns=None, mmap=True):
+    """
+    Load the raw columns of a day cache file without building a DataFrame.
+    With mmap=True the returned arrays are read-only views onto the memory-mapped file (zero-copy).
+    :param fpath: (str)
+    :param columns: (list) column names to load, defaults to all
+    :param mmap: (bool)
+    :return: (ndarray) int64 ns time index, (OrderedDict) name: ndarray or constant, (str) index name
+    """
+    with open(fpath, 'rb') as f:
+        header, data_start = _read_header(f)
+    nrows = header['nrows']
+
+    if mmap:
+        buf = np.memmap(fpath, dtype=np.uint8, mode='r')
+    else:
+        buf = np.fromfile(fpath, dtype=np.uint8)
+
+    def view(entry):
+        dtype = np.dtype(str(entry['dtype']))
+        shape = tuple(entry.get('shape', ()))
+        start = data_start + entry['offset']
+        return buf[start:start + dtype.itemsize*nrows*int(np.prod(shape))].view(dtype).reshape((nrows,) + shape)
+
+    index = view(header['index'])
+    data = OrderedDict()
+    for entry in header['columns']:
+        name = str(entry['name'])
+        if columns is not None and name not in columns:
+            continue
+        if 'constant' in entry:
+            value = entry['constant']
+            data[name] = str(value) if isinstance(value, type(u'')) else value
+        elif entry['dtype'][1] == 'S':
+            values = view(entry).astype(object)
+            if entry.get('nulls'):
+                values[values == ''] = np.nan
+            data[name] = values
+        else:
+            data[name] = view(entry)
+    return index, data, header['index']['name']
+
+
+def read_day_cache(fpath, columns=None, mmap=True):
+    """
+    Read a day cache file into a DataFrame indexed on time.
+    :param fpath: (str)
+    :param columns: (list) column names to load, defaults to all
+    :param mmap: (bool)
+    :return: (DataFrame)
+    """
+    index, data, index_name = load_day_columns(fpath, columns, mmap)
+    index = pd.DatetimeIndex(index, name=index_name)
+    frame = pd.DataFrame(OrderedDict((k, v) for k, v in data.items() if isinstance(v, np.ndarray)), index=index)
+    for position, (name, value) in enumerate(data.items()):
+        if not isinstance(value, np.ndarray):
+            frame.insert(position, name, value)
+    return frame
+
+
+def read_csv_day(fpath):
+    """
+    Read one of the legacy '_parsed' / '_second_bars' CSV caches.
+    """
+    data = pd.read_csv(fpath, parse_dates=[0], index_col=[0])
+    data['symbol'] = data['symbol'].apply(lambda s: s.replace(' ', ''))
+    return data
+
+
+def backfill_day_cache(subscription='CME_Level_2', symbols=None, extensions=CACHED_EXTENSIONS, overwrite=False,
+                       verbose=False):
+    """
+    Convert the existing CSV caches under DATA_DIR to binary day cache files.
+    :param subscription: (str)
+    :param symbols: (list) symbols to convert, defaults to all symbols found
+    :param extensions: (tuple) which CSV caches to convert
+    :param overwrite: (bool) rewrite day cache files that already exist
+    :param verbose: (bool)
+    :return: (list) of written file paths
+    """
+    subscription_dir = os.path.join(data_path.DATA_DIR, subscription)
+    if not os.path.exists(subscription_dir):
+        return []
+    symbols = sorted(os.listdir(subscription_dir)) if symbols is None else [s.upper() for s in symbols]
+
+    written = []
+    for symbol in symbols:
+        symbol_dir = os.path.join(subscription_dir, symbol)
+        if not os.path.isdir(symbol_dir):
+            continue
+        for fname in sorted(os.listdir(symbol_dir)):
+            base, file_type = os.path.splitext(fname)
+            extension = base[8:]
+            if file_type != '.csv' or extension not in extensions:
+                continue
+            cache_fpath = os.path.join(symbol_dir, base + '.' + DAY_CACHE_FILE_TYPE)
+            if os.path.exists(cache_fpath) and not overwrite:
+                continue
+            try:
+                write_day_cache(read_csv_day(os.path.join(symbol_dir, fname)), cache_fpath)
+            except (IOError, ValueError, KeyError) as e:
+                if verbose:
+                    print("Skipping {}: {}".format(fname, e))
+                continue
+            written.append(cache_fpath)
+            if verbose:
+                print("Wrote {}".format(cache_fpath))
+    return written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Back-fill binary day caches from the CSV caches.')
+    parser.add_argument('symbols', nargs='*', help='symbols to convert (default: all)')
+    parser.add_argument('--subscription', default='CME_Level_2')
+    parser.add_argument('--overwrite', action='store_true')
+    args = parser.parse_args()
+    backfill_day_cache(args.subscription, args.symbols or None, overwrite=args.overwrite, verbose=True)
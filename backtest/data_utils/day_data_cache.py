@@ -0,0 +1,97 @@
+import threading
+import datetime as dt
+from collections import OrderedDict
+from backtest.data_utils.quantgo_utils import get_data_multi
+from backtest.data_utils.bar_specs import make_bar_spec
+
+DEFAULT_MAX_BYTES = 2*1024**3
+
+
+class DayDataCache(object):
+    """
+    Process-wide, byte-bounded LRU cache of merged day data (as returned by get_data_multi).
+
+    The data handler, the execution handler and the strategy all read the same day, so keying the loads on
+    (symbols, date, bars, session window) means each trading day is parsed, re-indexed and merged once.
+    Cached DataFrames are shared between readers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, loader=get_data_multi):
+        """
+        :param max_bytes: (int) memory budget, least recently used days are evicted beyond it
+        :param loader: (function) called as loader(symbols, date, bars=..., start_time=..., end_time=...)
+        """
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._days = OrderedDict()  # key: (data, nbytes)
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def make_key(symbols, date, bars=True, start_time=dt.time(0, 0, 0), end_time=dt.time(23, 59, 59)):
+        date = dt.datetime(year=date.year, month=date.month, day=date.day)
+        return tuple(symbols), date, make_bar_spec(bars), start_time, end_time
+
+    def get(self, symbols, date, bars=True, start_time=dt.time(0, 0, 0), end_time=dt.time(23, 59, 59)):
+        """
+        Returns the merged day data for symbols on date, loading it on a miss.
+        :param symbols: (list) of str
+        :param date: (DateTime)
+        :param bars: (BarSpec) see make_bar_spec
+        :param start_time: (dt.time)
+        :param end_time: (dt.time)
+        :return: (Multi-Index DataFrame)
+        """
+        key = self.make_key(symbols, date, bars, start_time, end_time)
+        with self._lock:
+            if key in self._days:
+                self.hits += 1
+                entry = self._days.pop(key)
+                self._days[key] = entry
+                return entry[0]
+            self.misses += 1
+
+        data = self.loader(list(key[0]), key[1], bars=key[2], start_time=start_time, end_time=end_time)
+        self.put(key, data)
+        return data
+
+    def put(self, key, data):
+        """
+        Insert day data under key (see make_key), evicting least recently used days over the byte budget.
+        """
+        nbytes = int(data.memory_usage(index=True).sum())
+        with self._lock:
+            if key in self._days:
+                self.nbytes -= self._days.pop(key)[1]
+            self._days[key] = (data, nbytes)
+            self.nbytes += nbytes
+            # always keep the most recent day, even if it alone exceeds the budget
+            while self.nbytes > self.max_bytes and len(self._days) > 1:
+                _, (_, evicted_nbytes) = self._days.popitem(last=False)
+                self.nbytes -= evicted_nbytes
+                self.evictions += 1
+
+    def __contains__(self, key):
+        return key in self._days
+
+    def __len__(self):
+        return len(self._days)
+
+    def clear(self):
+        with self._lock:
+            self._days.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'days': len(self._days),
+                'nbytes': self.nbytes}
+
+    def __str__(self):
+        return "DayDataCache | Hits: {hits}, Misses: {misses}, Evictions: {evictions}, Days: {days}, " \
+               "Bytes: {nbytes}".format(**self.stats())
+
+
+DAY_DATA_CACHE = DayDataCache()
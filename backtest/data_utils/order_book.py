@@ -0,0 +1,183 @@
+"""
+Array-based order book: one day of level 2 book snapshots as (time, side, level) numpy arrays.
+
+    book = OrderBook.from_frame(get_data('GCG6', date, bars=False))
+    book.price[:, BUY, 0]           best bid of every update
+    book.snapshot(book.asof(t))     (price, volume, orders) arrays of shape (side, level) as of t
+    book.walk(book.asof(t), SELL, 12)   contracts a buy of 12 takes from every ask level as of t
+
+Books are written next to the day data as a day cache file (extension '_book' after the bar extension), the
+arrays keep their shape on disk and are memory-mapped back without any parsing.
+"""
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from backtest.data_utils.day_cache import write_day_arrays, load_day_columns
+
+BUY = 0
+SELL = 1
+SIDES = ('buy', 'sell')
+BOOK_FIELDS = ('price', 'volume', 'orders')
+BOOK_EXTENSION = '_book'
+
+
+def book_levels(data):
+    """
+    Number of numeric book levels in a parsed (or bar) frame, i.e. level_1 .. level_n_price_buy.
+    """
+    levels = 0
+    while 'level_{}_price_buy'.format(levels + 1) in data.columns and \
+            data['level_{}_price_buy'.format(levels + 1)].dtype.kind in 'biuf':
+        levels += 1
+    return levels
+
+
+def book_columns(field, levels):
+    """
+    Frame columns of field in (side, level) order, e.g. level_1_price_buy, .., level_5_price_sell.
+    """
+    return ['level_{}_{}_{}'.format(level, field, side) for side in SIDES for level in range(1, levels + 1)]
+
+
+def walk_levels(volume, quantity):
+    """
+    Contracts taken from every level by an order of quantity walking the book, best level first. A missing (nan)
+    level has no volume. Taken at most the displayed volume, the total is short of quantity if the book is.
+    :param volume: (ndarray) displayed volume of the levels of a side, best first
+    :param quantity: (int) unsigned
+    :return: (ndarray) float
+    """
+    volume = np.nan_to_num(np.asarray(volume, dtype=np.float64))
+    ahead = np.cumsum(volume) - volume
+    return np.clip(quantity - ahead, 0, volume)
+
+
+class OrderBook(object):
+    """
+    Book snapshots of a single symbol. price, volume and orders have shape (time, side, level), level 0 is the
+    top of the book and side is BUY or SELL.
+    """
+    __slots__ = ('index', 'price', 'volume', 'orders', 'symbol')
+
+    def __init__(self, index, price, volume, orders, symbol=None):
+        """
+        :param index: (ndarray) int64 ns timestamps, sorted
+        :param price: (ndarray) shape (time, side, level)
+        :param volume: (ndarray) shape (time, side, level)
+        :param orders: (ndarray) shape (time, side, level)
+        :param symbol: (str)
+        """
+        self.index = index
+        self.price = price
+        self.volume = volume
+        self.orders = orders
+        self.symbol = symbol
+
+    @classmethod
+    def from_frame(cls, data, levels=None):
+        """
+        Build the book from the level_i_field_side columns of a parsed (or bar) frame.
+        :param data: (DataFrame) indexed on time
+        :param levels: (int) number of levels, defaults to all numeric levels
+        :return: (OrderBook)
+        """
+        levels = book_levels(data) if levels is None else levels
+        if levels == 0:
+            raise ValueError("No book levels in data")
+        missing = [column for field in BOOK_FIELDS for column in book_columns(field, levels)
+                   if column not in data.columns]
+        if missing:
+            raise ValueError("Book columns missing from data: {}".format(", ".join(missing)))
+        shape = (len(data), len(SIDES), levels)
+        arrays = [data[book_columns(field, levels)].values.reshape(shape) for field in BOOK_FIELDS]
+        symbol = data['symbol'].values[0] if 'symbol' in data.columns and len(data) else None
+        return cls(data.index.asi8, *arrays, symbol=symbol)
+
+    @classmethod
+    def load(cls, fpath, mmap=True):
+        """
+        :param fpath: (str) written by save
+        :param mmap: (bool) memory-map the arrays (read-only) instead of reading them
+        :return: (OrderBook)
+        """
+        index, arrays, _ = load_day_columns(fpath, mmap=mmap)
+        return cls(index, arrays['price'], arrays['volume'], arrays['orders'], symbol=arrays.get('symbol'))
+
+    def save(self, fpath):
+        arrays = OrderedDict((field, getattr(self, field)) for field in BOOK_FIELDS)
+        if self.symbol is not None:
+            arrays['symbol'] = np.repeat(np.array([self.symbol], dtype=object), len(self))
+        return write_day_arrays(self.index, arrays, fpath)
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def levels(self):
+        return self.price.shape[2]
+
+    @property
+    def datetimes(self):
+        return pd.DatetimeIndex(self.index)
+
+    def asof(self, timestamp):
+        """
+        Position of the last snapshot at or before timestamp, -1 if timestamp is before the first one.
+        :param timestamp: (DateTime) or (int) ns
+        """
+        if not isinstance(timestamp, (int, long, np.integer)):
+            timestamp = pd.Timestamp(timestamp).value
+        return int(np.searchsorted(self.index, timestamp, side='right')) - 1
+
+    def snapshot(self, position):
+        """
+        :return: (ndarray) price, volume, orders of shape (side, level) at position
+        """
+        return self.price[position], self.volume[position], self.orders[position]
+
+    @property
+    def best_bid(self):
+        return self.price[:, BUY, 0]
+
+    @property
+    def best_ask(self):
+        return self.price[:, SELL, 0]
+
+    @property
+    def mid(self):
+        return (self.best_bid + self.best_ask)/2.
+
+    @property
+    def spread(self):
+        return self.best_ask - self.best_bid
+
+    def depth(self, side, levels=None):
+        """
+        Cumulative volume of the first levels of side, shape (time, level).
+        """
+        return np.cumsum(self.volume[:, side, :levels], axis=1)
+
+    def walk(self, position, side, quantity):
+        """
+        Walk the levels of side at position with an order taking quantity contracts, levels without a price
+        taking none.
+        :param side: (int) BUY (a sell order takes the bids) or SELL
+        :param quantity: (int) unsigned
+        :return: (ndarray) contracts taken at every level, see walk_levels
+        """
+        return walk_levels(np.where(np.isnan(self.price[position, side]), 0, self.volume[position, side]), quantity)
+
+    def to_frame(self):
+        """
+        Back to the level_i_field_side columns of the parsed frame.
+        """
+        n = len(self)
+        columns = OrderedDict()
+        for field in BOOK_FIELDS:
+            values = getattr(self, field).reshape(n, -1)
+            for i, name in enumerate(book_columns(field, self.levels)):
+                columns[name] = values[:, i]
+        frame = pd.DataFrame(columns, index=pd.DatetimeIndex(self.index, name='time'))
+        if self.symbol is not None:
+            frame['symbol'] = self.symbol
+        return frame
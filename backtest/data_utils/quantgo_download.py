@@ -7,36 +7,49 @@ subscription_map = {
 }
 
 
+class EmptyDownload(IOError):
+    """
+    The service returned no data for the symbol-day (e.g. a holiday or a contract not trading yet).
+    """
+    pass
+
+
 def _file_empty(fpath):
     return os.stat(fpath).st_size == 0
 
 
-# TODO - determine if no data was retrieved
-def download_data(symbol, date, subscription, fpath):
+def download_data(symbol, date, subscription, fpath, service=None):
     """
     symbol - ticker symbol (string)
     date - datetime object
     subscription - the data subscription type (i.e CME_Level_2)
+    fpath - where to write the data, only written once the download completed
+    service - QuantGoService (or a stand-in with its get_data), a new QuantGoService by default
     """
     date_str = date.strftime("%Y%m%d")
     symbol = symbol.upper()
 
-    qg = QuantGoService()
-    service = subscription_map[subscription]
+    qg = service if service is not None else QuantGoService()
+    service_id = subscription_map[subscription]
 
     if not os.path.exists(os.path.dirname(fpath)):
         os.makedirs(os.path.dirname(fpath))
 
-    with open(fpath, 'wb') as output_file:
-        qg.get_data(service,
-                    {"Header": True,
-                     "TickerNames": [symbol],
-                     "Date": date_str,
-                     "ServiceParameters": {"IncludeDate": True}},
-                    output_file)
-
-    if _file_empty(fpath):
-        os.remove(fpath)
-        raise IOError("No data found, file is empty")
-
-    return fpath
\ No newline at end of file
+    part_fpath = fpath + '.part'
+    try:
+        with open(part_fpath, 'wb') as output_file:
+            qg.get_data(service_id,
+                        {"Header": True,
+                         "TickerNames": [symbol],
+                         "Date": date_str,
+                         "ServiceParameters": {"IncludeDate": True}},
+                        output_file)
+        if _file_empty(part_fpath):
+            raise EmptyDownload("No data found, file is empty")
+    except BaseException:
+        if os.path.exists(part_fpath):
+            os.remove(part_fpath)
+        raise
+
+    os.rename(part_fpath, fpath)
+    return fpath
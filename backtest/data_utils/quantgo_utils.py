@@ -1,15 +1,56 @@
 import os
-import re
+import logging
+import numpy as np
 import pandas as pd
 import datetime as dt
-from dateutil.rrule import rrule, DAILY
-from backtest.data_utils.data_aggregation import make_second_bars, make_concise
+from collections import OrderedDict
+from backtest.data_utils.data_aggregation import make_concise
+from backtest.data_utils.bar_specs import make_bar_spec
 from backtest.data_utils.data_path import get_file_path
+from backtest.data_utils.day_cache import get_cache_path, read_day_cache, write_day_cache, read_csv_day, \
+    PARSED_EXTENSION, CACHED_EXTENSIONS
 from backtest.data_utils.quantgo_download import download_data
+from backtest.data_utils.order_book import OrderBook, BOOK_EXTENSION
+from backtest.data_utils.alignment import align_asof, aligned_frame
+from trading.trading_calendar import TradingCalendar
+log = logging.getLogger('Backtest')
 
 
-def _convert_time(date_str, time_str):
-    return dt.datetime.strptime(date_str + time_str + "000", '%Y%m%d %H%M%S%f')
+LEVEL_FIELDS = ('price', 'volume', 'orders')
+
+
+def _parse_times(dates, times):
+    """
+    Vectorized conversion of the raw (YYYYMMDD, HHMMSSmmm) integer columns to a DatetimeIndex.
+    :param dates: (ndarray) int
+    :param times: (ndarray) int
+    :return: (DatetimeIndex)
+    """
+    unique_dates, inverse = np.unique(dates, return_inverse=True)
+    day_ns = np.array([pd.Timestamp(dt.datetime.strptime(str(d), '%Y%m%d')).value for d in unique_dates],
+                      dtype=np.int64)
+    ns = day_ns[inverse]
+
+    times = times.astype(np.int64)
+    hours = times // 10**7
+    minutes = times // 10**5 % 100
+    seconds = times // 10**3 % 100
+    millis = times % 10**3
+    ns += ((hours*60 + minutes)*60 + seconds)*10**9 + millis*10**6
+    return pd.DatetimeIndex(ns)
+
+
+def _parse_levels(levels):
+    """
+    Parse the 'price x volume (orders)' strings of all requested levels in one pass.
+    :param levels: (ndarray) of str, shape (rows, levels)
+    :return: (ndarray) float, shape (rows, levels, 3) of price, volume, orders
+    """
+    joined = ' '.join(levels.ravel()).replace('x', ' ').replace('(', ' ').replace(')', ' ')
+    values = np.fromstring(joined, sep=' ')
+    if len(values) != levels.size*len(LEVEL_FIELDS):
+        raise ValueError("Malformed level data, expected 'price x volume (orders)'")
+    return values.reshape(levels.shape + (len(LEVEL_FIELDS),))
 
 
 def _parse_cme_level2_data(fpath, max_level=5):
@@ -21,25 +62,30 @@ def _parse_cme_level2_data(fpath, max_level=5):
         buy_depth, sell_depth,
         +
         for 1 <= i <= 10 and side in ['buy', 'sell'] (level_i_price_side, level_i_volume_side, level_i_orders_side)
+
+    Only the first max_level levels are split into price/volume/orders, deeper levels are kept as raw strings.
     """
-    index_names = ['time', 'side', 'is_implied']
-    column_names = ['symbol', 'depth'] + map(lambda x: "level_{}".format(x), range(1, 11))
-    data = pd.read_csv(fpath, parse_dates=[[0, 1]], date_parser=_convert_time, index_col=[0, 2, 3])
-    data.index.names = index_names
-    data.columns = column_names
+    raw_level_names = ["level_{}".format(i) for i in range(1, 11)]
+    raw = pd.read_csv(fpath)
+    raw.columns = ['date', 'time', 'symbol', 'side', 'is_implied', 'depth'] + raw_level_names
 
-    if len(data) == 0:
+    if len(raw) == 0:
         raise IOError("File is empty")
 
-    for i in xrange(1, max_level + 1):
-        d = zip(*data["level_{}".format(i)].apply(lambda s: re.split(r' x | \(|\)', s)[:3]).tolist())
-        data['level_{}_price'.format(i)] = map(float, d[0])
-        data['level_{}_volume'.format(i)] = map(int, d[1])
-        data['level_{}_orders'.format(i)] = map(int, d[2])
-        data.drop("level_{}".format(i), axis=1, inplace=True)
+    data = pd.DataFrame(OrderedDict([('time', _parse_times(raw['date'].values, raw['time'].values)),
+                                     ('side', raw['side'].values),
+                                     ('is_implied', raw['is_implied'].values),
+                                     ('symbol', raw['symbol'].str.replace(' ', '').values),
+                                     ('depth', raw['depth'].values)]))
+    for name in raw_level_names[max_level:]:
+        data[name] = raw[name].values
+
+    levels = _parse_levels(raw[raw_level_names[:max_level]].values)
+    for i in range(max_level):
+        data['level_{}_price'.format(i + 1)] = levels[:, i, 0]
+        data['level_{}_volume'.format(i + 1)] = levels[:, i, 1].astype(np.int64)
+        data['level_{}_orders'.format(i + 1)] = levels[:, i, 2].astype(np.int64)
 
-    data['symbol'] = data['symbol'].apply(lambda s: s.replace(' ', ''))
-    data = data.reset_index()
     data = data[data['is_implied'] == 0]
     buy_data = data[data['side'] == data['side'].values[0]].drop('side', axis=1)
     sell_data = data[data['side'] != data['side'].values[0]].drop('side', axis=1)
@@ -64,41 +110,61 @@ def _download_and_parse(date, download, fpath, subscription, symbols):
     return data
 
 
+def _load_csv_cache(csv_fpath, cache_fpath, save):
+    """
+    Load a legacy CSV cache, converting it to the binary day cache on the way if save is set.
+    """
+    data = read_csv_day(csv_fpath)
+    if save:
+        write_day_cache(data, cache_fpath)
+    return data
+
+
 def get_data(symbol, date, download=False, save=True, parse_new=False, second_bars=True, subscription="CME_Level_2",
-             start_time=dt.time(0, 0, 0), end_time=dt.time(23, 59, 59), concise=False):
+             start_time=dt.time(0, 0, 0), end_time=dt.time(23, 59, 59), concise=False, bars=None):
     """
     :param symbol: (str)
     :param date: (DateTime) or (str) e.g. 2015-12-22
     :param download: (bool)
     :param save: (bool)
     :param parse_new: (bool)
-    :param second_bars: (bool)
+    :param second_bars: (bool) shorthand for bars=TimeBars(1, label='start'), ignored when bars is given
     :param subscription: (str) the data subscription type (e.g. CME_Level_2)
     :param start_time: (DateTime)
     :param end_time: (DateTime)
     :param concise: (bool)
+    :param bars: (BarSpec) bar aggregation, see make_bar_spec. Each bar type is cached under its own extension.
     :return:
     """
 
     if type(date) is str:
         date = dt.datetime.strptime(date, "%Y-%m-%d")
+    spec = make_bar_spec(second_bars if bars is None else bars)
 
     fpath = get_file_path(symbol, date, subscription)
-    parsed_fpath = get_file_path(symbol, date, subscription, extension='_parsed')
-    second_fpath = get_file_path(symbol, date, subscription, extension='_second_bars')
-
-    if second_bars and os.path.exists(second_fpath):
-        data = pd.read_csv(second_fpath, parse_dates=[0], index_col=[0])
+    parsed_fpath = get_file_path(symbol, date, subscription, extension=PARSED_EXTENSION)
+    parsed_cache_fpath = get_cache_path(symbol, date, subscription, extension=PARSED_EXTENSION)
+    if spec is not None:
+        bars_fpath = get_file_path(symbol, date, subscription, extension=spec.extension)
+        bars_cache_fpath = get_cache_path(symbol, date, subscription, extension=spec.extension)
+
+    if spec is not None and os.path.exists(bars_cache_fpath):
+        data = read_day_cache(bars_cache_fpath)
+    elif spec is not None and spec.extension in CACHED_EXTENSIONS and os.path.exists(bars_fpath):
+        data = _load_csv_cache(bars_fpath, bars_cache_fpath, save)
     else:
-        if os.path.exists(parsed_fpath) and not parse_new:
-            data = pd.read_csv(parsed_fpath, parse_dates=[0], index_col=[0])
-            data['symbol'] = data['symbol'].apply(lambda s: s.replace(' ', ''))
+        if os.path.exists(parsed_cache_fpath) and not parse_new:
+            data = read_day_cache(parsed_cache_fpath)
+        elif os.path.exists(parsed_fpath) and not parse_new:
+            data = _load_csv_cache(parsed_fpath, parsed_cache_fpath, save)
         else:
             data = _download_and_parse(date, download, fpath, subscription, symbol)
             if save:
-                data.to_csv(parsed_fpath)
-        if second_bars:
-            data = make_second_bars(data, subscription, save=True, load_if_exists=True)
+                write_day_cache(data, parsed_cache_fpath)
+        if spec is not None:
+            data = spec.make_bars(data)
+            if save:
+                write_day_cache(data, bars_cache_fpath)
 
     # slice on time index
     start_date = date + dt.timedelta(hours=start_time.hour, minutes=start_time.minute, seconds=start_time.second,
@@ -121,7 +187,7 @@ def get_data(symbol, date, download=False, save=True, parse_new=False, second_ba
 
 def get_data_multi(symbols, date, download=False, save=True, parse_new=False, second_bars=True,
                    subscription="CME_Level_2", start_time=dt.time(0, 0, 0), end_time=dt.time(23, 59, 59),
-                   concise=False):
+                   concise=False, bars=None):
     """
     Returns a merged multi-index DataFrame of all symbols in symbols
     :param symbols:
@@ -134,63 +200,74 @@ def get_data_multi(symbols, date, download=False, save=True, parse_new=False, se
     :param start_time:
     :param end_time:
     :param concise:
+    :param bars: (BarSpec)
 
     :return: (Multi-Index DataFrame)
     """
     multi_data = {}
-    if len(symbols) == 1:
-        multi_data[symbols[0]] = get_data(symbols[0], date, download, save, parse_new, second_bars,
-                                          subscription, start_time, end_time, concise)
-    else:
-        for symbol in symbols:
-            data = get_data(symbol, date, download, save, parse_new, second_bars,
-                            subscription, start_time, end_time, concise)
-            multi_data[symbol] = data
+    for symbol in symbols:
+        multi_data[symbol] = get_data(symbol, date, download, save, parse_new, second_bars,
+                                      subscription, start_time, end_time, concise, bars)
 
-    multi_data = _reindex_data(multi_data)
-    return dict_to_df(multi_data)
+    return aligned_frame(*align_asof(multi_data))
 
 
-def dict_to_df(data):
+def get_order_book(symbol, date, download=False, save=True, parse_new=False, bars=False,
+                   subscription="CME_Level_2"):
     """
-    Converts a dict of DataFrames to a multi-indexed DataFrame
-    :param data: (dict of DataFrames)
-    :return: (Multi-Indexed DataFrame)
+    Returns the day's OrderBook for symbol, stored in the day cache next to the data it was built from.
+    :param symbol: (str)
+    :param date: (DateTime)
+    :param download: (bool)
+    :param save: (bool)
+    :param parse_new: (bool)
+    :param bars: (BarSpec) defaults to every parsed update
+    :param subscription: (str)
+    :return: (OrderBook)
     """
-    reform = {(outerKey, innerKey): values for outerKey, innerDict in data.iteritems()
-              for innerKey, values in innerDict.iteritems()}
-    multi_data = pd.DataFrame(reform).ffill()
-    return multi_data
-
-
-def _reindex_data(data):
+    spec = make_bar_spec(bars)
+    extension = ('_parsed' if spec is None else spec.extension) + BOOK_EXTENSION
+    fpath = get_cache_path(symbol, date, subscription, extension=extension)
+    if os.path.exists(fpath) and not parse_new:
+        return OrderBook.load(fpath)
+
+    data = get_data(symbol, date, download=download, save=save, parse_new=parse_new, subscription=subscription,
+                    bars=bars)
+    book = OrderBook.from_frame(data)
+    if save:
+        book.save(fpath)
+    return book
+
+
+def get_data_furdays(symbols, start_date, end_date, raise_exception=False, calendar=None, availability=None,
+                     **kwargs):
     """
-    Re-indexes all DataFrames in datas (dict of DataFrames - symbol:df) and forward fills
-    Used for combining multi-index data for multiple symbols
+    get_data for every trading session from start_date to end_date. Sessions without data are skipped and logged.
+    :param symbols: (str) symbol
+    :param start_date: (DateTime)
+    :param end_date: (DateTime)
+    :param raise_exception: (bool) raise on the first session without (good) data instead
+    :param calendar: (TradingCalendar) defaults to the CME calendar
+    :param availability: (AvailabilityIndex) skip the sessions it has no data for without trying to load them
+    :param kwargs: passed to get_data
+    :return: (list) of DataFrame
     """
-    keys = data.keys()
-    if len(keys) == 1:
-        return data
-    new_index = data[keys[0]].index.union(data[keys[1]].index).unique()  # merge first two
-    if len(keys) >= 2:
-        for i in range(2, len(keys)):
-            new_index = new_index.union(data[keys[i]].index).unique()
-    for key in keys:
-        data[key] = data[key].apply(lambda x: x.asof(new_index))
-    return data
-
+    calendar = calendar if calendar is not None else TradingCalendar()
+    extension = None
+    if availability is not None:
+        spec = make_bar_spec(kwargs.get('second_bars', True) if kwargs.get('bars') is None else kwargs['bars'])
+        extension = spec.extension if spec is not None else None
 
-def get_data_furdays(symbols, start_date, end_date, raise_exception=False, **kwargs):
     data = []
-    for date in rrule(DAILY, dtstart=start_date, until=end_date):
+    for date in calendar.sessions(start_date, end_date):
         try:
+            if availability is not None and not availability.has(symbols, date, extension):
+                raise IOError("No data for {} on {}".format(symbols, date.strftime("%Y-%m-%d")))
             data.append(get_data(symbols, date, **kwargs))
         except (IOError, ValueError) as e:
-            # data not found for day, skip
             if raise_exception:
                 raise e
-            else:
-                pass
+            log.warning("Skipping {}".format(e))
     return data
 
 
@@ -0,0 +1,106 @@
+"""
+Day-parallel backtests of day-independent strategies.
+
+A strategy that is flat at the end of every trading day and carries no state into the next one (declared with
+Strategy.day_independent = True) gives the same results whether its days are run in sequence or each on its own.
+run_days runs every session in a worker process with a fresh strategy and execution, and stitches the per-day
+pnl, positions and fills back together in date order. run_sequential runs the same backtest in one pass and returns
+the same DayResults, so the two can be compared exactly.
+
+    results = run_days(MyIntradayStrategy, products, start_date, end_date, params={'window': 20}, processes=8)
+    results.daily_pnl.cumsum()
+"""
+import logging
+import multiprocessing
+import numpy as np
+import pandas as pd
+from sweep import SweepBacktest
+from signal_backtest import TRANSACTION_COLUMNS
+from data_utils.day_data_cache import DayDataCache
+from trading.trading_calendar import TradingCalendar
+log = logging.getLogger('Backtest')
+
+
+class DayResults(object):
+    """
+    Results of a backtest, session by session.
+        daily_pnl: (Series) pnl of every session, indexed on date
+        positions: (DataFrame) contracts held per symbol at the end of every session
+        transactions: (DataFrame) indexed on fill time, columns amount, price, symbol, commission, order_time
+    """
+
+    def __init__(self, results):
+        """
+        :param results: (list) of SweepMember.result(), in date order
+        """
+        daily_pnl = [day for result in results for day in result['daily_pnl']]
+        daily_positions = [day for result in results for day in result['daily_positions']]
+        transactions = [txn for result in results for txn in result['transactions']]
+
+        index = pd.DatetimeIndex([date for date, _ in daily_pnl], name='date')
+        self.daily_pnl = pd.Series([pnl for _, pnl in daily_pnl], index=index, name='pnl', dtype=np.float64)
+        self.positions = pd.DataFrame([positions for _, positions in daily_positions], index=index).fillna(0)
+        self.transactions = pd.DataFrame([txn[1:] for txn in transactions], columns=TRANSACTION_COLUMNS,
+                                         index=pd.DatetimeIndex([txn[0] for txn in transactions], name='time'))
+
+    def returns(self, capital):
+        """
+        :param capital: (float) the capital the pnl is made on
+        :return: (Series) daily returns, as analytics.tears takes them
+        """
+        return self.daily_pnl/float(capital)
+
+
+def _run_day(args):
+    """
+    Pool worker: one session with a fresh strategy and execution.
+    """
+    strategy_class, params, products, date, loader, kwargs = args
+    day_cache = DayDataCache(loader=loader) if loader is not None else None
+    return SweepBacktest(strategy_class, [params], products, date, date, day_cache=day_cache, **kwargs).run()[0]
+
+
+def run_days(strategy_class, products, start_date, end_date, params=None, processes=1, loader=None,
+             calendar=None, **kwargs):
+    """
+    Backtest a day-independent strategy one session per worker.
+
+    :param strategy_class: (class) Strategy with day_independent True, importable (sent to the worker processes)
+    :param products: (list) (FuturesContract)
+    :param start_date: (DateTime)
+    :param end_date: (DateTime)
+    :param params: (dict) keyword arguments of the strategy
+    :param processes: (int) worker processes, 1 runs the days one after the other in this process
+    :param loader: (function) day loader of the workers' DayDataCache, defaults to the process-wide DAY_DATA_CACHE
+    :param calendar: (TradingCalendar) defaults to the calendar of the products
+    :param kwargs: passed to SweepBacktest (initial_cash, commission, start_time, end_time, bars, ...)
+    :return: (DayResults)
+    """
+    if not strategy_class.day_independent:
+        raise ValueError("{} is not day independent, its days cannot be run separately"
+                         .format(strategy_class.__name__))
+    calendar = calendar if calendar is not None else TradingCalendar.for_products(products)
+    kwargs['calendar'] = calendar
+    days = [(strategy_class, params or {}, products, date, loader, kwargs)
+            for date in calendar.sessions(start_date, end_date)]
+    log.info("Backtesting {} days of {} on {} processes".format(len(days), strategy_class.__name__, processes))
+    if processes == 1:
+        results = [_run_day(day) for day in days]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.map(_run_day, days, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    return DayResults(results)
+
+
+def run_sequential(strategy_class, products, start_date, end_date, params=None, loader=None, **kwargs):
+    """
+    The same backtest as run_days in a single pass over the days (any strategy).
+    :return: (DayResults)
+    """
+    day_cache = DayDataCache(loader=loader) if loader is not None else None
+    return DayResults(SweepBacktest(strategy_class, [params or {}], products, start_date, end_date,
+                                    day_cache=day_cache, **kwargs).run())
@@ -0,0 +1,161 @@
+"""
+Monte-Carlo execution ensembles.
+
+The random parts of a simulated execution (the random limit fills of limit_fill_probability and the order latency
+jitter) make a single backtest one sample. run_ensemble runs the same strategy, parameters and data under K
+members, each with its own seeded random streams for the fills and for the latency, and reports the distribution
+of their results:
+
+    results = run_ensemble(MyStrategy, products, start_date, end_date, members=100, params={'window': 20},
+                           processes=4, limit_fill_probability=.1, latency_jitter=dt.timedelta(seconds=.05))
+    results.quantiles('pnl')
+    results.manifest.to_csv('seeds.csv')
+
+The seeds of every member are drawn from master_seed and kept in results.manifest; passing a manifest (or some of
+its rows) back as members replays those members exactly, whatever the number of processes.
+
+Members are sharded over worker processes, each shard one data pass (see SweepBacktest). With processes > 1 the
+days are loaded once, before the workers are forked, and the workers read the parent's loaded days.
+"""
+import random
+import logging
+import itertools
+import multiprocessing
+import pandas as pd
+from data import BacktestData
+from sweep import SweepBacktest, SweepResults, METRIC_COLUMNS, EXECUTION_KWARGS
+from data_utils.day_data_cache import DayDataCache, DAY_DATA_CACHE
+from trading.event_bus import BacktestEventBus
+log = logging.getLogger('Backtest')
+
+MANIFEST_COLUMNS = ['fill_seed', 'latency_seed']
+QUANTILES = (.05, .25, .5, .75, .95)
+
+
+def seed_manifest(members, master_seed=0):
+    """
+    :param members: (int) number of members
+    :param master_seed: (int)
+    :return: (DataFrame) indexed on member, the fill_seed and latency_seed of every member
+    """
+    rng = random.Random(master_seed)
+    seeds = [(rng.getrandbits(32), rng.getrandbits(32)) for _ in range(members)]
+    return pd.DataFrame(seeds, index=pd.Index(range(members), name='member'), columns=MANIFEST_COLUMNS)
+
+
+class EnsembleResults(object):
+    """
+    Results of an ensemble.
+        table: (DataFrame) a row per member: its seeds and its metrics (sweep.METRIC_COLUMNS)
+        daily_pnl: (DataFrame) pnl of every session (rows) and member (columns)
+        manifest: (DataFrame) the seeds of every member, to replay them
+    """
+
+    def __init__(self, results, manifest):
+        """
+        :param results: (list) of SweepMember.result(), config id the member
+        :param manifest: (DataFrame) see seed_manifest
+        """
+        sweep = SweepResults(results)
+        self.manifest = manifest
+        self.table = manifest.join(sweep.table[METRIC_COLUMNS])
+        self.daily_pnl = sweep.daily_pnl
+
+    def quantiles(self, metric='pnl', q=QUANTILES):
+        """
+        :return: (Series) quantiles q of metric over the members
+        """
+        return self.table[metric].quantile(list(q))
+
+    def summary(self, q=QUANTILES):
+        """
+        :return: (DataFrame) quantiles (rows) of every metric (columns) over the members
+        """
+        return self.table[METRIC_COLUMNS].quantile(list(q))
+
+
+_worker_day_cache = None  # the loaded days of the parent, inherited by the forked pool workers
+
+
+def _init_worker(day_cache):
+    global _worker_day_cache
+    _worker_day_cache = day_cache
+
+
+def _member_kwargs(manifest):
+    """
+    The seeded random streams of every member's execution.
+    """
+    return dict((member, {'fill_rng': random.Random(int(seeds['fill_seed'])),
+                          'latency_rng': random.Random(int(seeds['latency_seed']))})
+                for member, seeds in manifest.iterrows())
+
+
+def _run_members(shard, day_cache):
+    """
+    One data pass for a shard of the members.
+    """
+    strategy_class, params, manifest, products, start_date, end_date, kwargs = shard
+    return SweepBacktest(strategy_class, [(member, params) for member in manifest.index], products, start_date,
+                         end_date, day_cache=day_cache, member_kwargs=_member_kwargs(manifest), **kwargs).run()
+
+
+def _run_shard(shard):
+    """
+    Pool worker: the members of a shard, on the days loaded by the parent.
+    """
+    return _run_members(shard, _worker_day_cache)
+
+
+def load_days(products, start_date, end_date, day_cache, **kwargs):
+    """
+    Load every session from start_date to end_date into day_cache, as the backtests will read them.
+    :param kwargs: the backtest's keyword arguments, the ones of BacktestData are used
+    """
+    data_kwargs = dict((key, value) for key, value in kwargs.items()
+                       if key not in ('initial_cash', 'commission') + EXECUTION_KWARGS)
+    data = BacktestData(BacktestEventBus(), products, start_date, end_date, day_cache=day_cache, **data_kwargs)
+    for date in data.sessions:
+        data._resolve_symbols(date)
+        data._fetch_day(date)
+
+
+def run_ensemble(strategy_class, products, start_date, end_date, members=10, params=None, master_seed=0,
+                 processes=1, loader=None, day_cache=None, **kwargs):
+    """
+    Backtest a strategy under many seeded executions.
+
+    :param strategy_class: (class) Strategy, importable (sent to the worker processes)
+    :param products: (list) (FuturesContract)
+    :param start_date: (DateTime)
+    :param end_date: (DateTime)
+    :param members: (int) number of members, seeded from master_seed, or (DataFrame) a manifest to replay
+    :param params: (dict) keyword arguments of the strategy
+    :param master_seed: (int)
+    :param processes: (int) shards of the members, each run as one data pass by a worker process; 1 runs in this
+        process
+    :param loader: (function) day loader (see DayDataCache), defaults to the process-wide DAY_DATA_CACHE
+    :param day_cache: (DayDataCache) instead of one with loader
+    :param kwargs: passed to SweepBacktest (initial_cash, commission, limit_fill_probability, latency_jitter,
+        start_time, end_time, bars, ...)
+    :return: (EnsembleResults)
+    """
+    manifest = members if isinstance(members, pd.DataFrame) else seed_manifest(members, master_seed)
+    if day_cache is None:
+        day_cache = DayDataCache(loader=loader) if loader is not None else DAY_DATA_CACHE
+    processes = max(1, min(processes, len(manifest)))
+    shards = [(strategy_class, params or {}, manifest.iloc[i::processes], products, start_date, end_date, kwargs)
+              for i in range(processes)]
+    log.info("Running {} ensemble members of {} on {} processes".format(len(manifest), strategy_class.__name__,
+                                                                         processes))
+    if processes == 1:
+        results = _run_members(shards[0], day_cache)
+    else:
+        load_days(products, start_date, end_date, day_cache, **kwargs)
+        pool = multiprocessing.Pool(processes, _init_worker, (day_cache,))
+        try:
+            results = list(itertools.chain(*pool.map(_run_shard, shards, chunksize=1)))
+        finally:
+            pool.close()
+            pool.join()
+    return EnsembleResults(results, manifest)
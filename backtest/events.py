@@ -5,6 +5,8 @@ class CMEBacktestMarketEvent(events.MarketEvent):
         super(CMEBacktestMarketEvent, self).__init__(dt)
 
 class CMEBacktestFillEvent(events.FillEvent):
+    __slots__ = ('order_time',)
+
     def __init__(self, order_time, fill_time, symbol, quantity, fill_price, fill_cost, commission=0):
         super(CMEBacktestFillEvent, self).__init__(fill_time, symbol, quantity, fill_price, fill_cost,
                                                    exchange='CMEBacktest', commission=commission)
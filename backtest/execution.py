@@ -1,28 +1,135 @@
+import heapq
 import logging
 import random
 import numpy as np
+import pandas as pd
 import datetime as dt
-from data_utils.quantgo_utils import get_data_multi
+from data import BacktestData, SESSION_START_TIME, SESSION_END_TIME
+from data_utils.day_data_cache import DAY_DATA_CACHE
+from data_utils.bar_specs import make_bar_spec
+from data_utils.alignment import last_valid_positions
+from data_utils.order_book import OrderBook, BUY, SELL
 from events import CMEBacktestFillEvent
+from resting_orders import RestingOrderBook
+from queue_position import QueuePositions
 from trading.execution import ExecutionHandler
 logging.basicConfig(level=logging.INFO, format='%(asctime)s: %(message)s')
 log = logging.getLogger('Backtest')
 
 
 CME_HISTORICAL_ORDER_DELAY = dt.timedelta(seconds=.01)
+ORDER_DELAY_NS = int(CME_HISTORICAL_ORDER_DELAY.total_seconds()*10**9)
 CME_HISTORICAL_TRANSACTION_COST = 0
 MARKET_ORDERS = True
 LIMIT_FILL_PROBABILITY = 0.1
+QUEUE_FILLS = False
+MARKET_IMPACT = False
+
+
+class SymbolQuotes(object):
+    """
+    A symbol's top of book for the day as arrays: the int64 ns times, the bid and ask and, for every row, the last
+    row at or before it with a bid (ask), so a price as of a row is two array lookups.
+    """
+    __slots__ = ('index', 'bids', 'bid_rows', 'asks', 'ask_rows')
+
+    def __init__(self, index, bids, asks):
+        """
+        :param index: (ndarray) int64 ns times, sorted
+        :param bids: (ndarray) level 1 bid of every row
+        :param asks: (ndarray) level 1 ask of every row
+        """
+        rows = np.arange(len(index))
+        self.index = index
+        self.bids = bids
+        self.bid_rows = last_valid_positions(bids, rows)
+        self.asks = asks
+        self.ask_rows = last_valid_positions(asks, rows)
+
+    @classmethod
+    def from_frame(cls, data, symbol):
+        """
+        :param data: (Multi-Index DataFrame) the day data, columns (symbol, column)
+        """
+        return cls(data.index.asi8, data[(symbol, 'level_1_price_buy')].values,
+                   data[(symbol, 'level_1_price_sell')].values)
+
+    def position(self, time):
+        """
+        :param time: (DateTime)
+        :return: (int) the last row at or before time, -1 if time is before the first row
+        """
+        return self.index.searchsorted(pd.Timestamp(time).value, side='right') - 1
+
+    def time(self, position):
+        return pd.Timestamp(self.index[position]) if position >= 0 else np.nan
+
+    def bid(self, position):
+        """
+        :return: (float) the bid as of a row, nan if there is none
+        """
+        row = self.bid_rows[position] if position >= 0 else -1
+        return self.bids[row] if row >= 0 else np.nan
+
+    def ask(self, position):
+        row = self.ask_rows[position] if position >= 0 else -1
+        return self.asks[row] if row >= 0 else np.nan
 
 
 class BacktestExecution(ExecutionHandler):
-    def __init__(self, events, products, second_bars=True, commission=None):
+    def __init__(self, events, products, second_bars=True, commission=None, start_time=SESSION_START_TIME,
+                 end_time=SESSION_END_TIME, day_cache=None, bars=None, limit_fill_probability=LIMIT_FILL_PROBABILITY,
+                 queue_fills=QUEUE_FILLS, market_impact=MARKET_IMPACT, partial_fills=False, latency_jitter=None,
+                 fill_rng=None, latency_rng=None):
+        """
+        :param limit_fill_probability: (float) chance for a resting limit order that does not cross the spread to
+            be filled anyway on a tick, 0 to fill limit orders only when they cross (checking only the marketable
+            orders of the book, see RestingOrderBook)
+        :param queue_fills: (bool) fill the resting limit orders that do not cross the spread once the volume ahead
+            of them in the queue at their price has traded or been cancelled (see QueuePositions, needs the
+            level_N_volume columns), instead of at random with limit_fill_probability
+        :param market_impact: (bool) fill market orders by walking the displayed book levels (at the size-weighted
+            average price of the contracts taken from each level) instead of all at the best bid/offer
+        :param partial_fills: (bool) with market_impact, send a fill per level taken instead of a single one at
+            the average price
+        :param latency_jitter: (timedelta) extra order delay, drawn uniformly between 0 and latency_jitter for every
+            order reaching the market (market orders and limit orders joining the queue)
+        :param fill_rng: (random.Random) draws of the random limit fills, defaults to the global random module
+        :param latency_rng: (random.Random) draws of the latency jitter, defaults to the global random module
+        """
         super(BacktestExecution, self).__init__(events)
         self.products = products
-        self.second_bars = second_bars
+        self.bars = make_bar_spec(second_bars if bars is None else bars)
+        self.start_time = start_time
+        self.end_time = end_time
+        self.day_cache = day_cache if day_cache is not None else DAY_DATA_CACHE
         self.commission = commission if commission is not None else CME_HISTORICAL_TRANSACTION_COST
-        self.resting_orders = []
+        self.limit_fill_probability = limit_fill_probability
+        self.queue_fills = queue_fills
+        self.market_impact = market_impact
+        self.partial_fills = partial_fills
+        self.latency_jitter = latency_jitter
+        self.fill_rng = fill_rng if fill_rng is not None else random
+        self.latency_rng = latency_rng if latency_rng is not None else random
+        self.resting_orders = RestingOrderBook()
+        self.queued = {}  # symbol: heap of (fill row, order id) of the resting orders
+        self.queue_rows = {}  # order id: fill row of the resting order, -1 if it does not fill today
+        self.curr_dt = None  # time of the last market update
         self.curr_day_data = None
+        self.curr_day_quotes = {}  # symbol: SymbolQuotes of curr_day_data
+        self.curr_day_books = {}  # symbol: OrderBook of curr_day_data
+        self.curr_day_queues = {}  # symbol: QueuePositions of curr_day_data
+
+    @classmethod
+    def for_data(cls, events, data, **kwargs):
+        """
+        An execution reading the same days as a data handler: its products, session window, bars and day cache,
+        so both get the same DayDataCache entry and every day is loaded once.
+        :param data: (BacktestData)
+        :param kwargs: other BacktestExecution arguments (commission, limit_fill_probability, ...)
+        """
+        return cls(events, data.products, start_time=data.start_time, end_time=data.end_time, bars=data.bars,
+                   day_cache=data.day_cache, **kwargs)
 
     def process_new_order(self, order_event):
         """
@@ -34,22 +141,56 @@ class BacktestExecution(ExecutionHandler):
 
     def process_resting_orders(self, market_event):
         """
-        On new market update, check resting orders to see if they can be filled.
-        :param market_event:
+        On new market update, fill the resting orders that cross the spread and, with queue_fills, the ones the
+        queue ran out in front of (or, with limit_fill_probability, the lucky ones). Fills are sent in order id
+        order.
+        :param market_event: (MarketEvent)
         """
+        self.curr_dt = market_event.dt
         if not self.resting_orders:
             return
-        for resting_order in self.resting_orders:
-            fill_time = self._get_fill_time(market_event.datetime, resting_order.symbol)
-            direction = self._get_order_direction(resting_order)
-            if direction is 1:
-                if self._check_fill_limit_buy(resting_order, fill_time) is True:
-                    self._fill_limit_order(resting_order, fill_time)
-                    self.resting_orders.remove(resting_order)
-            elif direction is -1:
-                if self._check_fill_limit_sell(resting_order, fill_time) is True:
-                    self._fill_limit_order(resting_order, fill_time)
-                    self.resting_orders.remove(resting_order)
+        self._check_day_data(market_event.dt)
+        filled = []
+        fills = {}  # symbol: quotes, fill position
+        for symbol in self.resting_orders.symbols():
+            quotes, position = fills[symbol] = self._get_fill_position(market_event.dt, symbol)
+            filled.extend((order.order_id, order, quotes, position, False)
+                          for order in self.resting_orders.pop_marketable(symbol, quotes.bid(position),
+                                                                          quotes.ask(position)))
+
+        if self.queue_fills:
+            for symbol, (quotes, position) in fills.items():
+                filled.extend((order.order_id, order, quotes, row, True)
+                              for order, row in self._pop_queued(symbol, position))
+        elif self.limit_fill_probability > 0:
+            for order in list(self.resting_orders):
+                quotes, position = fills[order.symbol]
+                if order.quantity > 0:
+                    lucky = order.price < quotes.ask(position)
+                else:
+                    lucky = order.price > quotes.bid(position)
+                if lucky and self._limit_fill():
+                    self.resting_orders.cancel(order.order_id)
+                    filled.append((order.order_id, order, quotes, position, False))
+
+        for _, order, quotes, position, queued in sorted(filled, key=lambda item: item[0]):
+            self._fill_limit_order(order, quotes, position, queued)
+
+    def cancel_order(self, order_id):
+        """
+        :return: (OrderEvent) the cancelled resting order, None if it is not resting
+        """
+        return self.resting_orders.cancel(order_id)
+
+    def replace_order(self, order_id, price=None, quantity=None):
+        """
+        Change the price and/or quantity of a resting order. With queue_fills, the order loses its queue position.
+        :return: (OrderEvent) the updated resting order, None if it is not resting
+        """
+        order = self.resting_orders.replace(order_id, price, quantity)
+        if order is not None and self.queue_fills:
+            self._queue_order(order, self.curr_dt if self.curr_dt is not None else order.order_time)
+        return order
 
     def place_order(self, order_event):
         """
@@ -62,7 +203,9 @@ class BacktestExecution(ExecutionHandler):
         elif order_event.order_type == 'LIMIT':
             if self._check_limit_order(order_event, order_event.order_time):
                 pass
-            self.resting_orders.append(order_event)
+            self.resting_orders.add(order_event)
+            if self.queue_fills:
+                self._queue_order(order_event, order_event.order_time)
 
     def _check_limit_order(self, order_event, dt):
         pass
@@ -73,66 +216,151 @@ class BacktestExecution(ExecutionHandler):
         """
         if order_event.quantity == 0:
             return
-        fill_time = self._get_fill_time(order_event.order_time, order_event.symbol)
-        sym_data = self.curr_day_data[order_event.symbol]
-        direction = self._get_order_direction(order_event)
-        if direction == 1:
-            fill_price = sym_data['level_1_price_sell'].asof(fill_time)
-            self.create_fill_event(order_event, fill_price, fill_time)
-        elif direction == -1:
-            fill_price = sym_data['level_1_price_buy'].asof(fill_time)
+        quotes, position = self._get_fill_position(order_event.order_time, order_event.symbol, self._order_delay())
+        if position < 0:
+            raise ValueError("No {} data at or before {}".format(order_event.symbol, order_event.order_time))
+        if self.market_impact:
+            self._walk_book(order_event, quotes, position)
+        elif order_event.quantity > 0:
+            self.create_fill_event(order_event, quotes.ask(position), quotes.time(position))
+        else:
+            self.create_fill_event(order_event, quotes.bid(position), quotes.time(position))
+
+    def _walk_book(self, order_event, quotes, position):
+        """
+        Fills a market order level by level from the book at position: the contracts beyond the displayed volume
+        are filled at the last displayed level, a side with no displayed volume fills at the best bid/offer as of
+        position. With partial_fills, the commission is charged once, on the first fill.
+        """
+        book = self._get_book(order_event.symbol)
+        side = SELL if order_event.quantity > 0 else BUY
+        quantity = abs(order_event.quantity)
+        taken = book.walk(position, side, quantity)
+        levels = np.flatnonzero(taken)
+        fill_time = quotes.time(position)
+        if not len(levels):
+            fill_price = quotes.ask(position) if side == SELL else quotes.bid(position)
             self.create_fill_event(order_event, fill_price, fill_time)
+            return
 
-    def _fill_limit_order(self, order_event, fill_time):
+        taken[levels[-1]] += quantity - taken.sum()
+        prices = book.price[position, side, levels]
+        if self.partial_fills:
+            sign = 1 if order_event.quantity > 0 else -1
+            for i, (level, price) in enumerate(zip(levels, prices)):
+                self.create_fill_event(order_event, float(price), fill_time, quantity=sign*int(taken[level]),
+                                       commission=self.commission if i == 0 else 0)
+        else:
+            self.create_fill_event(order_event, float(np.dot(taken[levels], prices))/quantity, fill_time)
+
+    def _fill_limit_order(self, order_event, quotes, position, queued=False):
+        """
+        Fills a limit order at the quote on its side as of position or, filled from the queue (queued), at its
+        limit price on the row the queue ran out.
+        """
         if order_event.quantity == 0:
             return
-        direction = self._get_order_direction(order_event)
-        sym_data = self.curr_day_data[order_event.symbol]
-        if direction == 1:
-            fill_price = sym_data['level_1_price_buy'].asof(fill_time)
-            self.create_fill_event(order_event, fill_price, fill_time)
-        elif direction == -1:
-            fill_price = sym_data['level_1_price_sell'].asof(fill_time)
-            self.create_fill_event(order_event, fill_price, fill_time)
+        if queued:
+            fill_price = order_event.price
+        elif order_event.quantity > 0:
+            fill_price = quotes.bid(position)
+        else:
+            fill_price = quotes.ask(position)
+        self.create_fill_event(order_event, fill_price, quotes.time(position))
 
-    def _check_fill_limit_buy(self, resting_order, fill_time):
+    def clear_resting_orders(self):
+        self.resting_orders.clear()
+        self.queued = {}
+        self.queue_rows = {}
+
+    def _queue_order(self, order_event, dt):
         """
-        Conditions to fill a limit order (BUY)
+        Put a resting limit order at the back of the queue at its price, as of dt plus the order delay.
         """
-        symbol = resting_order.symbol
-        if resting_order.price < self.curr_day_data[symbol]['level_1_price_sell'].asof(fill_time) and \
-                        self._limit_fill() is True or \
-                        resting_order.price >= self.curr_day_data[symbol]['level_1_price_sell'].asof(fill_time):
-            return True
-        return False
+        quotes, position = self._get_fill_position(dt, order_event.symbol, self._order_delay())
+        row = self._get_queues(order_event.symbol).fill_row(order_event.quantity, order_event.price, position)
+        self.queue_rows[order_event.order_id] = row
+        if row >= 0:
+            heapq.heappush(self.queued.setdefault(order_event.symbol, []), (row, order_event.order_id))
 
-    def _check_fill_limit_sell(self, resting_order, fill_time):
+    def _pop_queued(self, symbol, position):
         """
-        Conditions to fill a limit order (SELL)
+        Remove the resting orders of symbol whose queue ran out at or before position from the book. Entries of
+        cancelled, filled and replaced orders are dropped on the way.
+        :return: (list) of (OrderEvent, (int) fill row)
         """
-        if resting_order.price > self.curr_day_data['level_1_price_buy'].asof(fill_time) and \
-                        self._limit_fill() is True or \
-                        resting_order.price <= self.curr_day_data['level_1_price_buy'].asof(fill_time):
-            return True
-        return False
+        heap = self.queued.get(symbol)
+        orders = []
+        while heap and heap[0][0] <= position:
+            row, order_id = heapq.heappop(heap)
+            if order_id in self.resting_orders and self.queue_rows[order_id] == row:
+                del self.queue_rows[order_id]
+                orders.append((self.resting_orders.cancel(order_id), row))
+        return orders
 
-    def clear_resting_orders(self):
-        if len(self.resting_orders) > 0:
-            self.resting_orders = []
+    def _get_queues(self, symbol):
+        """
+        :return: (QueuePositions) of symbol for the current day
+        """
+        queues = self.curr_day_queues.get(symbol)
+        if queues is None:
+            queues = self.curr_day_queues[symbol] = QueuePositions.from_book(self._get_book(symbol))
+        return queues
+
+    def _get_book(self, symbol):
+        """
+        :return: (OrderBook) of symbol for the current day
+        """
+        book = self.curr_day_books.get(symbol)
+        if book is None:
+            book = self.curr_day_books[symbol] = OrderBook.from_frame(self.curr_day_data[symbol])
+        return book
+
+    def _get_quotes(self, symbol):
+        """
+        :return: (SymbolQuotes) of symbol for the current day
+        """
+        quotes = self.curr_day_quotes.get(symbol)
+        if quotes is None:
+            quotes = self.curr_day_quotes[symbol] = SymbolQuotes.from_frame(self.curr_day_data, symbol)
+        return quotes
+
+    def _get_fill_position(self, order_time, symbol, delay=CME_HISTORICAL_ORDER_DELAY):
+        """
+        Applies the order delay to order_time: one search for the row an order can be filled on, every price of
+        the fill is then looked up on that row.
+        :param delay: (timedelta)
+        :return: (SymbolQuotes) of symbol, (int) the last row at or before order_time plus the delay, -1 if none
+        """
+        quotes = self._get_quotes(symbol)
+        return quotes, quotes.position(order_time + delay)
+
+    def _order_delay(self):
+        """
+        The delay of an order reaching the market, with latency_jitter drawn from latency_rng.
+        """
+        if self.latency_jitter is None:
+            return CME_HISTORICAL_ORDER_DELAY
+        return CME_HISTORICAL_ORDER_DELAY + dt.timedelta(
+            seconds=self.latency_rng.random()*self.latency_jitter.total_seconds())
 
     def _get_fill_time(self, order_time, symbol):
         """
         Applies a delay to the order_time and returns the time of the data for which the order can be filled.
         """
-        execution_time = order_time + CME_HISTORICAL_ORDER_DELAY
-        fill_time = self.curr_day_data[symbol].index.asof(execution_time)
-        return fill_time
+        quotes, position = self._get_fill_position(order_time, symbol)
+        return quotes.time(position)
 
-    def create_fill_event(self, order_event, fill_price, fill_time):
-        fill_cost = float(order_event.quantity*fill_price)
+    def create_fill_event(self, order_event, fill_price, fill_time, quantity=None, commission=None):
+        """
+        :param quantity: (int) filled part of the order, defaults to all of it
+        :param commission: (float) defaults to the execution's commission
+        """
+        quantity = quantity if quantity is not None else order_event.quantity
+        fill_cost = float(quantity*fill_price)
         fill_event = CMEBacktestFillEvent(order_event.order_time, fill_time, order_event.symbol,
-                                          order_event.quantity, fill_price, fill_cost,
-                                          commission=self.commission)
+                                          quantity, fill_price, fill_cost,
+                                          commission=commission if commission is not None else self.commission)
         self.events.put(fill_event)
 
     def _check_day_data(self, datetime):
@@ -143,7 +371,11 @@ class BacktestExecution(ExecutionHandler):
         if self.curr_day_data is None or self.compare_dates(self.curr_day_data.index[0], datetime) is False:
             date = dt.datetime(year=datetime.year, month=datetime.month, day=datetime.day)
             symbols = [product.symbol for product in self.products]
-            self.curr_day_data = get_data_multi(symbols, date, second_bars=self.second_bars)
+            self.curr_day_data = self.day_cache.get(symbols, date, bars=self.bars,
+                                                    start_time=self.start_time, end_time=self.end_time)
+            self.curr_day_quotes = {}
+            self.curr_day_books = {}
+            self.curr_day_queues = {}
             self.clear_resting_orders()
 
     @staticmethod
@@ -165,13 +397,24 @@ class BacktestExecution(ExecutionHandler):
         """
         return dt1.year == dt2.year and dt1.month == dt2.month and dt1.day == dt2.day
 
-    @staticmethod
-    def _limit_fill():
+    def _limit_fill(self):
         """
         Probability function for limit fill.
         """
-        z = random.randint(0, 10)
-        if z/10.0 < LIMIT_FILL_PROBABILITY:
+        z = self.fill_rng.randint(0, 10)
+        if z/10.0 < self.limit_fill_probability:
             return True
         else:
             return False
+
+
+def make_handlers(events, products, start_date, end_date, start_time=SESSION_START_TIME,
+                  closing_time=SESSION_END_TIME, day_cache=None, **kwargs):
+    """
+    The data and execution handlers of a backtest, reading the same session window (so each day is loaded once).
+    :param kwargs: other BacktestExecution arguments (commission, limit_fill_probability, ...)
+    :return: (BacktestData), (BacktestExecution)
+    """
+    data = BacktestData(events, products, start_date, end_date, start_time=start_time, end_time=closing_time,
+                        day_cache=day_cache)
+    return data, BacktestExecution.for_data(events, data, **kwargs)
@@ -0,0 +1,105 @@
+import threading
+from collections import deque
+
+
+class DayPrefetcher(object):
+    """
+    Loads upcoming trading days on a background thread while the current day is being consumed.
+
+    Days are loaded strictly in the order they are scheduled and handed over only through get(date),
+    so the consumer sees exactly the same (date, result) sequence as it would loading synchronously.
+    Errors raised while loading a day are re-raised by get() for that day.
+    """
+
+    def __init__(self, load, depth=1, max_bytes=None, sizeof=None):
+        """
+        :param load: (function) load(date) -> result
+        :param depth: (int) how many days to load ahead of the consumer
+        :param max_bytes: (int) stop loading ahead while loaded but unconsumed days use this much memory
+        :param sizeof: (function) sizeof(result) -> bytes, required for max_bytes
+        """
+        assert max_bytes is None or sizeof is not None, "max_bytes requires sizeof"
+        self.load = load
+        self.depth = depth
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+
+        self._pending = deque()
+        self._results = {}  # date: (error, result, nbytes)
+        self._loading = None
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self._thread = threading.Thread(target=self._run, args=())
+        self._thread.daemon = True
+        self._thread.start()
+
+    def schedule(self, dates):
+        """
+        Queue days to be loaded in the background, in order.
+        :param dates: (list) of DateTime
+        """
+        with self._cond:
+            for date in dates:
+                if date not in self._results and date not in self._pending and date != self._loading:
+                    self._pending.append(date)
+            self._cond.notify_all()
+
+    def get(self, date):
+        """
+        Returns the loaded result for date, blocking until it is ready.
+        Days that were never scheduled are loaded on the calling thread.
+        """
+        with self._cond:
+            # anything scheduled before this date will never be asked for
+            for stale in [d for d in self._results if d < date]:
+                del self._results[stale]
+            while date not in self._results and (date in self._pending or date == self._loading):
+                self._cond.wait()
+            entry = self._results.pop(date, None)
+            self._cond.notify_all()
+
+        if entry is None:
+            return self.load(date)
+        error, result, _ = entry
+        if error is not None:
+            raise error
+        return result
+
+    def close(self):
+        """
+        Drops the days not consumed yet and waits for the thread to finish the day it is loading, if any.
+        """
+        with self._cond:
+            self._closed = True
+            self._pending.clear()
+            self._results.clear()
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _over_budget(self):
+        if self.max_bytes is None:
+            return False
+        return sum(nbytes for _, _, nbytes in self._results.values()) >= self.max_bytes
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and (not self._pending or self._over_budget()):
+                    self._cond.wait()
+                if self._closed:
+                    return
+                date = self._pending.popleft()
+                self._loading = date
+
+            try:
+                result = self.load(date)
+                entry = (None, result, self.sizeof(result) if self.sizeof is not None else 0)
+            except Exception as e:
+                entry = (e, None, 0)
+
+            with self._cond:
+                self._loading = None
+                if not self._closed:
+                    self._results[date] = entry
+                self._cond.notify_all()
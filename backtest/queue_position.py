@@ -0,0 +1,85 @@
+"""
+Queue position model of resting limit orders, from the level 2 depth of the day data.
+
+A limit order joins the back of the queue at its price: the volume displayed at that price on its side of the book
+is ahead of it. Every decrease of the displayed volume at the price between two rows is taken as traded or
+cancelled ahead of the order, increases join behind it. The order fills on the row where the volume removed from
+its level since it was placed reaches the volume that was ahead of it:
+
+    level volume    5  3  3  6  2        buy 1 at 100.0 placed on row 0: 5 ahead
+    removed         0  2  2  2  6        fills on row 4
+
+A level the market moved through (a buy priced above the best bid, a sell below the best ask) has no volume left,
+so the order is filled when its price trades through. An order improving the best price has nothing ahead of it
+and fills on the first volume removed from its level after it (or when the spread crosses it). A price deeper
+than the displayed levels keeps the volume it was last seen with, or the one it is first seen with later in the
+day.
+
+The removed volume of a (side, price) level is one cumulative sum over the day, computed once, so the fill row of
+an order is a single searchsorted and does not depend on how often the orders are checked.
+"""
+import numpy as np
+import pandas as pd
+from data_utils.order_book import BUY, SELL
+
+PRICE_TOLERANCE = 1e-6
+
+
+class QueuePositions(object):
+    """
+    Book levels of a symbol for the day, as (time, side, level) price and volume arrays.
+    """
+    __slots__ = ('index', 'price', 'volume', '_levels')
+
+    def __init__(self, index, price, volume):
+        """
+        :param index: (ndarray) int64 ns times, sorted
+        :param price: (ndarray) shape (time, side, level)
+        :param volume: (ndarray) shape (time, side, level)
+        """
+        self.index = index
+        self.price = price
+        self.volume = volume
+        self._levels = {}  # (side, price): level volume, cumulative removed volume
+
+    @classmethod
+    def from_book(cls, book):
+        """
+        :param book: (OrderBook) of the symbol for the day
+        """
+        return cls(book.index, book.price, book.volume.astype(np.float64))
+
+    def level(self, side, price):
+        """
+        :param side: (int) BUY or SELL
+        :param price: (float)
+        :return: (ndarray) volume displayed at price on side on every row, (ndarray) volume removed from it since
+            the first row
+        """
+        key = (side, round(price, 8))
+        if key not in self._levels:
+            prices = self.price[:, side, :]
+            at_price = np.abs(prices - price) < PRICE_TOLERANCE
+            with np.errstate(invalid='ignore'):
+                through = price > prices[:, 0] if side == BUY else price < prices[:, 0]
+            volume = np.where(at_price, self.volume[:, side, :], 0.).sum(axis=1)
+            volume[through] = 0.
+            volume[~(at_price.any(axis=1) | through)] = np.nan
+            volume = pd.Series(volume).fillna(method='ffill').fillna(method='bfill').fillna(0.).values
+            removed = np.zeros(len(volume))
+            removed[1:] = np.maximum(volume[:-1] - volume[1:], 0.)
+            self._levels[key] = volume, np.cumsum(removed)
+        return self._levels[key]
+
+    def fill_row(self, quantity, price, row):
+        """
+        :param quantity: (int) signed quantity of the limit order
+        :param price: (float) limit price
+        :param row: (int) row the order joins the queue on
+        :return: (int) row the order is filled on, -1 if it is not filled today
+        """
+        volume, removed = self.level(BUY if quantity > 0 else SELL, price)
+        row = max(row, 0)
+        ahead = volume[row]
+        fill = np.searchsorted(removed, removed[row] + ahead, side='left' if ahead > 0 else 'right')
+        return int(fill) if fill < len(removed) else -1
@@ -0,0 +1,127 @@
+"""
+Book of the resting (limit) orders of a simulated execution.
+
+Orders are held per symbol in two heaps, buys by highest price and sells by lowest, each entry keyed on
+(price, order id) so orders at the same price keep their arrival order. The orders that can trade against the
+current quote (buys at or above the ask, sells at or below the bid) are always at the top of their heap, so a tick
+pops the marketable frontier in O(log n) per fill instead of checking every resting order.
+
+Cancelled and replaced orders are removed lazily: their heap entries are marked dead and dropped when they reach
+the top. The live entries are kept in arrival (order id) order, a replaced order keeping its place, so iterating
+the book does not sort it.
+"""
+import heapq
+from collections import OrderedDict
+
+
+class _Entry(object):
+    __slots__ = ('order', 'live')
+
+    def __init__(self, order):
+        self.order = order
+        self.live = True
+
+
+class RestingOrderBook(object):
+
+    def __init__(self):
+        self._entries = OrderedDict()  # order id: live _Entry, in arrival order
+        self._buys = {}  # symbol: heap of (-price, order id, _Entry)
+        self._sells = {}  # symbol: heap of (price, order id, _Entry)
+        self._symbols = []  # symbols with a heap, in the order their first order arrived
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, order_id):
+        return order_id in self._entries
+
+    def __iter__(self):
+        """
+        The resting orders in arrival (order id) order. Copy it (list(book)) to cancel orders while iterating.
+        """
+        return (entry.order for entry in self._entries.itervalues())
+
+    def get(self, order_id):
+        entry = self._entries.get(order_id)
+        return entry.order if entry is not None else None
+
+    def symbols(self):
+        """
+        The symbols that have (or had, since the last clear) resting orders, without scanning the orders.
+        """
+        return list(self._symbols)
+
+    def add(self, order):
+        """
+        :param order: (OrderEvent) LIMIT order with an order_id
+        """
+        assert order.order_id not in self._entries, "order {} is already resting".format(order.order_id)
+        self._entries[order.order_id] = self._push(order)
+
+    def _push(self, order):
+        if order.symbol not in self._buys:
+            self._buys[order.symbol] = []
+            self._sells[order.symbol] = []
+            self._symbols.append(order.symbol)
+        entry = _Entry(order)
+        if order.quantity > 0:
+            heapq.heappush(self._buys[order.symbol], (-order.price, order.order_id, entry))
+        else:
+            heapq.heappush(self._sells[order.symbol], (order.price, order.order_id, entry))
+        return entry
+
+    def cancel(self, order_id):
+        """
+        :return: (OrderEvent) the cancelled order, None if it is not resting (filled, cancelled or unknown)
+        """
+        entry = self._entries.pop(order_id, None)
+        if entry is None:
+            return None
+        entry.live = False
+        return entry.order
+
+    def replace(self, order_id, price=None, quantity=None):
+        """
+        Change the price and/or quantity of a resting order, keeping its order id and its place in the arrival order.
+        :return: (OrderEvent) the updated order, None if it is not resting
+        """
+        entry = self._entries.get(order_id)
+        if entry is None:
+            return None
+        entry.live = False
+        order = entry.order
+        if price is not None:
+            order.price = float(price)
+        if quantity is not None:
+            order.quantity = quantity
+        self._entries[order_id] = self._push(order)
+        return order
+
+    def pop_marketable(self, symbol, bid, ask):
+        """
+        Remove and return the orders of symbol that trade against the quote: buys priced at or above the ask and
+        sells priced at or below the bid (none against a missing, nan, price).
+        :return: (list) of OrderEvent, in price priority
+        """
+        return self._pop(self._buys.get(symbol), -ask) + self._pop(self._sells.get(symbol), bid)
+
+    def _pop(self, heap, limit):
+        orders = []
+        while heap:
+            key, order_id, entry = heap[0]
+            if not entry.live:
+                heapq.heappop(heap)
+            elif key <= limit:
+                heapq.heappop(heap)
+                del self._entries[order_id]
+                orders.append(entry.order)
+            else:
+                break
+        return orders
+
+    def clear(self):
+        self._entries.clear()
+        self._buys.clear()
+        self._sells.clear()
+        del self._symbols[:]
@@ -0,0 +1,250 @@
+"""
+Signal-frame backtests: strategies whose positions are a function of the day's bars.
+
+A SignalStrategy returns the target position of every product at every bar of a day in one call,
+target_positions(block). The event-driven Backtest runs it bar by bar, ordering the difference to the target on
+every tick. SignalBacktest runs it a day at a time: the orders, fills and pnl of the whole day are computed with
+numpy, using the same fill rules as BacktestExecution._fill_market_order (cross the spread at the best price as of
+the order time plus the order delay). Both produce the same SignalResults.
+"""
+import logging
+import numpy as np
+import pandas as pd
+from abc import abstractmethod
+from bar_cursor import DayBlock
+from data import SESSION_START_TIME, SESSION_END_TIME
+from execution import ORDER_DELAY_NS, CME_HISTORICAL_TRANSACTION_COST
+from data_utils.alignment import last_valid_positions
+from data_utils.bar_specs import make_bar_spec
+from data_utils.day_data_cache import DAY_DATA_CACHE
+from trading.strategy import Strategy
+from trading.trading_calendar import TradingCalendar
+log = logging.getLogger('Backtest')
+
+TRANSACTION_COLUMNS = ['amount', 'price', 'symbol', 'commission', 'order_time']
+
+
+class SignalResults(object):
+    """
+    Bar by bar results of a signal backtest.
+        pnl: (Series) cash flows plus open positions marked at the mid, before the bar's orders
+        positions: (DataFrame) contracts held per symbol, before the bar's orders
+        transactions: (DataFrame) indexed on fill time, columns amount, price, symbol, commission, order_time
+    """
+
+    def __init__(self, pnl, positions, transactions):
+        self.pnl = pnl
+        self.positions = positions
+        self.transactions = transactions
+
+    @classmethod
+    def from_days(cls, days, transactions):
+        """
+        :param days: (list) of (ndarray) int64 ns bar times, (list) symbols, (ndarray) positions (bars, symbols),
+            (ndarray) pnl
+        :param transactions: (list) of (fill time ns, amount, price, symbol, commission, order time ns)
+        """
+        if days:
+            index = pd.DatetimeIndex(np.concatenate([day[0] for day in days]), name='time')
+            pnl = pd.Series(np.concatenate([day[3] for day in days]), index=index, name='pnl')
+            positions = pd.concat([pd.DataFrame(day[2], index=pd.DatetimeIndex(day[0], name='time'), columns=day[1])
+                                   for day in days]).fillna(0)
+        else:
+            index = pd.DatetimeIndex([], name='time')
+            pnl = pd.Series([], index=index, name='pnl', dtype=np.float64)
+            positions = pd.DataFrame(index=index)
+
+        transactions = pd.DataFrame([txn[1:] for txn in transactions], columns=TRANSACTION_COLUMNS,
+                                    index=pd.DatetimeIndex([txn[0] for txn in transactions], name='time'))
+        transactions['order_time'] = pd.to_datetime(transactions['order_time'])
+        return cls(pnl, positions, transactions)
+
+
+def _mids(block, symbols):
+    """
+    :return: (ndarray) mid price of every symbol at every bar, shape (bars, symbols)
+    """
+    return np.column_stack([(block.column(symbol, 'level_1_price_buy') +
+                             block.column(symbol, 'level_1_price_sell'))/2. for symbol in symbols])
+
+
+def _marked_pnl(cash, positions, multipliers, mids):
+    """
+    cash plus every open position marked at its mid (flat positions count 0, even without a mid).
+    """
+    values = np.where(positions != 0, positions*multipliers*mids, 0.)
+    return cash + values.sum(axis=1)
+
+
+class SignalStrategy(Strategy):
+    """
+    A strategy given by target positions: target_positions(block) is called once per day with the day's DayBlock
+    and returns the number of contracts to hold of every product (in the day's symbol) after every bar. The
+    backtest orders the difference with market orders.
+
+    Runs in the event-driven Backtest (with BacktestData and BacktestExecution) or in SignalBacktest, which only
+    uses products and target_positions.
+    """
+
+    def __init__(self, events, data, products, initial_cash=0, commission=None, *args, **kwargs):
+        """
+        :param commission: (float) per fill, as BacktestExecution's, only used to account the cash
+        """
+        self.commission = commission if commission is not None else CME_HISTORICAL_TRANSACTION_COST
+        super(SignalStrategy, self).__init__(events, data, products, initial_cash, *args, **kwargs)
+        self.multipliers = np.array([product.contract_multiplier for product in self.products], dtype=np.float64)
+        self.holdings = {}  # symbol: contracts
+        self.signal_cash = 0.
+        self._block = None
+        self._targets = None
+        self._mids = None
+        self._days = []
+        self._transactions = []
+
+    @abstractmethod
+    def target_positions(self, block):
+        """
+        :param block: (DayBlock) the day's bars
+        :return: (ndarray) int, shape (bars, products), contracts to hold after each bar
+        """
+        raise NotImplementedError("SignalStrategy.target_positions()")
+
+    def new_tick(self):
+        block = self.data.curr_day_block
+        position = self.last_bar.position
+        symbols = [product.symbol for product in self.products]
+        if block is not self._block:
+            self._block = block
+            self._targets = np.asarray(self.target_positions(block))
+            self._mids = _mids(block, symbols)
+            self._days.append((block.index, symbols, np.zeros((len(block), len(symbols))), np.zeros(len(block))))
+
+        _, _, day_positions, day_pnl = self._days[-1]
+        held = np.array([self.holdings.get(symbol, 0) for symbol in symbols], dtype=np.float64)
+        day_positions[position] = held
+        day_pnl[position] = _marked_pnl(self.signal_cash, held[np.newaxis], self.multipliers,
+                                        self._mids[position][np.newaxis])[0]
+
+        for j, product in enumerate(self.products):
+            quantity = int(self._targets[position, j] - held[j])
+            if quantity != 0:
+                self.order(product, quantity)
+
+    def new_fill(self, fill_event):
+        symbol = fill_event.symbol
+        j = [product.symbol for product in self.products].index(symbol)
+        self.holdings[symbol] = self.holdings.get(symbol, 0) + fill_event.quantity
+        self.signal_cash -= self.multipliers[j]*fill_event.fill_cost + fill_event.commission
+        self._transactions.append((pd.Timestamp(fill_event.fill_time).value, fill_event.quantity,
+                                   fill_event.fill_price, symbol, fill_event.commission,
+                                   pd.Timestamp(fill_event.order_time).value))
+
+    def finished(self):
+        pass
+
+    def results(self):
+        """
+        :return: (SignalResults) of the event-driven run
+        """
+        return SignalResults.from_days(self._days, self._transactions)
+
+
+class SignalBacktest(object):
+    """
+    Runs a SignalStrategy a day at a time with numpy instead of through events.
+    """
+
+    def __init__(self, strategy, start_date, end_date, start_time=SESSION_START_TIME, end_time=SESSION_END_TIME,
+                 second_bars=True, bars=None, commission=None, day_cache=None, calendar=None):
+        """
+        :param strategy: (SignalStrategy)
+        :param start_date: (DateTime)
+        :param end_date: (DateTime)
+        :param start_time: (dt.time) session window start
+        :param end_time: (dt.time) session window end
+        :param second_bars: (bool) shorthand for bars=TimeBars(1, label='start'), ignored when bars is given
+        :param bars: (BarSpec)
+        :param commission: (float) per fill, defaults to the strategy's
+        :param day_cache: (DayDataCache) defaults to the process-wide DAY_DATA_CACHE
+        :param calendar: (TradingCalendar) defaults to the calendar of the products
+        """
+        self.strategy = strategy
+        self.products = strategy.products
+        self.start_date = start_date
+        self.end_date = end_date
+        self.start_time = start_time
+        self.end_time = end_time
+        self.bars = make_bar_spec(second_bars if bars is None else bars)
+        self.commission = commission if commission is not None else strategy.commission
+        self.day_cache = day_cache if day_cache is not None else DAY_DATA_CACHE
+        self.calendar = calendar if calendar is not None else TradingCalendar.for_products(self.products)
+        self.multipliers = np.array([product.contract_multiplier for product in self.products], dtype=np.float64)
+        self.missing_days = []
+
+    def run(self):
+        """
+        :return: (SignalResults)
+        """
+        holdings = {}
+        cash = 0.
+        days = []
+        transactions = []
+        for date in self.calendar.sessions(self.start_date, self.end_date):
+            symbols = [product.roll_symbol(year=date.year, month=date.month, day=date.day)
+                       for product in self.products]
+            try:
+                data = self.day_cache.get(symbols, date, bars=self.bars, start_time=self.start_time,
+                                          end_time=self.end_time)
+            except (IOError, ValueError) as e:
+                log.warning("Skipping {}: {}".format(date.strftime("%Y-%m-%d"), e))
+                self.missing_days.append((date, str(e)))
+                continue
+            for product, symbol in zip(self.products, symbols):
+                product.set_symbol(symbol)
+            block = DayBlock.from_frame(data)
+            targets = np.asarray(self.strategy.target_positions(block))
+            cash = self._run_day(block, symbols, targets, holdings, cash, days, transactions)
+        return SignalResults.from_days(days, transactions)
+
+    def _run_day(self, block, symbols, targets, holdings, cash, days, transactions):
+        """
+        Fill the day's orders and append its positions, pnl and transactions.
+        :return: (float) cash at the end of the day
+        """
+        n = len(block)
+        targets = targets.astype(np.float64)
+        held = np.empty_like(targets)
+        held[0] = [holdings.get(symbol, 0) for symbol in symbols]
+        held[1:] = targets[:-1]
+        orders = targets - held
+
+        # the bar each order fills on: the last bar at or before the order time plus the order delay
+        fill_positions = np.searchsorted(block.index, block.index + ORDER_DELAY_NS, side='right') - 1
+        cash_flows = np.zeros(n)
+        day_transactions = []
+        for j, symbol in enumerate(symbols):
+            order_bars = np.flatnonzero(orders[:, j])
+            if not len(order_bars):
+                continue
+            quantities = orders[order_bars, j]
+            fill_bars = fill_positions[order_bars]
+            prices = np.empty(len(order_bars))
+            for side, column in [(quantities > 0, 'level_1_price_sell'), (quantities < 0, 'level_1_price_buy')]:
+                values = block.column(symbol, column)
+                rows = last_valid_positions(values, fill_bars[side])
+                prices[side] = np.where(rows >= 0, values[np.maximum(rows, 0)], np.nan)
+            cash_flows[order_bars] -= self.multipliers[j]*(quantities*prices) + self.commission
+            for bar, fill_bar, quantity, price in zip(order_bars, fill_bars, quantities, prices):
+                day_transactions.append(((bar, j), (block.index[fill_bar], int(quantity), price, symbol,
+                                                    self.commission, block.index[bar])))
+        # in the order the event-driven backtest fills them: by bar, then product
+        transactions.extend(txn for _, txn in sorted(day_transactions, key=lambda item: item[0]))
+
+        # cash before each bar's orders
+        cash_before = cash + np.concatenate([[0.], np.cumsum(cash_flows)[:-1]])
+        pnl = _marked_pnl(cash_before, held, self.multipliers, _mids(block, symbols))
+        days.append((block.index, symbols, held, pnl))
+
+        for j, symbol in enumerate(symbols):
+            holdings[symbol] = targets[-1, j]
+        return cash + cash_flows.sum()
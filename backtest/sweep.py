@@ -0,0 +1,336 @@
+"""
+Parameter sweeps: one pass over the data drives many strategy instances.
+
+A SweepBacktest builds a strategy (with its own event bus and BacktestExecution) for every configuration of a
+parameter grid. A single BacktestData loads and iterates the days once; every market event it emits is delivered to
+every member, which then handles its own orders and fills exactly as a Backtest of that strategy alone would.
+
+run_sweep shards the grid over a process pool (one SweepBacktest, so one data pass, per process) and collects a
+results table with a row per configuration:
+
+    results = run_sweep(MyStrategy, {'window': [20, 60], 'threshold': [.1, .2]}, products, start_date, end_date,
+                        processes=4)
+    results.table.sort_values('sharpe')
+"""
+import logging
+import itertools
+import multiprocessing
+import numpy as np
+import pandas as pd
+from data import BacktestData
+from execution import BacktestExecution
+from data_utils.alignment import last_valid_positions
+from data_utils.day_data_cache import DayDataCache
+from trading.event_bus import BacktestEventBus
+from trading.events import MARKET, ORDER, FILL, NEW_DAY
+from trading.futures_utils import get_base_symbol_from_symbol
+log = logging.getLogger('Backtest')
+
+METRIC_COLUMNS = ['pnl', 'sharpe', 'max_drawdown', 'fills', 'contracts']
+METRIC_MIN_SESSIONS = {'sharpe': 2}  # sessions a metric needs to be defined, 1 for the others
+EXECUTION_KWARGS = ('limit_fill_probability', 'queue_fills', 'market_impact', 'partial_fills', 'latency_jitter')
+
+
+def parameter_grid(grid):
+    """
+    :param grid: (dict) parameter: (list) of values
+    :return: (list) of (dict) parameter: value, every combination, in a stable order (parameters sorted by name)
+    """
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*[grid[name] for name in names])]
+
+
+def daily_metrics(daily_pnl, fills, contracts):
+    """
+    :param daily_pnl: (Series) pnl of every session
+    :return: (dict) total pnl, annualized sharpe of the daily pnl, max drawdown (<= 0, in dollars), fills and
+        contracts traded
+    """
+    changes = daily_pnl.values
+    cumulative = np.cumsum(changes)
+    drawdowns = cumulative - np.maximum.accumulate(np.concatenate([[0.], cumulative]))[1:]
+    std = changes.std() if len(changes) else 0.
+    return {'pnl': cumulative[-1] if len(changes) else 0.,
+            'sharpe': np.sqrt(252)*changes.mean()/std if len(changes) > 1 and std > 0 else np.nan,
+            'max_drawdown': drawdowns.min() if len(changes) else 0.,
+            'fills': fills,
+            'contracts': contracts}
+
+
+class SweepMember(object):
+    """
+    One configuration of a sweep: a strategy with its own event bus and execution. Also records the strategy's
+    fills and, at the end of every session, its pnl for the session (the session's cash flows plus the change in
+    the value of the open positions at the closing mid) and its positions.
+    """
+
+    def __init__(self, config_id, params, strategy, execution, events, multipliers):
+        """
+        :param multipliers: (dict) base symbol: contract multiplier of every product
+        """
+        self.config_id = config_id
+        self.params = params
+        self.strategy = strategy
+        self.execution = execution
+        self.events = events
+        self.multipliers = multipliers
+        self.holdings = {}  # symbol: contracts
+        self.day_cash = 0.  # cash flows of the current session
+        self.value = 0.  # open positions at the last session's closing mids
+        self.transactions = []  # (fill time, amount, price, symbol, commission, order time) as TRANSACTION_COLUMNS
+        self.contracts = 0
+        self.daily_pnl = []  # (date, pnl of the session)
+        self.daily_positions = []  # (date, {symbol: contracts})
+
+        handlers = [None]*4
+        handlers[MARKET] = self._handle_market_event
+        handlers[ORDER] = execution.process_new_order
+        handlers[FILL] = self._handle_fill_event
+        handlers[NEW_DAY] = lambda event: strategy.new_day_update()
+        self.handlers = handlers
+
+    def process(self):
+        """
+        Handle every event on the member's bus, including the orders and fills they lead to.
+        """
+        handlers = self.handlers
+        get_event = self.events.get
+        event = get_event()
+        while event is not None:
+            handlers[event.code](event)
+            event = get_event()
+
+    def _handle_market_event(self, market_event):
+        self.strategy.new_tick_update(market_event)
+        self.execution.process_resting_orders(market_event)
+
+    def _handle_fill_event(self, fill_event):
+        multiplier = self.multipliers[get_base_symbol_from_symbol(fill_event.symbol)]
+        self.day_cash -= multiplier*fill_event.fill_cost + fill_event.commission
+        self.holdings[fill_event.symbol] = self.holdings.get(fill_event.symbol, 0) + fill_event.quantity
+        self.transactions.append((fill_event.fill_time, fill_event.quantity, fill_event.fill_price,
+                                  fill_event.symbol, fill_event.commission, getattr(fill_event, 'order_time', None)))
+        self.contracts += abs(fill_event.quantity)
+        self.strategy.new_fill_update(fill_event)
+
+    def mark(self, date, marks):
+        """
+        Record the session's pnl and positions.
+        :param marks: (dict) symbol: contract multiplier times the last closing mid, a position in a symbol never
+            marked makes the pnl nan
+        """
+        value = sum(quantity*marks.get(symbol, np.nan)
+                    for symbol, quantity in self.holdings.items() if quantity != 0)
+        self.daily_pnl.append((date, self.day_cash + value - self.value))
+        self.daily_positions.append((date, dict((symbol, quantity) for symbol, quantity in self.holdings.items()
+                                                if quantity != 0)))
+        self.day_cash = 0.
+        self.value = value
+
+    def result(self):
+        """
+        :return: (dict) config_id, params, metrics, daily_pnl, daily_positions and transactions, picklable
+        """
+        daily_pnl = pd.Series([pnl for _, pnl in self.daily_pnl], index=[date for date, _ in self.daily_pnl])
+        return {'config_id': self.config_id,
+                'params': self.params,
+                'metrics': daily_metrics(daily_pnl, len(self.transactions), self.contracts),
+                'daily_pnl': self.daily_pnl,
+                'daily_positions': self.daily_positions,
+                'transactions': self.transactions}
+
+
+class SweepBacktest(object):
+    """
+    Runs many configurations of a strategy over a single pass of the data.
+    """
+
+    def __init__(self, strategy_class, configs, products, start_date, end_date, initial_cash=0, commission=None,
+                 day_cache=None, member_kwargs=None, **data_kwargs):
+        """
+        :param strategy_class: (class) Strategy, built as strategy_class(events, data, products, initial_cash,
+            **params)
+        :param configs: (list) of (dict) params, or of (config id, params)
+        :param products: (list) (FuturesContract) shared by every member
+        :param start_date: (DateTime)
+        :param end_date: (DateTime)
+        :param commission: (float) per fill, for every member's BacktestExecution
+        :param day_cache: (DayDataCache) defaults to the process-wide DAY_DATA_CACHE
+        :param member_kwargs: (dict) config id: (dict) keyword arguments of that member's BacktestExecution only
+            (e.g. its fill_rng)
+        :param data_kwargs: passed to BacktestData (start_time, end_time, bars, ...), whose window and bars every
+            BacktestExecution reads, the EXECUTION_KWARGS (market_impact, queue_fills, ...) to BacktestExecution only
+        """
+        self.products = products
+        self.start_date = start_date
+        self.end_date = end_date
+        self.events = BacktestEventBus()
+        execution_kwargs = dict((key, data_kwargs.pop(key)) for key in EXECUTION_KWARGS if key in data_kwargs)
+        self.data = BacktestData(self.events, products, start_date, end_date, day_cache=day_cache, **data_kwargs)
+
+        self.multipliers = dict((product.base_symbol, product.contract_multiplier) for product in products)
+        self.marks = {}  # symbol: contract multiplier times its last closing mid
+        self.members = []
+        for i, config in enumerate(configs):
+            config_id, params = config if isinstance(config, tuple) else (i, config)
+            events = BacktestEventBus()
+            kwargs = dict(execution_kwargs, **(member_kwargs or {}).get(config_id, {}))
+            execution = BacktestExecution.for_data(events, self.data, commission=commission, **kwargs)
+            strategy = strategy_class(events, self.data, products, initial_cash, **params)
+            self.members.append(SweepMember(config_id, params, strategy, execution, events, self.multipliers))
+
+    def run(self):
+        """
+        :return: (list) of every member's result()
+        """
+        log.info("Sweeping {} configurations from {} to {}".format(len(self.members),
+                                                                   self.start_date.strftime("%Y-%m-%d"),
+                                                                   self.end_date.strftime("%Y-%m-%d")))
+        get_event = self.events.get
+        member_buses = [member.events for member in self.members]
+        day = (self.data.curr_day, self.data.curr_day_block)
+        while self.data.continue_backtest:
+            self.data.update()
+            if self.data.curr_day_block is not day[1]:
+                self._mark(*day)
+                day = (self.data.curr_day, self.data.curr_day_block)
+
+            # the same events, in the same order, as each member's own bus would hold in a Backtest
+            event = get_event()
+            while event is not None:
+                for events in member_buses:
+                    events.put(event)
+                event = get_event()
+            for member in self.members:
+                member.process()
+
+        self._mark(*day)
+        for member in self.members:
+            member.strategy.finished()
+        return [member.result() for member in self.members]
+
+    def _mark(self, date, block):
+        """
+        Mark the members at the close of the day of block, from the symbols of that day: a continuous contract has
+        already rolled to the next day's symbol when its day is marked. A symbol rolled out of keeps its last mark.
+        """
+        if block is None:
+            return
+        for symbol in block.symbols:
+            if (symbol, 'level_1_price_buy') not in block.columns:
+                continue
+            mids = (block.column(symbol, 'level_1_price_buy') + block.column(symbol, 'level_1_price_sell'))/2.
+            last = last_valid_positions(mids, np.array([len(mids) - 1]))[0]
+            if last >= 0:
+                self.marks[symbol] = self.multipliers[get_base_symbol_from_symbol(symbol)]*mids[last]
+        for member in self.members:
+            member.mark(date, self.marks)
+
+
+class SweepResults(object):
+    """
+    Results of a sweep.
+        table: (DataFrame) indexed on config id, a column per parameter then METRIC_COLUMNS
+        daily_pnl: (DataFrame) pnl of every session, a column per config id
+    """
+
+    def __init__(self, results):
+        """
+        :param results: (list) of SweepMember.result()
+        """
+        results = sorted(results, key=lambda result: result['config_id'])
+        self._params = dict((result['config_id'], result['params']) for result in results)
+        rows = []
+        for result in results:
+            row = dict(result['params'])
+            row.update(result['metrics'])
+            rows.append(row)
+        params = sorted(set(itertools.chain(*[result['params'] for result in results])))
+        self.table = pd.DataFrame(rows, index=pd.Index([result['config_id'] for result in results], name='config'),
+                                  columns=params + METRIC_COLUMNS)
+        self.daily_pnl = pd.DataFrame(dict((result['config_id'], pd.Series(dict(result['daily_pnl'])))
+                                           for result in results),
+                                      columns=[result['config_id'] for result in results])
+
+    def params(self, config_id):
+        """
+        :return: (dict) the parameters of a configuration
+        """
+        return dict(self._params[config_id])
+
+    def best(self, metric='sharpe'):
+        """
+        :return: (int) id of the configuration with the highest metric, None if the metric is NaN for every
+            configuration (e.g. the sharpe of configurations that did not trade)
+        """
+        values = self.table[metric]
+        if not values.notnull().any():
+            return None
+        return values.idxmax()
+
+
+_worker_day_cache = None  # the day cache of a pool worker process, kept from one task to the next
+
+
+def _init_worker(loader):
+    global _worker_day_cache
+    _worker_day_cache = DayDataCache(loader=loader) if loader is not None else None
+
+
+def make_pool(processes, loader=None):
+    """
+    A process pool for run_sweep. Every worker keeps its own day cache, so the days of a pool reused across sweeps
+    (e.g. the overlapping windows of a walk-forward) are loaded once per worker.
+    :param loader: (function) day loader of the workers' DayDataCache, defaults to the process-wide DAY_DATA_CACHE
+    """
+    return multiprocessing.Pool(processes, _init_worker, (loader,))
+
+
+def _run_shard(args):
+    """
+    Pool worker: one data pass for a shard of the configurations.
+    """
+    strategy_class, configs, products, start_date, end_date, kwargs = args
+    return SweepBacktest(strategy_class, configs, products, start_date, end_date, day_cache=_worker_day_cache,
+                         **kwargs).run()
+
+
+def run_sweep(strategy_class, grid, products, start_date, end_date, processes=1, loader=None, pool=None,
+              day_cache=None, **kwargs):
+    """
+    Backtest every configuration of a parameter grid.
+
+    :param strategy_class: (class) Strategy taking the grid's parameters as keyword arguments, importable (so it
+        can be sent to the worker processes)
+    :param grid: (dict) parameter: (list) of values, or (list) of (dict) params
+    :param products: (list) (FuturesContract)
+    :param start_date: (DateTime)
+    :param end_date: (DateTime)
+    :param processes: (int) shards of the configurations, each run as one data pass by a worker process; 1 runs
+        in this process
+    :param loader: (function) day loader of the day cache (see DayDataCache), defaults to the process-wide
+        DAY_DATA_CACHE
+    :param pool: (Pool) from make_pool, to reuse its workers (and their day caches), a new pool by default
+    :param day_cache: (DayDataCache) of the run in this process (processes=1), instead of one with loader
+    :param kwargs: passed to SweepBacktest (initial_cash, commission, start_time, end_time, bars, ...)
+    :return: (SweepResults)
+    """
+    configs = list(enumerate(parameter_grid(grid) if isinstance(grid, dict) else grid))
+    processes = max(1, min(processes, len(configs)))
+    shards = [(strategy_class, configs[i::processes], products, start_date, end_date, kwargs)
+              for i in range(processes)]
+    if processes == 1:
+        if day_cache is None and loader is not None:
+            day_cache = DayDataCache(loader=loader)
+        results = SweepBacktest(strategy_class, configs, products, start_date, end_date, day_cache=day_cache,
+                                **kwargs).run()
+    elif pool is not None:
+        results = list(itertools.chain(*pool.map(_run_shard, shards)))
+    else:
+        pool = make_pool(processes, loader)
+        try:
+            results = list(itertools.chain(*pool.map(_run_shard, shards)))
+        finally:
+            pool.close()
+            pool.join()
+    return SweepResults(results)
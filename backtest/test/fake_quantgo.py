@@ -0,0 +1,52 @@
+"""
+Local stand-in for service_cli's QuantGoService: get_data writes a synthetic raw CME Level 2 day (see
+backtest.test.synthetic) to the output file, without touching the network.
+
+    BulkDownloader(service_factory=lambda: service, ...)
+"""
+import os
+import shutil
+import datetime as dt
+import tempfile
+import threading
+from collections import Counter
+from backtest.test.synthetic import write_cme_level2_file
+
+
+class FakeQuantGoService(object):
+
+    def __init__(self, n_updates=200, empty_days=(), failures=None, error=IOError):
+        """
+        :param n_updates: (int) book updates written per day
+        :param empty_days: (iterable) of (symbol, 'YYYYMMDD') for which nothing is written
+        :param failures: (dict) (symbol, 'YYYYMMDD'): number of calls that raise before one succeeds
+        :param error: (Exception) class raised by the failing calls
+        """
+        self.n_updates = n_updates
+        self.empty_days = set(empty_days)
+        self.failures = dict(failures or {})
+        self.error = error
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def get_data(self, service, params, output_file):
+        symbol = params['TickerNames'][0]
+        date_str = params['Date']
+        key = (symbol, date_str)
+        with self._lock:
+            self.calls[key] += 1
+            failing = self.calls[key] <= self.failures.get(key, 0)
+        if failing:
+            raise self.error("Service unavailable")
+        if key in self.empty_days:
+            return
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            fpath = write_cme_level2_file(os.path.join(tmp_dir, 'day.csv'), symbol,
+                                          dt.datetime.strptime(date_str, '%Y%m%d'), n_updates=self.n_updates,
+                                          seed=int(date_str) % 1000)
+            with open(fpath, 'rb') as f:
+                shutil.copyfileobj(f, output_file)
+        finally:
+            shutil.rmtree(tmp_dir)
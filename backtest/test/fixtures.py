@@ -0,0 +1,130 @@
+"""
+Synthetic day data and order flows shared by the backtest tests and the benchmarks: the day loaders have the
+DayDataCache loader signature and are deterministic per date.
+
+    cache = DayDataCache(loader=load_quotes)
+    data = cache.get(SYMBOLS, START)
+"""
+import time
+import numpy as np
+import pandas as pd
+import datetime as dt
+from trading.events import OrderEvent
+from trading.futures_contract import FuturesContract
+
+START = dt.datetime(2015, 12, 1)
+SYMBOLS = ['GCG6', 'SIG6']
+TICK = 0.1
+
+
+def load_quotes(symbols, date, bars=None, start_time=None, end_time=None, rows=400):
+    """
+    Top of book of symbols on an irregular (millisecond) time grid, one side missing at the open.
+    """
+    rng = np.random.RandomState(date.toordinal())
+    steps = rng.choice([3, 8, 15, 400, 1000], size=rows)
+    index = pd.DatetimeIndex(pd.Timestamp(date + dt.timedelta(hours=3)).value + np.cumsum(steps)*10**6, name='time')
+    data = {}
+    for i, symbol in enumerate(symbols):
+        mids = 1000*(i + 1) + 0.1*np.cumsum(rng.randint(-1, 2, size=rows))
+        spreads = 0.1*rng.randint(1, 3, size=rows)
+        buy = mids - spreads/2
+        buy[:3] = np.nan
+        data[(symbol, 'level_1_price_buy')] = buy
+        data[(symbol, 'level_1_price_sell')] = mids + spreads/2
+    frame = pd.DataFrame(data, index=index)
+    frame.columns = pd.MultiIndex.from_tuples(list(frame.columns))
+    return frame
+
+
+def load_depth(symbols, date, bars=None, start_time=None, end_time=None, rows=400, levels=5):
+    """
+    Book of symbols, levels deep on each side, on an irregular (millisecond) time grid with the prices on a 0.1
+    tick grid, the bid missing at the open.
+    """
+    rng = np.random.RandomState(date.toordinal())
+    steps = rng.choice([3, 8, 15, 400, 1000], size=rows)
+    index = pd.DatetimeIndex(pd.Timestamp(date + dt.timedelta(hours=3)).value + np.cumsum(steps)*10**6, name='time')
+    data = {}
+    for i, symbol in enumerate(symbols):
+        bids = np.round(1000*(i + 1) + 0.1*np.cumsum(rng.randint(-1, 2, size=rows)), 1)
+        asks = np.round(bids + 0.1*rng.randint(1, 3, size=rows), 1)
+        for level in range(1, levels + 1):
+            buy = np.round(bids - 0.1*(level - 1), 1)
+            buy[:3] = np.nan
+            data[(symbol, 'level_{}_price_buy'.format(level))] = buy
+            data[(symbol, 'level_{}_price_sell'.format(level))] = np.round(asks + 0.1*(level - 1), 1)
+            for side in ('buy', 'sell'):
+                data[(symbol, 'level_{}_volume_{}'.format(level, side))] = rng.poisson(15, size=rows)
+                data[(symbol, 'level_{}_orders_{}'.format(level, side))] = rng.randint(1, 10, size=rows)
+    frame = pd.DataFrame(data, index=index)
+    frame.columns = pd.MultiIndex.from_tuples(list(frame.columns))
+    return frame
+
+
+def make_products(n=1):
+    """
+    :return: (list) the February 2016 contracts of the first n of GC and SI (the SYMBOLS)
+    """
+    return [FuturesContract(symbol[:2], exp_year=2016, exp_month=2) for symbol in SYMBOLS[:n]]
+
+
+class CountingLoader(object):
+    """
+    load_quotes, recording the date of every day it loads.
+    """
+    def __init__(self):
+        self.dates = []
+
+    def __call__(self, symbols, date, **kwargs):
+        self.dates.append(date)
+        return load_quotes(symbols, date)
+
+
+class SlowLoader(object):
+    """
+    load_quotes with a fixed delay per day (picklable, for the pool workers).
+    """
+    def __init__(self, rows, delay):
+        self.rows = rows
+        self.delay = delay
+
+    def __call__(self, symbols, date, **kwargs):
+        time.sleep(self.delay)
+        return load_quotes(symbols, date, rows=self.rows)
+
+
+def make_orders(products, data, n, seed=0):
+    """
+    n market orders of products at random times between the first and last row of data (as datetimes).
+    """
+    rng = np.random.RandomState(seed)
+    index = data.index.asi8
+    times = np.sort(rng.randint(index[0]//1000, index[-1]//1000, size=n))*1000
+    times = [pd.Timestamp(t).to_pydatetime() for t in times]
+    return [OrderEvent(products[rng.randint(len(products))], rng.randint(1, 4)*rng.choice([-1, 1]),
+                       order_time=order_time) for order_time in times]
+
+
+def make_flow(seed, ticks, orders_per_tick=.3, cancels_per_tick=.05, replaces_per_tick=.05):
+    """
+    Random limit order flow: per tick, a list of ('order', symbol, quantity, ticks from the mid), ('cancel', k)
+    or ('replace', k, ticks from the mid, quantity) operations, k the number of the order in the flow.
+    """
+    rng = np.random.RandomState(seed)
+    flow = []
+    n_orders = 0
+    for _ in range(ticks):
+        ops = []
+        for _ in range(rng.poisson(orders_per_tick)):
+            quantity = rng.randint(1, 4)*rng.choice([-1, 1])
+            ops.append(('order', SYMBOLS[rng.randint(len(SYMBOLS))], quantity, rng.randint(-6, 7)))
+            n_orders += 1
+        if n_orders:
+            for _ in range(rng.poisson(cancels_per_tick)):
+                ops.append(('cancel', rng.randint(n_orders)))
+            for _ in range(rng.poisson(replaces_per_tick)):
+                ops.append(('replace', rng.randint(n_orders), rng.randint(-6, 7),
+                            rng.randint(1, 4)*rng.choice([-1, 1])))
+        flow.append(ops)
+    return flow
@@ -0,0 +1,147 @@
+"""
+The original data utilities the vectorized ones are checked against (the per-row regex parser, the groupby second
+bars, the pairwise union + Series.asof alignment, the per-row concise book), shared by the backtest tests and the
+benchmarks.
+
+    pdt.assert_frame_equal(_parse_cme_level2_data(fpath), parse_cme_level2_data_regex(fpath))
+"""
+import re
+import datetime as dt
+import pandas as pd
+import backtest.data_utils.data_path as data_path
+from backtest.data_utils.quantgo_utils import _parse_cme_level2_data
+from backtest.test.synthetic import write_cme_level2_file
+
+DAY_SYMBOLS = ['GCG6', 'CLF6', 'ESZ5', 'SIH6', 'NQZ5', 'ZBH6']
+LEVELS = 5
+
+
+def _convert_time(date_str, time_str):
+    return dt.datetime.strptime(date_str + time_str + "000", '%Y%m%d %H%M%S%f')
+
+
+def parse_cme_level2_data_regex(fpath, max_level=5):
+    """
+    The original per-row regex parser.
+    """
+    index_names = ['time', 'side', 'is_implied']
+    column_names = ['symbol', 'depth'] + map(lambda x: "level_{}".format(x), range(1, 11))
+    data = pd.read_csv(fpath, parse_dates=[[0, 1]], date_parser=_convert_time, index_col=[0, 2, 3])
+    data.index.names = index_names
+    data.columns = column_names
+
+    if len(data) == 0:
+        raise IOError("File is empty")
+
+    for i in xrange(1, max_level + 1):
+        d = zip(*data["level_{}".format(i)].apply(lambda s: re.split(r' x | \(|\)', s)[:3]).tolist())
+        data['level_{}_price'.format(i)] = map(float, d[0])
+        data['level_{}_volume'.format(i)] = map(int, d[1])
+        data['level_{}_orders'.format(i)] = map(int, d[2])
+        data.drop("level_{}".format(i), axis=1, inplace=True)
+
+    data['symbol'] = data['symbol'].apply(lambda s: s.replace(' ', ''))
+    data = data.reset_index()
+    data = data[data['is_implied'] == 0]
+    buy_data = data[data['side'] == data['side'].values[0]].drop('side', axis=1)
+    sell_data = data[data['side'] != data['side'].values[0]].drop('side', axis=1)
+    data = pd.ordered_merge(buy_data, sell_data, on=['time', 'symbol'], fill_method='ffill', suffixes=['_buy', '_sell'])
+    data.set_index('time', inplace=True)
+
+    return data
+
+
+def make_second_bars_groupby(data):
+    """
+    The original groupby-lambda second bars: the mean of every second, stamped at its start, forward filled.
+    """
+    sym = data['symbol'].values[0]
+    data = data.groupby(lambda x: dt.datetime(x.year, x.month, x.day, x.hour, x.minute, x.second)).mean()
+    data['symbol'] = sym
+    time_index = pd.date_range(start=data.index[0], end=data.index[-1], freq='s')
+    data = data.reindex(time_index, method='ffill')
+    data.index.name = 'time'
+    return data
+
+
+def _reindex_data(data):
+    """
+    The original alignment: union the indexes pairwise, then Series.asof every column on the union.
+    """
+    keys = data.keys()
+    if len(keys) == 1:
+        return data
+    new_index = data[keys[0]].index.union(data[keys[1]].index).unique()  # merge first two
+    if len(keys) >= 2:
+        for i in range(2, len(keys)):
+            new_index = new_index.union(data[keys[i]].index).unique()
+    for key in keys:
+        data[key] = data[key].apply(lambda x: x.asof(new_index))
+    return data
+
+
+def dict_to_df(data):
+    reform = {(outerKey, innerKey): values for outerKey, innerDict in data.iteritems()
+              for innerKey, values in innerDict.iteritems()}
+    multi_data = pd.DataFrame(reform).ffill()
+    return multi_data
+
+
+def align_reference(data):
+    return dict_to_df(_reindex_data(dict(data)))
+
+
+def make_days(n_symbols, updates):
+    """
+    Parsed synthetic days of the first n_symbols DAY_SYMBOLS, written under data_path.DATA_DIR, with a 'dt' column
+    as get_data adds.
+    """
+    date = dt.datetime(year=2015, month=12, day=1)
+    data = {}
+    for i, symbol in enumerate(DAY_SYMBOLS[:n_symbols]):
+        fpath = write_cme_level2_file(data_path.get_file_path(symbol, date, 'CME_Level_2'), symbol, date,
+                                      n_updates=updates, seed=i)
+        day = _parse_cme_level2_data(fpath)
+        day['dt'] = day.index
+        data[symbol] = day
+    return data
+
+
+def make_lists(bar):
+    """
+    The original per-row concise book (levels limited to the parsed ones).
+    """
+    buy_price = []
+    sell_price = []
+    buy_volume = []
+    sell_volume = []
+    buy_orders = []
+    sell_orders = []
+
+    for i in range(1, LEVELS + 1):
+        buy_price.append(bar['level_'+str(i)+'_price_buy'])
+        sell_price.append(bar['level_'+str(i)+'_price_sell'])
+        buy_volume.append(bar['level_'+str(i)+'_volume_buy'])
+        sell_volume.append(bar['level_'+str(i)+'_volume_sell'])
+        buy_orders.append(bar['level_'+str(i)+'_orders_buy'])
+        sell_orders.append(bar['level_'+str(i)+'_orders_sell'])
+    bar['price_buy'] = buy_price
+    bar['price_sell'] = sell_price
+    bar['volume_buy'] = buy_volume
+    bar['volume_sell'] = sell_volume
+    bar['orders_buy'] = buy_orders
+    bar['orders_sell'] = sell_orders
+
+    return bar
+
+
+def make_concise_apply(data):
+    data = data.apply(make_lists, axis=1)
+    for i in range(1, LEVELS + 1):
+        data = data.drop('level_'+str(i)+'_price_buy', axis=1)
+        data = data.drop('level_'+str(i)+'_price_sell', axis=1)
+        data = data.drop('level_'+str(i)+'_volume_buy', axis=1)
+        data = data.drop('level_'+str(i)+'_volume_sell', axis=1)
+        data = data.drop('level_'+str(i)+'_orders_buy', axis=1)
+        data = data.drop('level_'+str(i)+'_orders_sell', axis=1)
+    return data
@@ -0,0 +1,247 @@
+"""
+The original executions the faster BacktestExecution lookups are checked against (Series.asof fills, the list scan
+of the resting orders, the queue position tracked row by row), and the runners sending them orders, shared by the
+backtest tests and the benchmarks.
+
+    cache = DayDataCache(loader=load_quotes)
+    expected, _ = run_orders(make_execution(AsofExecution, cache), orders)
+"""
+import time
+import random
+import numpy as np
+from backtest.execution import BacktestExecution, CME_HISTORICAL_ORDER_DELAY
+from backtest.data_utils.order_book import BUY, SELL
+from backtest.test.fixtures import make_products, SYMBOLS
+from trading.event_bus import BacktestEventBus
+from trading.events import MarketEvent, OrderEvent
+
+
+class AsofExecution(BacktestExecution):
+    """
+    The original Series.asof lookups, kept as the reference.
+    """
+
+    def _fill_market_order(self, order_event):
+        if order_event.quantity == 0:
+            return
+        fill_time = self._get_fill_time(order_event.order_time, order_event.symbol)
+        sym_data = self.curr_day_data[order_event.symbol]
+        direction = self._get_order_direction(order_event)
+        if direction == 1:
+            fill_price = sym_data['level_1_price_sell'].asof(fill_time)
+            self.create_fill_event(order_event, fill_price, fill_time)
+        elif direction == -1:
+            fill_price = sym_data['level_1_price_buy'].asof(fill_time)
+            self.create_fill_event(order_event, fill_price, fill_time)
+
+    def _fill_limit_order(self, order_event, fill_time):
+        if order_event.quantity == 0:
+            return
+        direction = self._get_order_direction(order_event)
+        sym_data = self.curr_day_data[order_event.symbol]
+        if direction == 1:
+            fill_price = sym_data['level_1_price_buy'].asof(fill_time)
+            self.create_fill_event(order_event, fill_price, fill_time)
+        elif direction == -1:
+            fill_price = sym_data['level_1_price_sell'].asof(fill_time)
+            self.create_fill_event(order_event, fill_price, fill_time)
+
+    def _get_fill_time(self, order_time, symbol):
+        execution_time = order_time + CME_HISTORICAL_ORDER_DELAY
+        fill_time = self.curr_day_data[symbol].index.asof(execution_time)
+        return fill_time
+
+
+class ScanExecution(AsofExecution):
+    """
+    The original list scan of the resting orders, kept as the reference (iterating over a copy of the list, which
+    the original removed orders from while iterating it, and looking up the sell side quote by symbol).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(ScanExecution, self).__init__(*args, **kwargs)
+        self.resting_orders = []
+
+    def place_order(self, order_event):
+        self._check_day_data(order_event.order_time)
+        if order_event.order_type == 'MARKET':
+            self._fill_market_order(order_event)
+        elif order_event.order_type == 'LIMIT':
+            self.resting_orders.append(order_event)
+
+    def process_resting_orders(self, market_event):
+        if not self.resting_orders:
+            return
+        self._check_day_data(market_event.dt)
+        for resting_order in list(self.resting_orders):
+            fill_time = self._get_fill_time(market_event.dt, resting_order.symbol)
+            direction = self._get_order_direction(resting_order)
+            if direction == 1:
+                if self._check_fill_limit_buy(resting_order, fill_time) is True:
+                    self._fill_limit_order(resting_order, fill_time)
+                    self.resting_orders.remove(resting_order)
+            elif direction == -1:
+                if self._check_fill_limit_sell(resting_order, fill_time) is True:
+                    self._fill_limit_order(resting_order, fill_time)
+                    self.resting_orders.remove(resting_order)
+
+    def _check_fill_limit_buy(self, resting_order, fill_time):
+        symbol = resting_order.symbol
+        if resting_order.price < self.curr_day_data[symbol]['level_1_price_sell'].asof(fill_time) and \
+                self._limit_fill() is True or \
+                resting_order.price >= self.curr_day_data[symbol]['level_1_price_sell'].asof(fill_time):
+            return True
+        return False
+
+    def _check_fill_limit_sell(self, resting_order, fill_time):
+        symbol = resting_order.symbol
+        if resting_order.price > self.curr_day_data[symbol]['level_1_price_buy'].asof(fill_time) and \
+                self._limit_fill() is True or \
+                resting_order.price <= self.curr_day_data[symbol]['level_1_price_buy'].asof(fill_time):
+            return True
+        return False
+
+    def cancel_order(self, order_id):
+        for order in self.resting_orders:
+            if order.order_id == order_id:
+                self.resting_orders.remove(order)
+                return order
+        return None
+
+    def replace_order(self, order_id, price=None, quantity=None):
+        for order in self.resting_orders:
+            if order.order_id == order_id:
+                order.price = float(price) if price is not None else order.price
+                order.quantity = quantity if quantity is not None else order.quantity
+                return order
+        return None
+
+    def clear_resting_orders(self):
+        self.resting_orders = []
+
+
+class RowQueueExecution(BacktestExecution):
+    """
+    The volume ahead of every resting order updated row by row on every tick, kept as the reference.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(RowQueueExecution, self).__init__(*args, **kwargs)
+        self.tracked = {}  # order id: [volume ahead, last level volume, last row, volume removed since]
+
+    def _level_volume(self, order_event, row):
+        """
+        :return: (float) volume displayed at the order's price on row, 0 if the market moved through the price,
+            None if the price is deeper than the book
+        """
+        queues = self._get_queues(order_event.symbol)
+        side = BUY if order_event.quantity > 0 else SELL
+        best = queues.price[row, side, 0]
+        if side == BUY and order_event.price > best or side == SELL and order_event.price < best:
+            return 0.
+        for level in range(queues.price.shape[2]):
+            if abs(queues.price[row, side, level] - order_event.price) < 1e-6:
+                return queues.volume[row, side, level]
+        return None
+
+    def _queue_order(self, order_event, dt):
+        _, position = self._get_fill_position(dt, order_event.symbol)
+        row = max(position, 0)
+        volume = None
+        for seen in range(row, -1, -1):
+            volume = self._level_volume(order_event, seen)
+            if volume is not None:
+                break
+        self.tracked[order_event.order_id] = [volume, volume, row, 0.]
+
+    def _pop_queued(self, symbol, position):
+        orders = []
+        for order in list(self.resting_orders):
+            if order.symbol != symbol:
+                continue
+            state = self.tracked[order.order_id]
+            ahead, last, row, removed = state
+            for row in range(row + 1, position + 1):
+                volume = self._level_volume(order, row)
+                if volume is None:
+                    continue
+                if ahead is None:
+                    ahead = last = volume
+                    continue
+                removed += max(last - volume, 0.)
+                last = volume
+                if removed >= ahead if ahead > 0 else removed > 0:
+                    self.resting_orders.cancel(order.order_id)
+                    orders.append((order, row))
+                    break
+            state[:] = ahead, last, max(row, state[2]), removed
+        return orders
+
+
+def make_execution(execution_class, cache, limit_fill_probability=0, **kwargs):
+    """
+    An execution of the SYMBOLS contracts on the days of cache, filling limit orders only when they cross.
+    :param kwargs: passed to execution_class (queue_fills, market_impact, partial_fills, ...)
+    """
+    return execution_class(BacktestEventBus(), make_products(len(SYMBOLS)), day_cache=cache,
+                           limit_fill_probability=limit_fill_probability, **kwargs)
+
+
+def run_orders(execution, orders):
+    """
+    :return: (list) of FillEvent, (float) seconds
+    """
+    start = time.time()
+    for order in orders:
+        execution.process_new_order(order)
+    elapsed = time.time() - start
+    fills = []
+    fill = execution.events.get()
+    while fill is not None:
+        fills.append(fill)
+        fill = execution.events.get()
+    return fills, elapsed
+
+
+def fill_tuples(fills):
+    """
+    :return: (list) of (fill time, symbol, quantity, fill price) of every fill, a missing (nan) price as None so
+        the fills compare equal
+    """
+    return [(fill.fill_time, fill.symbol, fill.quantity, None if np.isnan(fill.fill_price) else fill.fill_price)
+            for fill in fills]
+
+
+def run_flow(execution, flow, data, seed=0):
+    """
+    Ticks through the day, sending the flow's orders, cancels and replaces after each tick.
+    :param flow: see fixtures.make_flow
+    :return: (list) of (fill time, symbol, quantity, fill price, order time) of every fill
+    """
+    random.seed(seed)
+    products = dict((product.symbol, product) for product in execution.products)
+    mids = dict((symbol, ((data[(symbol, 'level_1_price_buy')] + data[(symbol, 'level_1_price_sell')])/2.)
+                 .fillna(method='bfill').values) for symbol in SYMBOLS)
+    orders = []
+    for i, (time_, ops) in enumerate(zip(data.index, flow)):
+        order_time = time_.to_pydatetime()
+        execution.process_resting_orders(MarketEvent(order_time, None))
+        for op in ops:
+            if op[0] == 'order':
+                _, symbol, quantity, offset = op
+                order = OrderEvent(products[symbol], quantity, 'LIMIT', round(mids[symbol][i] + .1*offset, 1),
+                                   order_time)
+                orders.append(order)
+                execution.process_new_order(order)
+            elif op[0] == 'cancel':
+                execution.cancel_order(orders[op[1]].order_id)
+            else:
+                _, k, offset, quantity = op
+                execution.replace_order(orders[k].order_id, round(mids[orders[k].symbol][i] + .1*offset, 1),
+                                        quantity)
+    fills = []
+    fill = execution.events.get()
+    while fill is not None:
+        fills.append((fill.fill_time, fill.symbol, fill.quantity, fill.fill_price, fill.order_time))
+        fill = execution.events.get()
+    return fills
@@ -0,0 +1,126 @@
+"""
+Small strategies run by the backtest tests and the benchmarks, and the event-driven Backtest the faster runners
+(SignalBacktest, sweeps, day-parallel runs, ensembles) are checked against.
+"""
+import datetime as dt
+import numpy as np
+import pandas as pd
+import pandas.util.testing as pdt
+from backtest.backtest import Backtest
+from backtest.data import BacktestData
+from backtest.execution import BacktestExecution
+from backtest.signal_backtest import SignalStrategy, SignalBacktest
+from backtest.test.fixtures import TICK
+from trading.event_bus import BacktestEventBus
+from trading.strategy import Strategy
+
+QUOTER_EXECUTION = {'limit_fill_probability': .1, 'latency_jitter': dt.timedelta(seconds=.05)}
+
+
+class Momentum(SignalStrategy):
+    """
+    Long one contract of the first product after its mid rose over the last 5 bars, short after it fell.
+    """
+    def target_positions(self, block):
+        symbol = self.products[0].symbol
+        mids = (block.column(symbol, 'level_1_price_buy') + block.column(symbol, 'level_1_price_sell'))/2.
+        change = np.zeros(len(mids))
+        change[5:] = mids[5:] - mids[:-5]
+        return np.nan_to_num(np.sign(change)).astype(int).reshape(-1, 1)
+
+
+class MeanReversion(SignalStrategy):
+    """
+    Short size contracts of the first product when its mid is threshold above its mean over the last window bars,
+    long when it is threshold below, flat otherwise.
+    """
+    def initialize(self, window=20, threshold=.1, size=1):
+        self.window = window
+        self.threshold = threshold
+        self.size = size
+
+    def target_positions(self, block):
+        symbol = self.products[0].symbol
+        mids = (block.column(symbol, 'level_1_price_buy') + block.column(symbol, 'level_1_price_sell'))/2.
+        deviations = mids - pd.Series(mids).rolling(self.window, min_periods=1).mean().values
+        targets = np.where(deviations > self.threshold, -self.size, np.where(deviations < -self.threshold,
+                                                                             self.size, 0))
+        return targets.reshape(-1, 1)
+
+
+class IntradayMeanReversion(MeanReversion):
+    """
+    MeanReversion, flat over the last flat_bars bars of every day.
+    """
+    day_independent = True
+
+    def initialize(self, window=20, threshold=.1, size=1, flat_bars=10):
+        super(IntradayMeanReversion, self).initialize(window, threshold, size)
+        self.flat_bars = flat_bars
+
+    def target_positions(self, block):
+        targets = super(IntradayMeanReversion, self).target_positions(block)
+        targets[-self.flat_bars:] = 0
+        return targets
+
+
+class Quoter(Strategy):
+    """
+    Quotes a limit buy ticks below the bid and a limit sell ticks above the ask of the first product, size
+    contracts each, quoting a side again once it fills, up to max_position contracts either way.
+    """
+
+    def initialize(self, ticks=1, size=1, max_position=3):
+        self.ticks = ticks
+        self.size = size
+        self.max_position = max_position
+        self.quoting = set()  # sides (1 buy, -1 sell) with a resting order
+
+    def new_tick(self):
+        product = self.products[0]
+        bid = self.last_bar[product.symbol]['level_1_price_buy']
+        ask = self.last_bar[product.symbol]['level_1_price_sell']
+        if np.isnan(bid) or np.isnan(ask):
+            return
+        position = self.positions[product.symbol].quantity
+        for side, price in ((1, bid - self.ticks*TICK), (-1, ask + self.ticks*TICK)):
+            if side not in self.quoting and side*position < self.max_position:
+                self.order(product, side*self.size, 'LIMIT', round(price, 1))
+                self.quoting.add(side)
+
+    def new_fill(self, fill_event):
+        self.quoting.discard(1 if fill_event.quantity > 0 else -1)
+
+    def new_day(self):
+        # the execution drops the resting orders at the end of the day
+        self.quoting = set()
+
+    def finished(self):
+        pass
+
+
+def run_events(strategy_class, products, start_date, end_date, cache, commission=0, **params):
+    """
+    The event-driven Backtest of a strategy.
+    :return: the strategy's results()
+    """
+    events = BacktestEventBus()
+    data = BacktestData(events, products, start_date, end_date, day_cache=cache)
+    execution = BacktestExecution(events, products, day_cache=cache, commission=commission)
+    strategy = strategy_class(events, data, products, commission=commission, **params)
+    Backtest(events, strategy, data, execution, start_date, end_date, verbose=False).run()
+    return strategy.results()
+
+
+def run_vectorized(strategy_class, products, start_date, end_date, cache, commission=0):
+    strategy = strategy_class(BacktestEventBus(), None, products, commission=commission)
+    return SignalBacktest(strategy, start_date, end_date, day_cache=cache).run()
+
+
+def assert_same(results, expected):
+    """
+    Day-parallel results (DayResults of run_days) equal to the sequential ones (of run_sequential).
+    """
+    pdt.assert_series_equal(results.daily_pnl, expected.daily_pnl, check_exact=True)
+    pdt.assert_frame_equal(results.positions, expected.positions, check_exact=True)
+    pdt.assert_frame_equal(results.transactions, expected.transactions, check_exact=True)
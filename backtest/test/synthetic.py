@@ -0,0 +1,52 @@
+import os
+import numpy as np
+import datetime as dt
+
+RAW_HEADER = "Date, Time, Ticker, Side, IsImplied, Depth, " + ", ".join("L{}".format(i) for i in range(1, 11))
+
+
+def write_cme_level2_file(fpath, symbol, date, n_updates=10000, start_time=dt.time(hour=3), tick_size=0.1,
+                          start_price=1060.0, implied_fraction=0.05, seed=0):
+    """
+    Write a synthetic raw CME Level 2 file in the QuantGo layout expected by _parse_cme_level2_data.
+    Used by tests and benchmarks when no downloaded data is available.
+    :param fpath: (str)
+    :param symbol: (str) e.g. 'GCG6'
+    :param date: (DateTime)
+    :param n_updates: (int) number of book updates (each update writes a buy and a sell row)
+    :param start_time: (dt.time) time of the first update
+    :param tick_size: (float)
+    :param start_price: (float)
+    :param implied_fraction: (float) fraction of rows flagged as implied
+    :param seed: (int)
+    :return: (str) fpath
+    """
+    rng = np.random.RandomState(seed)
+    start_ms = ((start_time.hour*60 + start_time.minute)*60 + start_time.second)*1000
+    times = start_ms + np.cumsum(rng.randint(1, 400, size=n_updates))
+    mids = start_price + tick_size*np.cumsum(rng.randint(-1, 2, size=n_updates))
+    volumes = rng.randint(1, 50, size=(n_updates, 2, 10))
+    orders = rng.randint(1, 10, size=(n_updates, 2, 10))
+    implied = rng.rand(n_updates, 2) < implied_fraction
+
+    date_str = date.strftime("%Y%m%d")
+    ticker = symbol.ljust(8)
+    level_offsets = tick_size*np.arange(10)
+
+    if not os.path.exists(os.path.dirname(fpath)):
+        os.makedirs(os.path.dirname(fpath))
+
+    with open(fpath, 'w') as f:
+        f.write(RAW_HEADER + "\n")
+        for i in range(n_updates):
+            h, rem = divmod(int(times[i]), 3600000)
+            m, rem = divmod(rem, 60000)
+            s, ms = divmod(rem, 1000)
+            time_str = "{:02d}{:02d}{:02d}{:03d}".format(h, m, s, ms)
+            for side_ix, (side, prices) in enumerate([('B', mids[i] - tick_size/2 - level_offsets),
+                                                       ('S', mids[i] + tick_size/2 + level_offsets)]):
+                levels = ", ".join("{:.2f} x {} ({})".format(prices[l], volumes[i, side_ix, l], orders[i, side_ix, l])
+                                   for l in range(10))
+                f.write("{}, {}, {}, {}, {}, 10, {}\n".format(date_str, time_str, ticker, side,
+                                                              int(implied[i, side_ix]), levels))
+    return fpath
@@ -0,0 +1,56 @@
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import pandas.util.testing as pdt
+import backtest.data_utils.data_path as data_path
+from backtest.data_utils.alignment import align_asof, aligned_frame
+from backtest.test.reference_data import make_days, align_reference
+
+
+class TestAlignment(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data_dir = tempfile.mkdtemp()
+        cls.default_data_dir = data_path.DATA_DIR
+        data_path.DATA_DIR = cls.data_dir
+        cls.days = make_days(3, 1000)
+
+    @classmethod
+    def tearDownClass(cls):
+        data_path.DATA_DIR = cls.default_data_dir
+        shutil.rmtree(cls.data_dir)
+
+    def test_matches_reference(self):
+        for symbols in [['GCG6'], ['GCG6', 'CLF6'], ['GCG6', 'CLF6', 'ESZ5']]:
+            data = {symbol: self.days[symbol] for symbol in symbols}
+            pdt.assert_frame_equal(aligned_frame(*align_asof(data)), align_reference(data))
+
+    def test_asof_semantics(self):
+        left = pd.DataFrame({'price': [1., np.nan, 3.], 'size': [1, 2, 3]},
+                            index=pd.DatetimeIndex(['2015-12-01 03:00:01', '2015-12-01 03:00:03',
+                                                    '2015-12-01 03:00:05'], name='time'))
+        right = pd.DataFrame({'price': [10., 20.]},
+                             index=pd.DatetimeIndex(['2015-12-01 03:00:00', '2015-12-01 03:00:03'], name='time'))
+        index, columns = align_asof({'A': left, 'B': right})
+        self.assertEqual(list(columns.keys()), [('A', 'price'), ('A', 'size'), ('B', 'price')])
+        np.testing.assert_array_equal(index, pd.DatetimeIndex(['2015-12-01 03:00:00', '2015-12-01 03:00:01',
+                                                               '2015-12-01 03:00:03', '2015-12-01 03:00:05']).asi8)
+        # NaNs are skipped, rows before a symbol's first update are missing
+        np.testing.assert_array_equal(columns[('A', 'price')], [np.nan, 1., 1., 3.])
+        np.testing.assert_array_equal(columns[('A', 'size')], [np.nan, 1., 2., 3.])
+        np.testing.assert_array_equal(columns[('B', 'price')], [10., 10., 20., 20.])
+
+    def test_single_symbol_keeps_duplicates(self):
+        data = pd.DataFrame({'price': [1., 2., 3.]},
+                            index=pd.DatetimeIndex(['2015-12-01 03:00:01']*2 + ['2015-12-01 03:00:02'], name='time'))
+        index, columns = align_asof({'A': data})
+        self.assertEqual(len(index), 3)
+        self.assertEqual(columns[('A', 'price')].dtype, np.float64)
+        np.testing.assert_array_equal(columns[('A', 'price')], [1., 2., 3.])
+
+
+if __name__ == '__main__':
+    unittest.main()
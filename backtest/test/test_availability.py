@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+import unittest
+import datetime as dt
+from Queue import Queue
+import backtest.data_utils.data_path as data_path
+from backtest.data import BacktestData
+from backtest.data_utils.availability import AvailabilityIndex, AVAILABILITY_FILE
+from backtest.data_utils.day_data_cache import DayDataCache
+from backtest.data_utils.quantgo_utils import get_data_furdays
+from backtest.test.synthetic import write_cme_level2_file
+from backtest.test.test_day_data_cache import make_day
+from backtest.test.test_prefetch import RollingProduct
+from trading.events import MARKET, NEW_DAY
+
+
+def touch(fpath):
+    if not os.path.exists(os.path.dirname(fpath)):
+        os.makedirs(os.path.dirname(fpath))
+    open(fpath, 'w').close()
+
+
+class TestAvailabilityIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.default_data_dir = data_path.DATA_DIR
+        data_path.DATA_DIR = self.data_dir
+        for day in [1, 2]:
+            touch(data_path.get_file_path('GCG6', dt.datetime(2015, 12, day), 'CME_Level_2'))
+        touch(data_path.get_file_path('GCG6', dt.datetime(2015, 12, 3), 'CME_Level_2', '_bars_tick_100', 'col'))
+        touch(data_path.get_file_path('GCJ6', dt.datetime(2015, 12, 4), 'CME_Level_2', '_parsed', 'col'))
+
+    def tearDown(self):
+        data_path.DATA_DIR = self.default_data_dir
+        shutil.rmtree(self.data_dir)
+
+    def test_has(self):
+        index = AvailabilityIndex()
+        self.assertEqual(index.days('GCG6'), [dt.datetime(2015, 12, d) for d in [1, 2, 3]])
+        self.assertTrue(index.has('GCG6', dt.datetime(2015, 12, 1)))
+        self.assertFalse(index.has('GCG6', dt.datetime(2015, 12, 3)))
+        self.assertTrue(index.has('GCG6', dt.datetime(2015, 12, 3), extension='_bars_tick_100'))
+        self.assertTrue(index.has('gcj6', dt.datetime(2015, 12, 4)))
+        self.assertEqual(index.missing(['GCG6', 'GCJ6', 'ESZ5'], dt.datetime(2015, 12, 4)), ['GCG6', 'ESZ5'])
+
+    def test_persisted_and_refreshed(self):
+        AvailabilityIndex().has('GCG6', dt.datetime(2015, 12, 1))
+        self.assertTrue(os.path.exists(os.path.join(self.data_dir, 'CME_Level_2', AVAILABILITY_FILE)))
+
+        index = AvailabilityIndex()
+        index._scan = None  # unchanged directories are not scanned again
+        self.assertTrue(index.has('GCG6', dt.datetime(2015, 12, 2)))
+
+        symbol_dir = os.path.join(self.data_dir, 'CME_Level_2', 'GCG6')
+        touch(os.path.join(symbol_dir, '20151207.csv'))
+        os.utime(symbol_dir, (0, os.path.getmtime(symbol_dir) + 1))
+        index = AvailabilityIndex()
+        self.assertTrue(index.has('GCG6', dt.datetime(2015, 12, 7)))
+
+    def test_backtest_data_skips_missing_sessions(self):
+        loads = []
+
+        def loader(symbols, date, **kwargs):
+            loads.append(date)
+            return make_day(symbols, date, rows=5)
+
+        data = BacktestData(Queue(), [RollingProduct()], dt.datetime(2015, 12, 1), dt.datetime(2015, 12, 7),
+                            day_cache=DayDataCache(loader=loader), availability=AvailabilityIndex())
+        self.assertEqual(data.sessions, [dt.datetime(2015, 12, d) for d in [1, 2, 4]])
+        self.assertEqual([d for d, _ in data.missing_days], [dt.datetime(2015, 12, 3), dt.datetime(2015, 12, 7)])
+        while data.continue_backtest:
+            data.update()
+        self.assertEqual(loads, data.sessions)
+
+    def test_backtest_data_reports_bad_days(self):
+        def loader(symbols, date, **kwargs):
+            if date.day == 2:
+                raise ValueError("Bad data")
+            return make_day(symbols, date, rows=5)
+
+        events = Queue()
+        data = BacktestData(events, [RollingProduct()], dt.datetime(2015, 12, 1), dt.datetime(2015, 12, 3),
+                            day_cache=DayDataCache(loader=loader))
+        while data.continue_backtest:
+            data.update()
+        # a new day ahead of the ticks of each session loaded
+        self.assertEqual([events.get().code for _ in range(events.qsize())], ([NEW_DAY] + [MARKET]*5)*2)
+        self.assertEqual(data.missing_days, [(dt.datetime(2015, 12, 2), "Bad data")])
+
+    def test_get_data_furdays(self):
+        for day in [1, 2]:
+            date = dt.datetime(2015, 12, day)
+            write_cme_level2_file(data_path.get_file_path('GCG6', date, 'CME_Level_2'), 'GCG6', date,
+                                  n_updates=200)
+        days = get_data_furdays('GCG6', dt.datetime(2015, 11, 30), dt.datetime(2015, 12, 6),
+                                availability=AvailabilityIndex())
+        self.assertEqual([d.index[0].day for d in days], [1, 2])
+        self.assertRaises(IOError, get_data_furdays, 'GCG6', dt.datetime(2015, 11, 30), dt.datetime(2015, 12, 6),
+                          raise_exception=True, availability=AvailabilityIndex())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+import datetime as dt
+from backtest.bar_cursor import DayBlock, BarCursor
+from backtest.test.test_day_data_cache import make_day
+
+
+class TestBarCursor(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = make_day(['GCG6', 'CLF6'], dt.datetime(year=2015, month=12, day=1), rows=50)
+        cls.block = DayBlock.from_frame(cls.data)
+
+    def test_matches_iterrows(self):
+        cursor = BarCursor(self.block)
+        for (timestamp, row), position in zip(self.data.iterrows(), cursor):
+            bar = self.block.bar(position)
+            self.assertEqual(self.block.datetimes[position], timestamp.to_datetime())
+            self.assertEqual(bar.name, timestamp)
+            for symbol, column in self.data.columns:
+                self.assertEqual(bar[symbol][column], row[symbol][column])
+                self.assertEqual(bar[(symbol, column)], row[(symbol, column)])
+            self.assertEqual(list(bar.to_series().values), list(row.values))
+
+    def test_cursor_exhausted(self):
+        cursor = BarCursor(self.block)
+        self.assertEqual(len(list(cursor)), len(self.data))
+        self.assertRaises(StopIteration, next, cursor)
+
+    def test_lookups(self):
+        bar = self.block.bar(3)
+        self.assertIn('GCG6', bar)
+        self.assertIn(('CLF6', 'level_1_price_sell'), bar)
+        self.assertIsNone(bar.get('ESZ5'))
+        self.assertEqual(sorted(bar['GCG6'].keys()), ['level_1_price_buy', 'level_1_price_sell'])
+        self.assertEqual(bar['GCG6'].to_dict()['level_1_price_buy'], self.data['GCG6']['level_1_price_buy'].iloc[3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+import unittest
+import datetime as dt
+import numpy as np
+import pandas as pd
+import pandas.util.testing as pdt
+import backtest.data_utils.data_path as data_path
+from backtest.data_utils.bar_specs import TimeBars, TickBars, VolumeBars, BookChangeBars, make_bar_spec
+from backtest.data_utils.day_cache import get_cache_path
+from backtest.data_utils.day_data_cache import DayDataCache
+from backtest.data_utils.quantgo_utils import get_data, _parse_cme_level2_data
+from backtest.test.synthetic import write_cme_level2_file
+
+
+class TestBarSpecs(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data_dir = tempfile.mkdtemp()
+        cls.default_data_dir = data_path.DATA_DIR
+        data_path.DATA_DIR = cls.data_dir
+        cls.symbol = 'GCG6'
+        cls.date = dt.datetime(year=2015, month=12, day=1)
+        cls.raw_fpath = write_cme_level2_file(data_path.get_file_path(cls.symbol, cls.date, 'CME_Level_2'),
+                                              cls.symbol, cls.date, n_updates=2000)
+        cls.parsed = _parse_cme_level2_data(cls.raw_fpath)
+
+    @classmethod
+    def tearDownClass(cls):
+        data_path.DATA_DIR = cls.default_data_dir
+        shutil.rmtree(cls.data_dir)
+
+    def test_make_bar_spec(self):
+        self.assertEqual(make_bar_spec(True), TimeBars(1, label='start'))
+        self.assertEqual(make_bar_spec(60), TimeBars(60, label='start'))
+        self.assertNotEqual(make_bar_spec(60), TimeBars(60))
+        self.assertIsNone(make_bar_spec(False))
+        self.assertIsNone(make_bar_spec(None))
+        self.assertNotEqual(TickBars(10), TickBars(20))
+        self.assertNotEqual(TimeBars(1), TimeBars(1, how={'level_1_price_buy': 'last'}))
+        self.assertRaises(ValueError, make_bar_spec, 'minute')
+        self.assertRaises(ValueError, TimeBars, 1, label='middle')
+
+    def test_extensions_are_unique(self):
+        specs = [TimeBars(1), TimeBars(60), TimeBars(60, fill=False), TimeBars(1, how={'depth_buy': 'last'}),
+                 make_bar_spec(True), make_bar_spec(60), TickBars(100), VolumeBars(50), BookChangeBars(),
+                 BookChangeBars(levels=2)]
+        self.assertEqual(make_bar_spec(True).extension, '_second_bars')
+        self.assertEqual(make_bar_spec(60).extension, '_bars_time_60s')
+        self.assertEqual(TimeBars(1).extension, '_bars_time_1s_end')
+        self.assertEqual(len(set(spec.extension for spec in specs)), len(specs))
+
+    def test_tick_bars(self):
+        bars = TickBars(100).make_bars(self.parsed)
+        self.assertEqual(len(bars), int(np.ceil(len(self.parsed)/100.)))
+        last_rows = self.parsed.iloc[99::100]
+        np.testing.assert_array_equal(bars.index.values[:len(last_rows)], last_rows.index.values)
+        np.testing.assert_array_equal(bars['level_1_price_buy'].values[:len(last_rows)],
+                                      last_rows['level_1_price_buy'].values)
+        self.assertEqual(bars['level_1_price_buy'].values[-1], self.parsed['level_1_price_buy'].values[-1])
+        self.assertTrue((bars['symbol'] == self.symbol).all())
+
+    def test_volume_bars(self):
+        index = pd.date_range('2015-12-01 03:00', periods=6, freq='s', name='time')
+        data = pd.DataFrame({'price': [1., 2., 3., 4., 5., 6.], 'volume': [2, 2, 1, 10, 1, 1], 'symbol': 'GCG6'},
+                            index=index)
+        bars = VolumeBars(5).make_bars(data)
+        # bars close on the update reaching 5 contracts: [2, 2, 1], [10], [1, 1]
+        np.testing.assert_array_equal(bars['price'].values, [3., 4., 6.])
+        np.testing.assert_array_equal(bars.index.values, index.values[[2, 3, 5]])
+        self.assertRaises(ValueError, VolumeBars(5).make_bars, self.parsed)
+
+    def test_book_change_bars(self):
+        bars = BookChangeBars().make_bars(self.parsed)
+        top = self.parsed[BookChangeBars().columns]
+        changed = (top.diff().fillna(1) != 0).any(axis=1).values
+        pdt.assert_frame_equal(bars.drop('symbol', axis=1),
+                               self.parsed[changed].drop(['symbol', 'level_6_buy', 'level_7_buy', 'level_8_buy',
+                                                          'level_9_buy', 'level_10_buy', 'level_6_sell',
+                                                          'level_7_sell', 'level_8_sell', 'level_9_sell',
+                                                          'level_10_sell'], axis=1),
+                               check_dtype=False)
+
+        repeated = self.parsed.iloc[np.repeat(np.arange(10), 3)]
+        bars = BookChangeBars().make_bars(repeated)
+        np.testing.assert_array_equal(bars.index.values, self.parsed.index.values[:10])
+
+    def test_get_data_caches_each_spec(self):
+        for spec in [TimeBars(60), TickBars(50), BookChangeBars()]:
+            data = get_data(self.symbol, self.date, bars=spec)
+            self.assertTrue(os.path.exists(get_cache_path(self.symbol, self.date, 'CME_Level_2',
+                                                          extension=spec.extension)))
+            pdt.assert_frame_equal(get_data(self.symbol, self.date, bars=spec), data)
+
+        minute_bars = get_data(self.symbol, self.date, bars=TimeBars(60))
+        self.assertTrue((np.diff(minute_bars.index.asi8) == 60*10**9).all())
+
+    def test_day_data_cache_key(self):
+        loads = []
+        cache = DayDataCache(loader=lambda symbols, date, **kwargs: loads.append(kwargs['bars']) or self.parsed)
+        cache.get([self.symbol], self.date, bars=True)
+        cache.get([self.symbol], self.date, bars=TimeBars(1, label='start'))
+        cache.get([self.symbol], self.date, bars=TimeBars(1))
+        self.assertEqual(loads, [TimeBars(1, label='start'), TimeBars(1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
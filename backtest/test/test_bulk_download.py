@@ -0,0 +1,94 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import datetime as dt
+import backtest.data_utils.data_path as data_path
+from backtest.data_utils.bulk_download import BulkDownloader, DownloadManifest, bulk_download, DONE, EMPTY, FAILED
+from backtest.data_utils.day_cache import get_cache_path
+from backtest.data_utils.bar_specs import make_bar_spec
+from backtest.data_utils.quantgo_utils import get_data
+from backtest.test.fake_quantgo import FakeQuantGoService
+
+START = dt.datetime(2015, 12, 1)
+END = dt.datetime(2015, 12, 4)
+
+
+class TestBulkDownload(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.default_data_dir = data_path.DATA_DIR
+        data_path.DATA_DIR = self.data_dir
+        self.sleeps = []
+
+    def tearDown(self):
+        data_path.DATA_DIR = self.default_data_dir
+        shutil.rmtree(self.data_dir)
+
+    def download(self, service, **kwargs):
+        return bulk_download(['GCG6', 'GCJ6'], START, END, workers=3, service_factory=lambda: service,
+                             sleep=self.sleeps.append, **kwargs)
+
+    def test_download_parse_and_cache(self):
+        service = FakeQuantGoService()
+        results = self.download(service)
+        self.assertEqual(results, {DONE: 8})
+        for symbol in ['GCG6', 'GCJ6']:
+            for day in range(1, 5):
+                date = dt.datetime(2015, 12, day)
+                self.assertTrue(os.path.exists(data_path.get_file_path(symbol, date, 'CME_Level_2')))
+                self.assertTrue(os.path.exists(get_cache_path(symbol, date, 'CME_Level_2', '_parsed')))
+                self.assertTrue(os.path.exists(get_cache_path(symbol, date, 'CME_Level_2',
+                                                              make_bar_spec(True).extension)))
+        self.assertEqual(set(service.calls.values()), {1})
+        self.assertFalse([f for _, _, files in os.walk(self.data_dir) for f in files if f.endswith('.part')])
+        self.assertEqual(len(get_data('GCJ6', dt.datetime(2015, 12, 2))), len(get_data(
+            'GCJ6', dt.datetime(2015, 12, 2), parse_new=True, save=False)))
+
+    def test_manifest_and_resume(self):
+        failing = FakeQuantGoService(empty_days=[('GCJ6', '20151203')], failures={('GCG6', '20151202'): 10})
+        results = self.download(failing, retries=2, backoff=.5)
+        self.assertEqual(results, {DONE: 6, EMPTY: 1, FAILED: 1})
+        self.assertEqual(self.sleeps, [.5, 1.])
+        self.assertEqual(failing.calls[('GCG6', '20151202')], 3)
+
+        manifest = DownloadManifest.for_subscription()
+        self.assertEqual(manifest.days(FAILED), [('GCG6', dt.datetime(2015, 12, 2))])
+        self.assertEqual(manifest.days(EMPTY), [('GCJ6', dt.datetime(2015, 12, 3))])
+        self.assertEqual(manifest.entry('GCG6', dt.datetime(2015, 12, 2))['attempts'], 3)
+        self.assertIn('Service unavailable', manifest.entry('GCG6', dt.datetime(2015, 12, 2))['error'])
+        self.assertFalse(os.path.exists(data_path.get_file_path('GCG6', dt.datetime(2015, 12, 2), 'CME_Level_2')))
+
+        # a second run only retries the failed day
+        service = FakeQuantGoService()
+        self.assertEqual(self.download(service), {DONE: 1})
+        self.assertEqual(list(service.calls.keys()), [('GCG6', '20151202')])
+        self.assertEqual(DownloadManifest.for_subscription().status('GCG6', dt.datetime(2015, 12, 2)), DONE)
+        self.assertEqual(self.download(service, retry_failed=False), {})
+
+    def test_existing_files_are_parsed_only(self):
+        downloader = BulkDownloader(service_factory=FakeQuantGoService, bars=False, sleep=self.sleeps.append)
+        downloader.run([('GCG6', START)])
+        os.remove(DownloadManifest.for_subscription().fpath)
+
+        service = FakeQuantGoService()
+        downloader = BulkDownloader(service_factory=lambda: service, bars=False)
+        self.assertEqual(downloader.run(downloader.jobs(['GCG6'], START, START)), {DONE: 1})
+        self.assertEqual(len(service.calls), 0)
+        with open(downloader.manifest.fpath) as f:
+            self.assertEqual(json.load(f)['GCG6/20151201']['attempts'], 0)
+
+    def test_parse_failure(self):
+        fpath = data_path.get_file_path('GCG6', START, 'CME_Level_2')
+        os.makedirs(os.path.dirname(fpath))
+        with open(fpath, 'w') as f:
+            f.write('Date, Time, Ticker\n')
+        downloader = BulkDownloader(service_factory=FakeQuantGoService)
+        self.assertEqual(downloader.run([('GCG6', START)]), {FAILED: 1})
+        self.assertTrue(downloader.manifest.entry('GCG6', START)['error'].startswith('parse'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import unittest
+import datetime as dt
+import numpy as np
+import pandas as pd
+import pandas.util.testing as pdt
+from backtest.data_utils.data_aggregation import make_time_bars, make_second_bars
+from backtest.data_utils.quantgo_utils import _parse_cme_level2_data
+from backtest.test.synthetic import write_cme_level2_file
+from backtest.test.reference_data import make_second_bars_groupby
+
+
+class TestTimeBars(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp()
+        fpath = write_cme_level2_file(os.path.join(cls.tmp_dir, 'GCG6', '20151201.csv'), 'GCG6',
+                                      dt.datetime(year=2015, month=12, day=1), n_updates=3000)
+        cls.parsed = _parse_cme_level2_data(fpath)
+
+        index = pd.DatetimeIndex(['2015-12-01 03:00:00.1', '2015-12-01 03:00:00.7', '2015-12-01 03:00:01.2',
+                                  '2015-12-01 03:00:03.5', '2015-12-01 03:00:03.9'], name='time')
+        cls.small = pd.DataFrame({'price': [1., np.nan, 3., 4., np.nan], 'volume': [1, 2, 3, 4, 5],
+                                  'symbol': 'GCG6'}, index=index, columns=['price', 'volume', 'symbol'])
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir)
+
+    def test_matches_groupby(self):
+        pdt.assert_frame_equal(make_second_bars(self.parsed, load_if_exists=False), make_second_bars_groupby(self.parsed))
+
+    def test_last_skips_nan_and_fills(self):
+        bars = make_time_bars(self.small)
+        self.assertEqual(list(bars.columns), ['price', 'volume'])
+        np.testing.assert_array_equal(bars.index.values, pd.DatetimeIndex(
+            ['2015-12-01 03:00:01', '2015-12-01 03:00:02', '2015-12-01 03:00:03', '2015-12-01 03:00:04']).values)
+        np.testing.assert_array_equal(bars['price'].values, [1., 3., 3., 4.])
+        np.testing.assert_array_equal(bars['volume'].values, [2, 3, 3, 5])
+
+    def test_mean(self):
+        bars = make_time_bars(self.small, how={'volume': 'mean'})
+        np.testing.assert_array_equal(bars['volume'].values, [1.5, 3., 3., 4.5])
+
+    def test_last(self):
+        bars = make_time_bars(self.small, how={'price': 'last', 'volume': 'last'}, fill=False)
+        expected = self.small.groupby(lambda x: x.replace(microsecond=0) + dt.timedelta(seconds=1)).last()
+        np.testing.assert_array_equal(bars.index.values, expected.index.values)
+        np.testing.assert_array_equal(bars['price'].values, expected['price'].values)
+        np.testing.assert_array_equal(bars['volume'].values, expected['volume'].values)
+
+    def test_no_bar_holds_later_updates(self):
+        quotes = self.parsed['level_1_price_buy']
+        for bars in [make_time_bars(self.parsed), make_time_bars(self.parsed, seconds=60),
+                     make_time_bars(self.parsed, seconds=5, fill=False)]:
+            # the last quote of the updates before each bar's timestamp
+            rows = np.searchsorted(quotes.index.asi8, bars.index.asi8, side='left') - 1
+            self.assertTrue((rows >= 0).all())
+            np.testing.assert_array_equal(bars['level_1_price_buy'].values, quotes.ffill().values[rows])
+
+    def test_wider_bars(self):
+        bars = make_time_bars(self.parsed, seconds=60, how={'level_1_price_buy': 'last'})
+        self.assertTrue((np.diff(bars.index.asi8) == 60*10**9).all())
+        expected = self.parsed['level_1_price_buy'].resample('60s').last().ffill()
+        np.testing.assert_array_equal(bars['level_1_price_buy'].values, expected.values)
+
+    def test_unknown_aggregation(self):
+        self.assertRaises(ValueError, make_time_bars, self.small, 1, {'price': 'median'})
+
+
+if __name__ == '__main__':
+    unittest.main()
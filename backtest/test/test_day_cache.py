@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import unittest
+import datetime as dt
+import numpy as np
+import pandas.util.testing as pdt
+import backtest.data_utils.data_path as data_path
+from backtest.data_utils.day_cache import write_day_cache, read_day_cache, load_day_columns, get_cache_path, \
+    backfill_day_cache, read_csv_day
+from backtest.data_utils.quantgo_utils import get_data, _parse_cme_level2_data
+from backtest.data_utils.data_aggregation import make_second_bars
+from backtest.test.synthetic import write_cme_level2_file
+
+
+class TestDayCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data_dir = tempfile.mkdtemp()
+        cls.default_data_dir = data_path.DATA_DIR
+        data_path.DATA_DIR = cls.data_dir
+        cls.symbol = 'GCG6'
+        cls.date = dt.datetime(year=2015, month=12, day=1)
+        cls.raw_fpath = write_cme_level2_file(data_path.get_file_path(cls.symbol, cls.date, 'CME_Level_2'),
+                                              cls.symbol, cls.date, n_updates=500)
+        cls.parsed = _parse_cme_level2_data(cls.raw_fpath)
+
+    @classmethod
+    def tearDownClass(cls):
+        data_path.DATA_DIR = cls.default_data_dir
+        shutil.rmtree(cls.data_dir)
+
+    def test_round_trip(self):
+        fpath = os.path.join(self.data_dir, 'round_trip.col')
+        write_day_cache(self.parsed, fpath)
+        for mmap in [True, False]:
+            pdt.assert_frame_equal(read_day_cache(fpath, mmap=mmap), self.parsed)
+
+    def test_load_day_columns(self):
+        fpath = os.path.join(self.data_dir, 'columns.col')
+        write_day_cache(self.parsed, fpath)
+        index, columns, _ = load_day_columns(fpath, columns=['symbol', 'level_1_price_buy'])
+        self.assertEqual(index.dtype, np.int64)
+        np.testing.assert_array_equal(index, self.parsed.index.asi8)
+        self.assertEqual(columns['symbol'], self.symbol)
+        self.assertIsInstance(columns['level_1_price_buy'], np.memmap)
+        np.testing.assert_array_equal(columns['level_1_price_buy'], self.parsed['level_1_price_buy'].values)
+
+    def test_get_data_uses_cache(self):
+        parsed_cache = get_cache_path(self.symbol, self.date, 'CME_Level_2', extension='_parsed')
+        second_cache = get_cache_path(self.symbol, self.date, 'CME_Level_2', extension='_second_bars')
+        data = get_data(self.symbol, self.date, second_bars=True)
+        self.assertTrue(os.path.exists(parsed_cache))
+        self.assertTrue(os.path.exists(second_cache))
+
+        # once cached, the raw file is no longer needed
+        os.rename(self.raw_fpath, self.raw_fpath + '.bak')
+        try:
+            pdt.assert_frame_equal(get_data(self.symbol, self.date, second_bars=True), data)
+        finally:
+            os.rename(self.raw_fpath + '.bak', self.raw_fpath)
+
+    def test_get_data_reads_legacy_second_bars(self):
+        date = dt.datetime(year=2015, month=12, day=3)
+        bars = make_second_bars(self.parsed)
+        bars.index = bars.index + (date - self.date)
+        bars.to_csv(data_path.get_file_path(self.symbol, date, 'CME_Level_2', extension='_second_bars'))
+        # no raw or parsed file for the day, the second bars CSV is all there is
+        data = get_data(self.symbol, date, second_bars=True)
+        np.testing.assert_array_equal(data.index.values, bars.index.values)
+        np.testing.assert_allclose(data['level_1_price_buy'].values, bars['level_1_price_buy'].values)
+        self.assertTrue(os.path.exists(get_cache_path(self.symbol, date, 'CME_Level_2', extension='_second_bars')))
+
+    def test_backfill(self):
+        date = dt.datetime(year=2015, month=12, day=2)
+        csv_fpath = data_path.get_file_path(self.symbol, date, 'CME_Level_2', extension='_parsed')
+        self.parsed.to_csv(csv_fpath)
+        written = backfill_day_cache(symbols=[self.symbol])
+        cache_fpath = get_cache_path(self.symbol, date, 'CME_Level_2', extension='_parsed')
+        self.assertIn(cache_fpath, written)
+        pdt.assert_frame_equal(read_day_cache(cache_fpath), read_csv_day(csv_fpath))
+        self.assertEqual(backfill_day_cache(symbols=[self.symbol]), [])
+
+    def test_backfilled_second_bars_are_read(self):
+        date = dt.datetime(year=2015, month=12, day=4)
+        bars = make_second_bars(self.parsed)
+        bars.index = bars.index + (date - self.date)
+        csv_fpath = data_path.get_file_path(self.symbol, date, 'CME_Level_2', extension='_second_bars')
+        bars.to_csv(csv_fpath)
+        written = backfill_day_cache(symbols=[self.symbol])
+        self.assertIn(get_cache_path(self.symbol, date, 'CME_Level_2', extension='_second_bars'), written)
+        os.remove(csv_fpath)
+        data = get_data(self.symbol, date, second_bars=True, save=False)
+        np.testing.assert_allclose(data['level_1_price_buy'].values, bars['level_1_price_buy'].values)
+
+
+if __name__ == '__main__':
+    unittest.main()
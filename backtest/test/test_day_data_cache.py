@@ -0,0 +1,61 @@
+import unittest
+import datetime as dt
+import numpy as np
+import pandas as pd
+from backtest.data_utils.day_data_cache import DayDataCache
+
+
+def make_day(symbols, date, rows=100):
+    index = pd.date_range(date + dt.timedelta(hours=3), periods=rows, freq='s', name='time')
+    columns = pd.MultiIndex.from_product([symbols, ['level_1_price_buy', 'level_1_price_sell']])
+    rng = np.random.RandomState(date.toordinal())
+    return pd.DataFrame(rng.rand(rows, len(columns)), index=index, columns=columns)
+
+
+class TestDayDataCache(unittest.TestCase):
+
+    def setUp(self):
+        self.loads = []
+        self.date = dt.datetime(year=2015, month=12, day=1)
+
+    def loader(self, symbols, date, bars=None, start_time=None, end_time=None):
+        self.loads.append((tuple(symbols), date))
+        return make_day(symbols, date)
+
+    def test_hits_and_misses(self):
+        cache = DayDataCache(loader=self.loader)
+        first = cache.get(['GCG6'], self.date)
+        second = cache.get(['GCG6'], self.date + dt.timedelta(hours=8))
+        self.assertIs(first, second)
+        self.assertEqual(len(self.loads), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        cache.get(['GCG6'], self.date, start_time=dt.time(hour=3))
+        cache.get(['GCG6', 'CLF6'], self.date)
+        cache.get(['GCG6'], self.date, bars=False)
+        self.assertEqual(len(self.loads), 4)
+        self.assertEqual(cache.misses, 4)
+
+    def test_byte_budget_evicts_lru(self):
+        day_nbytes = int(make_day(['GCG6'], self.date).memory_usage(index=True).sum())
+        cache = DayDataCache(max_bytes=2*day_nbytes, loader=self.loader)
+        days = [self.date + dt.timedelta(days=i) for i in range(3)]
+        cache.get(['GCG6'], days[0])
+        cache.get(['GCG6'], days[1])
+        cache.get(['GCG6'], days[0])  # days[1] is now least recently used
+        cache.get(['GCG6'], days[2])
+        self.assertEqual(cache.evictions, 1)
+        self.assertIn(cache.make_key(['GCG6'], days[0]), cache)
+        self.assertNotIn(cache.make_key(['GCG6'], days[1]), cache)
+        self.assertLessEqual(cache.nbytes, cache.max_bytes)
+
+    def test_keeps_latest_day_over_budget(self):
+        cache = DayDataCache(max_bytes=1, loader=self.loader)
+        cache.get(['GCG6'], self.date)
+        cache.get(['GCG6'], self.date)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+import datetime as dt
+from backtest.test.fixtures import load_quotes, make_products, START
+from backtest.test.reference_strategies import MeanReversion, IntradayMeanReversion, assert_same
+from backtest.day_parallel import run_days, run_sequential
+
+END = dt.datetime(2015, 12, 4)
+PARAMS = {'window': 10, 'threshold': .05, 'size': 2}
+
+
+class TestDayParallel(unittest.TestCase):
+
+    def setUp(self):
+        self.expected = run_sequential(IntradayMeanReversion, make_products(), START, END, params=PARAMS,
+                                       loader=load_quotes, commission=1.2)
+
+    def test_sequential_results(self):
+        self.assertEqual(list(self.expected.daily_pnl.index),
+                         [dt.datetime(2015, 12, 1), dt.datetime(2015, 12, 2), dt.datetime(2015, 12, 3),
+                          dt.datetime(2015, 12, 4)])
+        self.assertGreater(len(self.expected.transactions), 10)
+        self.assertTrue((self.expected.positions == 0).all().all())
+        self.assertTrue((self.expected.transactions['commission'] == 1.2).all())
+
+    def test_days_in_this_process(self):
+        results = run_days(IntradayMeanReversion, make_products(), START, END, params=PARAMS, loader=load_quotes,
+                           commission=1.2)
+        assert_same(results, self.expected)
+
+    def test_days_on_a_process_pool(self):
+        results = run_days(IntradayMeanReversion, make_products(), START, END, params=PARAMS, processes=3,
+                           loader=load_quotes, commission=1.2)
+        assert_same(results, self.expected)
+        self.assertAlmostEqual(results.returns(10000.).sum()*10000., self.expected.daily_pnl.sum())
+
+    def test_requires_day_independent_strategy(self):
+        self.assertRaises(ValueError, run_days, MeanReversion, make_products(), START, END, loader=load_quotes)
+
+
+if __name__ == '__main__':
+    unittest.main()
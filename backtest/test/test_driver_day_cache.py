@@ -0,0 +1,31 @@
+import unittest
+import datetime as dt
+from backtest.data_utils.day_data_cache import DayDataCache
+from backtest.test.test_day_data_cache import make_day
+from backtest.execution import make_handlers
+from trading.event_bus import BacktestEventBus
+from trading.events import OrderEvent
+from trading.futures_contract import FuturesContract
+
+
+class TestDriverLoadsEveryDayOnce(unittest.TestCase):
+
+    def setUp(self):
+        self.loads = []
+
+    def loader(self, symbols, date, bars=None, start_time=None, end_time=None):
+        self.loads.append((tuple(symbols), date, start_time, end_time))
+        return make_day(symbols, date)
+
+    def test_data_and_execution_share_the_day(self):
+        product = FuturesContract('GC', exp_year=2016, exp_month=2)
+        start_date = dt.datetime(year=2015, month=12, day=1)
+        data, execution = make_handlers(BacktestEventBus(), [product], start_date, start_date, dt.time(hour=5),
+                                        dt.time(hour=18), day_cache=DayDataCache(loader=self.loader))
+        execution.process_new_order(OrderEvent(product, 1, order_time=start_date + dt.timedelta(hours=3, minutes=1)))
+        self.assertIs(execution.curr_day_data, data.curr_day_data)
+        self.assertEqual(self.loads, [(('GCG6',), start_date, dt.time(hour=5), dt.time(hour=18))])
+
+
+if __name__ == '__main__':
+    unittest.main()
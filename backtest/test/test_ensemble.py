@@ -0,0 +1,47 @@
+import unittest
+import datetime as dt
+import pandas.util.testing as pdt
+from backtest.ensemble import run_ensemble, seed_manifest
+from backtest.test.fixtures import load_quotes, make_products, START
+from backtest.test.reference_strategies import Quoter, QUOTER_EXECUTION
+
+END = dt.datetime(2015, 12, 2)
+
+
+class TestEnsemble(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.products = make_products()
+        cls.results = run_ensemble(Quoter, cls.products, START, END, members=6, master_seed=7, loader=load_quotes,
+                                   **QUOTER_EXECUTION)
+
+    def test_seed_manifest(self):
+        manifest = seed_manifest(6, master_seed=7)
+        pdt.assert_frame_equal(manifest, self.results.manifest)
+        self.assertEqual(len(set(manifest['fill_seed']) | set(manifest['latency_seed'])), 12)
+        self.assertFalse(seed_manifest(6, master_seed=8).equals(manifest))
+
+    def test_members_sample_the_execution(self):
+        self.assertEqual(list(self.results.table.index), list(range(6)))
+        self.assertEqual(len(self.results.daily_pnl), 2)
+        self.assertGreater(self.results.table['pnl'].nunique(), 1)
+        quantiles = self.results.quantiles('pnl')
+        self.assertEqual(list(quantiles), sorted(quantiles))
+        self.assertEqual(quantiles[.5], self.results.table['pnl'].median())
+
+    def test_same_results_on_worker_processes(self):
+        results = run_ensemble(Quoter, self.products, START, END, members=6, master_seed=7, processes=2,
+                               loader=load_quotes, **QUOTER_EXECUTION)
+        pdt.assert_frame_equal(results.table, self.results.table, check_exact=True)
+        pdt.assert_frame_equal(results.daily_pnl, self.results.daily_pnl, check_exact=True)
+
+    def test_replay_from_the_manifest(self):
+        manifest = self.results.manifest.iloc[[4, 1]]
+        results = run_ensemble(Quoter, self.products, START, END, members=manifest, loader=load_quotes,
+                               **QUOTER_EXECUTION)
+        pdt.assert_frame_equal(results.table, self.results.table.loc[[4, 1]], check_exact=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
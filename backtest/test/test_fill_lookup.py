@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+from backtest.execution import BacktestExecution, SymbolQuotes
+from backtest.data_utils.day_data_cache import DayDataCache
+from backtest.test.fixtures import load_quotes, make_orders, START
+from backtest.test.reference_executions import AsofExecution, make_execution, run_orders, fill_tuples
+from trading.events import OrderEvent
+
+NAN = float('nan')
+
+
+class TestSymbolQuotes(unittest.TestCase):
+
+    def setUp(self):
+        self.quotes = SymbolQuotes(np.array([10, 20, 30, 40], dtype=np.int64), np.array([NAN, 1., NAN, 3.]),
+                                   np.array([2., NAN, NAN, 4.]))
+
+    def test_position(self):
+        self.assertEqual([self.quotes.position(t) for t in (5, 10, 29, 30, 100)], [-1, 0, 1, 2, 3])
+
+    def test_prices_as_of_a_row(self):
+        self.assertEqual([self.quotes.bid(p) for p in (1, 2, 3)], [1., 1., 3.])
+        self.assertEqual([self.quotes.ask(p) for p in (0, 1, 2, 3)], [2., 2., 2., 4.])
+        self.assertTrue(np.isnan(self.quotes.bid(0)))
+        self.assertTrue(np.isnan(self.quotes.ask(-1)))
+
+
+class TestFillLookup(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cache = DayDataCache(loader=load_quotes)
+        execution = make_execution(BacktestExecution, cls.cache)
+        cls.data = cls.cache.get([product.symbol for product in execution.products], START)
+
+    def test_market_fills_match_asof(self):
+        orders = make_orders(make_execution(BacktestExecution, self.cache).products, self.data, 500)
+        expected, _ = run_orders(make_execution(AsofExecution, self.cache), orders)
+        fills, _ = run_orders(make_execution(BacktestExecution, self.cache), orders)
+        self.assertEqual(len(fills), 500)
+        self.assertEqual(fill_tuples(fills), fill_tuples(expected))
+
+    def test_market_order_before_the_first_row(self):
+        execution = make_execution(BacktestExecution, self.cache)
+        order_time = self.data.index[0].to_pydatetime().replace(hour=2)
+        with self.assertRaises(ValueError):
+            execution.process_new_order(OrderEvent(execution.products[0], 1, order_time=order_time))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import numpy as np
+from backtest.data_utils.order_book import BUY, SELL, walk_levels
+from backtest.data_utils.day_data_cache import DayDataCache
+from backtest.sweep import SweepBacktest
+from backtest.execution import BacktestExecution
+from backtest.test.fixtures import load_depth, make_orders, SYMBOLS, START
+from backtest.test.reference_executions import make_execution, run_orders
+from backtest.test.reference_strategies import Momentum
+from trading.events import OrderEvent
+
+NAN = float('nan')
+
+
+class TestWalkLevels(unittest.TestCase):
+
+    def test_takes_the_best_levels_first(self):
+        np.testing.assert_array_equal(walk_levels([5, 3, 10], 7), [5, 2, 0])
+        np.testing.assert_array_equal(walk_levels([5, 3, 10], 5), [5, 0, 0])
+        np.testing.assert_array_equal(walk_levels([5, NAN, 10], 7), [5, 0, 2])
+        np.testing.assert_array_equal(walk_levels([5, 3, 10], 30), [5, 3, 10])
+
+
+class TestMarketImpact(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cache = DayDataCache(loader=load_depth)
+        cls.data = cls.cache.get(SYMBOLS, START)
+        cls.products = make_execution(BacktestExecution, cls.cache).products
+
+    def orders(self, size, n=200):
+        orders = make_orders(self.products, self.data, n)
+        for order in orders:
+            order.quantity = size if order.quantity > 0 else -size
+        return orders
+
+    def expected_price(self, execution, order):
+        """
+        The average price of the order walking the levels one contract at a time.
+        """
+        book = execution._get_book(order.symbol)
+        position = execution._get_fill_position(order.order_time, order.symbol)[1]
+        side = SELL if order.quantity > 0 else BUY
+        levels = [level for level in range(book.levels)
+                  if not np.isnan(book.price[position, side, level]) and book.volume[position, side, level] > 0]
+        if not levels:
+            return NAN
+        left, cost = abs(order.quantity), 0.
+        for level in levels:
+            volume = book.volume[position, side, level]
+            while left and volume:
+                cost += book.price[position, side, level]
+                left, volume = left - 1, volume - 1
+        return (cost + left*book.price[position, side, levels[-1]])/abs(order.quantity)
+
+    def test_one_lot_fills_at_the_top_of_book(self):
+        orders = self.orders(1)
+        top, _ = run_orders(make_execution(BacktestExecution, self.cache), orders)
+        walk, _ = run_orders(make_execution(BacktestExecution, self.cache, market_impact=True), orders)
+        np.testing.assert_array_equal([fill.fill_price for fill in walk], [fill.fill_price for fill in top])
+
+    def test_fills_at_the_average_price_of_the_levels_taken(self):
+        orders = self.orders(40)
+        execution = make_execution(BacktestExecution, self.cache, market_impact=True)
+        fills, _ = run_orders(execution, orders)
+        self.assertEqual(len(fills), len(orders))
+        for order, fill in zip(orders, fills):
+            np.testing.assert_allclose(fill.fill_price, self.expected_price(execution, order))
+            self.assertEqual(fill.quantity, order.quantity)
+
+    def test_partial_fills(self):
+        orders = self.orders(40, n=50)
+        walk, _ = run_orders(make_execution(BacktestExecution, self.cache, market_impact=True), orders)
+        execution = make_execution(BacktestExecution, self.cache, market_impact=True, partial_fills=True)
+        partial, _ = run_orders(execution, orders)
+        self.assertGreater(len(partial), len(walk))
+        self.assertEqual(sum(fill.quantity for fill in partial), sum(fill.quantity for fill in walk))
+        self.assertAlmostEqual(sum(fill.fill_cost for fill in partial), sum(fill.fill_cost for fill in walk))
+
+    def test_commission_charged_once_per_order(self):
+        execution = make_execution(BacktestExecution, self.cache, market_impact=True, partial_fills=True)
+        execution.commission = 2.5
+        fills, _ = run_orders(execution, [OrderEvent(self.products[0], -60, order_time=self.data.index[50])])
+        self.assertGreater(len(fills), 1)
+        self.assertEqual([fill.commission for fill in fills], [2.5] + [0]*(len(fills) - 1))
+
+    def test_sweep_passes_the_impact_model_to_the_executions(self):
+        sweep = SweepBacktest(Momentum, [{}], self.products, START, START, day_cache=self.cache, market_impact=True)
+        self.assertTrue(sweep.members[0].execution.market_impact)
+
+
+if __name__ == '__main__':
+    unittest.main()
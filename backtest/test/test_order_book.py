@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import unittest
+import datetime as dt
+import numpy as np
+import pandas.util.testing as pdt
+import backtest.data_utils.data_path as data_path
+from backtest.data_utils.order_book import OrderBook, BUY, SELL
+from backtest.data_utils.data_aggregation import make_concise
+from backtest.data_utils.day_cache import get_cache_path
+from backtest.data_utils.quantgo_utils import get_order_book, _parse_cme_level2_data
+from backtest.test.synthetic import write_cme_level2_file
+from backtest.test.reference_data import make_concise_apply
+
+
+class TestOrderBook(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data_dir = tempfile.mkdtemp()
+        cls.default_data_dir = data_path.DATA_DIR
+        data_path.DATA_DIR = cls.data_dir
+        cls.symbol = 'GCG6'
+        cls.date = dt.datetime(year=2015, month=12, day=1)
+        fpath = write_cme_level2_file(data_path.get_file_path(cls.symbol, cls.date, 'CME_Level_2'),
+                                      cls.symbol, cls.date, n_updates=1000)
+        cls.parsed = _parse_cme_level2_data(fpath)
+
+    @classmethod
+    def tearDownClass(cls):
+        data_path.DATA_DIR = cls.default_data_dir
+        shutil.rmtree(cls.data_dir)
+
+    def test_from_frame(self):
+        book = OrderBook.from_frame(self.parsed)
+        self.assertEqual(book.price.shape, (len(self.parsed), 2, 5))
+        self.assertEqual(book.symbol, self.symbol)
+        np.testing.assert_array_equal(book.best_bid, self.parsed['level_1_price_buy'].values)
+        np.testing.assert_array_equal(book.price[:, SELL, 2], self.parsed['level_3_price_sell'].values)
+        np.testing.assert_array_equal(book.volume[:, BUY, 4], self.parsed['level_5_volume_buy'].values)
+        np.testing.assert_array_equal(book.orders[:, SELL, 1], self.parsed['level_2_orders_sell'].values)
+        np.testing.assert_array_equal(book.depth(BUY)[:, -1], book.volume[:, BUY].sum(axis=1))
+        np.testing.assert_array_equal(book.spread, book.best_ask - book.best_bid)
+
+    def test_asof(self):
+        book = OrderBook.from_frame(self.parsed)
+        index = self.parsed.index
+        self.assertEqual(book.asof(index[0] - dt.timedelta(seconds=1)), -1)
+        self.assertEqual(book.asof(index[10]), np.searchsorted(index.asi8, index.asi8[10], side='right') - 1)
+        self.assertEqual(book.asof(index[-1] + dt.timedelta(hours=1)), len(book) - 1)
+        price, volume, orders = book.snapshot(book.asof(index[10]))
+        self.assertEqual(price.shape, (2, 5))
+
+    def test_round_trip(self):
+        book = OrderBook.from_frame(self.parsed)
+        fpath = os.path.join(self.data_dir, 'book.col')
+        book.save(fpath)
+        for mmap in [True, False]:
+            loaded = OrderBook.load(fpath, mmap=mmap)
+            self.assertEqual(loaded.symbol, self.symbol)
+            for field in ['index', 'price', 'volume', 'orders']:
+                np.testing.assert_array_equal(getattr(loaded, field), getattr(book, field))
+        columns = [name for name in book.to_frame().columns]
+        pdt.assert_frame_equal(book.to_frame(), self.parsed[columns])
+
+    def test_get_order_book_is_cached(self):
+        book = get_order_book(self.symbol, self.date)
+        fpath = get_cache_path(self.symbol, self.date, 'CME_Level_2', extension='_parsed_book')
+        self.assertTrue(os.path.exists(fpath))
+        self.assertIsInstance(get_order_book(self.symbol, self.date).price, np.memmap)
+        np.testing.assert_array_equal(get_order_book(self.symbol, self.date).price, book.price)
+
+    def test_make_concise_matches_lists(self):
+        numeric = self.parsed.drop(['level_{}_{}'.format(i, side) for i in range(6, 11) for side in ['buy', 'sell']],
+                                   axis=1)
+        expected = make_concise_apply(numeric.iloc[:50])
+        actual = make_concise(self.parsed.iloc[:50])
+        self.assertEqual(list(actual.columns), list(expected.columns))
+        for name in ['price_buy', 'volume_sell', 'orders_buy']:
+            self.assertEqual(list(actual[name].values), list(expected[name].values))
+
+
+if __name__ == '__main__':
+    unittest.main()
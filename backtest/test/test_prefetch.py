@@ -0,0 +1,131 @@
+import unittest
+import threading
+import datetime as dt
+from Queue import Queue, Empty
+from backtest.data import BacktestData
+from backtest.prefetch import DayPrefetcher
+from backtest.data_utils.day_data_cache import DayDataCache
+from backtest.test.test_day_data_cache import make_day
+from trading.events import MARKET
+
+
+class RollingProduct(object):
+    """
+    Minimal continuous contract: rolls from GCG6 to GCJ6 mid-month.
+    """
+    def __init__(self):
+        self.symbol = 'GCG6'
+        self.roll_threads = set()  # threads roll_symbol was called on
+
+    def roll_symbol(self, year, month, day):
+        self.roll_threads.add(threading.current_thread())
+        return 'GCG6' if day < 4 else 'GCJ6'
+
+    def set_symbol(self, symbol):
+        self.symbol = symbol
+
+
+def run_data(prefetch):
+    cache = DayDataCache(loader=lambda symbols, date, **kwargs: make_day(symbols, date, rows=20))
+    events = Queue()
+    data = BacktestData(events, [RollingProduct()], dt.datetime(year=2015, month=12, day=1),
+                        dt.datetime(year=2015, month=12, day=6), day_cache=cache, prefetch=prefetch)
+    ticks = []
+    while data.continue_backtest:
+        data.update()
+        while True:
+            try:
+                event = events.get(False)
+            except Empty:
+                break
+            if event.code != MARKET:
+                continue
+            ticks.append((event.dt, tuple(data.symbols), tuple(event.data.to_series().values)))
+    return ticks
+
+
+class RecordingLoad(object):
+    """
+    Loader stub recording the days it loads, notifying loaded on every load.
+    """
+    def __init__(self):
+        self.days = []
+        self.loaded = threading.Condition()
+
+    def __call__(self, date):
+        with self.loaded:
+            self.days.append(date)
+            self.loaded.notify_all()
+        return date
+
+    def wait_for(self, count):
+        with self.loaded:
+            while len(self.days) < count:
+                self.loaded.wait()
+
+
+def wait_stored(prefetcher, count):
+    """
+    Wait until count loaded days are held by the prefetcher and it is not loading any.
+    """
+    with prefetcher._cond:
+        while len(prefetcher._results) < count or prefetcher._loading is not None:
+            prefetcher._cond.wait()
+
+
+class TestDayPrefetcher(unittest.TestCase):
+
+    def test_loads_in_order(self):
+        loaded = []
+        prefetcher = DayPrefetcher(lambda d: loaded.append(d) or d*10, depth=3)
+        prefetcher.schedule([1, 2, 3])
+        self.assertEqual([prefetcher.get(d) for d in [1, 2, 3]], [10, 20, 30])
+        self.assertEqual(loaded, [1, 2, 3])
+        self.assertEqual(prefetcher.get(4), 40)  # never scheduled, loaded synchronously
+        prefetcher.close()
+
+    def test_errors_are_raised_by_get(self):
+        def load(d):
+            if d == 2:
+                raise ValueError("missing day")
+            return d
+        prefetcher = DayPrefetcher(load)
+        prefetcher.schedule([1, 2])
+        self.assertEqual(prefetcher.get(1), 1)
+        self.assertRaises(ValueError, prefetcher.get, 2)
+        prefetcher.close()
+
+    def test_memory_cap(self):
+        load = RecordingLoad()
+        prefetcher = DayPrefetcher(load, depth=5, max_bytes=2, sizeof=lambda r: 1)
+        prefetcher.schedule([1, 2, 3, 4])
+        load.wait_for(2)
+        wait_stored(prefetcher, 2)  # at the cap: the loader thread waits for a day to be consumed
+        self.assertEqual(load.days, [1, 2])
+        self.assertEqual(list(prefetcher._pending), [3, 4])
+        prefetcher.get(1)
+        load.wait_for(3)
+        wait_stored(prefetcher, 2)
+        self.assertEqual(load.days, [1, 2, 3])
+        self.assertEqual(list(prefetcher._pending), [4])
+        prefetcher.close()
+
+    def test_backtest_data_identical_with_prefetch(self):
+        sequential = run_data(prefetch=0)
+        self.assertEqual(len(sequential), 4*20)  # Dec 1-4, the 5th and 6th are a weekend
+        self.assertEqual(run_data(prefetch=1), sequential)
+        self.assertEqual(run_data(prefetch=3), sequential)
+
+    def test_backtest_data_rolls_on_the_main_thread(self):
+        product = RollingProduct()
+        data = BacktestData(Queue(), [product], dt.datetime(year=2015, month=12, day=1),
+                            dt.datetime(year=2015, month=12, day=6),
+                            day_cache=DayDataCache(loader=lambda symbols, date, **kwargs: make_day(symbols, date)),
+                            prefetch=3)
+        while data.continue_backtest:
+            data.update()
+        self.assertEqual(product.roll_threads, set([threading.current_thread()]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import os
+import shutil
+import tempfile
+import unittest
+import datetime as dt
+import numpy as np
+import pandas.util.testing as pdt
+from backtest.data_utils.quantgo_utils import _parse_cme_level2_data, _parse_levels
+from backtest.test.synthetic import write_cme_level2_file
+from backtest.test.reference_data import parse_cme_level2_data_regex
+
+
+class TestCMELevel2Parser(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp()
+        cls.fpath = write_cme_level2_file(os.path.join(cls.tmp_dir, 'GCG6', '20151201.csv'), 'GCG6',
+                                          dt.datetime(year=2015, month=12, day=1), n_updates=2000)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir)
+
+    def test_matches_regex_parser(self):
+        pdt.assert_frame_equal(_parse_cme_level2_data(self.fpath), parse_cme_level2_data_regex(self.fpath))
+
+    def test_parse_levels(self):
+        levels = np.array([[' 1060.5 x 13 (2)', ' 1060.4 x 1 (1)'],
+                           [' 1060.6 x 7 (3)', ' 1060.5 x 20 (11)']], dtype=object)
+        parsed = _parse_levels(levels)
+        self.assertEqual(parsed.shape, (2, 2, 3))
+        np.testing.assert_array_equal(parsed[1, 1], [1060.5, 20, 11])
+
+    def test_parse_levels_malformed(self):
+        with self.assertRaises(ValueError):
+            _parse_levels(np.array([[' 1060.5 x 13']], dtype=object))
+
+
+if __name__ == '__main__':
+    unittest.main()
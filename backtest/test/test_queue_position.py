@@ -0,0 +1,102 @@
+import unittest
+import numpy as np
+from backtest.queue_position import QueuePositions
+import datetime as dt
+from backtest.execution import BacktestExecution, CME_HISTORICAL_ORDER_DELAY
+from backtest.data_utils.day_data_cache import DayDataCache
+from backtest.data_utils.order_book import BUY, SELL
+from backtest.test.fixtures import load_depth, load_quotes, make_flow, SYMBOLS, START
+from backtest.test.reference_executions import RowQueueExecution, make_execution, run_flow
+from trading.events import OrderEvent, MarketEvent
+
+NAN = float('nan')
+
+
+def make_queues(bids, bid_volumes, asks, ask_volumes):
+    """
+    Two level book: the second level one tick behind the first, with the same volume.
+    """
+    n = len(bids)
+    price = np.empty((n, 2, 2))
+    volume = np.empty((n, 2, 2))
+    price[:, BUY, 0], price[:, BUY, 1] = bids, np.array(bids) - .1
+    price[:, SELL, 0], price[:, SELL, 1] = asks, np.array(asks) + .1
+    volume[:, BUY, :] = np.array(bid_volumes, dtype=float)[:, None]
+    volume[:, SELL, :] = np.array(ask_volumes, dtype=float)[:, None]
+    return QueuePositions(np.arange(n, dtype=np.int64), price, volume)
+
+
+class TestQueuePositions(unittest.TestCase):
+
+    def test_fills_once_the_volume_ahead_is_removed(self):
+        queues = make_queues([100.] * 5, [5, 3, 3, 6, 2], [100.1] * 5, [1] * 5)
+        self.assertEqual(queues.fill_row(1, 100., 0), 4)
+        # joining on row 2, with 3 ahead: only the 4 removed on row 4 count
+        self.assertEqual(queues.fill_row(1, 100., 2), 4)
+        self.assertEqual(queues.fill_row(1, 100., 4), -1)
+
+    def test_fills_when_the_price_trades_through(self):
+        queues = make_queues([100., 100., 99.9, 99.9], [20, 25, 30, 30], [100.1] * 4, [1] * 4)
+        self.assertEqual(queues.fill_row(1, 100., 0), 2)
+        # the second level: 20 ahead, then 30 at the best bid and nothing removed
+        self.assertEqual(queues.fill_row(1, 99.9, 0), -1)
+
+    def test_order_improving_the_price_fills_on_the_first_volume_removed(self):
+        queues = make_queues([100., 100., 100.1, 100.1, 100.1], [5] * 5, [100.3] * 5, [1] * 5)
+        self.assertEqual(queues.fill_row(1, 100.1, 0), -1)
+        queues = make_queues([100., 100., 100.1, 100.1, 100.1], [5, 5, 5, 5, 4], [100.3] * 5, [1] * 5)
+        self.assertEqual(queues.fill_row(1, 100.1, 0), 4)
+
+    def test_price_deeper_than_the_book_waits_to_be_seen(self):
+        queues = make_queues([100., 99.7, 99.7, 99.7], [9, 4, 6, 1], [100.1] * 4, [3, 9, 2, 2])
+        # 99.6 is first displayed on row 1 with 4 ahead, 5 removed on row 3
+        self.assertEqual(queues.fill_row(1, 99.6, 0), 3)
+        # 3 ahead of the sell at the second level, the 6 joining on row 1 behind
+        self.assertEqual(queues.fill_row(-1, 100.2, 0), 2)
+        self.assertEqual(queues.fill_row(-1, 100.5, 0), -1)
+
+
+class TestQueueFills(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cache = DayDataCache(loader=load_depth)
+        cls.data = cls.cache.get(SYMBOLS, START)
+
+    def test_fills_match_row_by_row_tracking(self):
+        for seed in range(2):
+            flow = make_flow(seed, len(self.data))
+            expected = run_flow(make_execution(RowQueueExecution, self.cache, queue_fills=True), flow, self.data)
+            fills = run_flow(make_execution(BacktestExecution, self.cache, queue_fills=True), flow, self.data)
+            self.assertGreater(len(expected), 20)
+            self.assertEqual(fills, expected)
+
+    def test_fills_do_not_depend_on_the_seed(self):
+        flow = make_flow(0, len(self.data))
+        fills = [run_flow(make_execution(BacktestExecution, self.cache, queue_fills=True), flow, self.data, seed)
+                 for seed in (0, 1)]
+        self.assertEqual(fills[0], fills[1])
+
+    def test_queued_order_fills_at_its_price(self):
+        execution = make_execution(BacktestExecution, self.cache, queue_fills=True)
+        bid = self.data[(SYMBOLS[0], 'level_2_price_buy')].values[10]
+        order = OrderEvent(execution.products[0], 2, 'LIMIT', bid, self.data.index[10].to_pydatetime())
+        execution.process_new_order(order)
+        row = execution.queue_rows[order.order_id]
+        self.assertGreater(row, 10)
+        fill_time = self.data.index[row].to_pydatetime() - CME_HISTORICAL_ORDER_DELAY
+        execution.process_resting_orders(MarketEvent(fill_time - dt.timedelta(microseconds=1), None))
+        self.assertEqual(len(execution.events), 0)
+        execution.process_resting_orders(MarketEvent(fill_time, None))
+        fill = execution.events.get()
+        self.assertEqual((fill.fill_price, fill.fill_time), (bid, self.data.index[row]))
+
+    def test_needs_the_book_depth(self):
+        execution = make_execution(BacktestExecution, DayDataCache(loader=load_quotes), queue_fills=True)
+        order = OrderEvent(execution.products[0], 1, 'LIMIT', 1000., START.replace(hour=4))
+        with self.assertRaises(ValueError):
+            execution.process_new_order(order)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from backtest.resting_orders import RestingOrderBook
+from backtest.execution import BacktestExecution
+from backtest.data_utils.day_data_cache import DayDataCache
+from backtest.test.fixtures import load_quotes, make_flow, SYMBOLS, START
+from backtest.test.reference_executions import ScanExecution, make_execution, run_flow
+from trading.events import OrderEvent, MarketEvent
+from trading.futures_contract import FuturesContract
+
+NAN = float('nan')
+
+
+class TestRestingOrderBook(unittest.TestCase):
+
+    def setUp(self):
+        self.product = FuturesContract('GC', exp_year=2016, exp_month=2)
+        self.book = RestingOrderBook()
+
+    def limit(self, quantity, price):
+        order = OrderEvent(self.product, quantity, 'LIMIT', price)
+        self.book.add(order)
+        return order
+
+    def test_pops_marketable_orders_in_price_then_time_priority(self):
+        b1, b2, b3, b4 = self.limit(1, 100.), self.limit(1, 100.2), self.limit(2, 100.), self.limit(1, 99.9)
+        s1, s2 = self.limit(-1, 100.1), self.limit(-1, 100.3)
+        self.assertEqual(self.book.pop_marketable('GCG6', 99.5, 100.5), [])
+        self.assertEqual(self.book.pop_marketable('GCG6', 100.1, 100.), [b2, b1, b3, s1])
+        self.assertEqual(list(self.book), [b4, s2])
+        self.assertEqual(self.book.pop_marketable('GCG6', NAN, NAN), [])
+        self.assertEqual(self.book.pop_marketable('SIG6', 0., 0.), [])
+
+    def test_cancel(self):
+        b1, b2 = self.limit(1, 100.), self.limit(1, 100.2)
+        self.assertIs(self.book.cancel(b2.order_id), b2)
+        self.assertIsNone(self.book.cancel(b2.order_id))
+        self.assertNotIn(b2.order_id, self.book)
+        self.assertEqual(self.book.pop_marketable('GCG6', 0., 99.), [b1])
+        self.assertEqual(len(self.book), 0)
+
+    def test_replace(self):
+        b1, b2 = self.limit(1, 100.), self.limit(1, 99.)
+        self.assertIs(self.book.replace(b2.order_id, price=101.), b2)
+        self.assertEqual(self.book.pop_marketable('GCG6', 0., 100.5), [b2])
+        # a replace that turns a buy into a sell moves it to the other side of the book
+        self.book.replace(b1.order_id, quantity=-3)
+        self.assertEqual(self.book.pop_marketable('GCG6', 99., 99.), [])
+        self.assertEqual(self.book.pop_marketable('GCG6', 100., 200.), [b1])
+        self.assertIsNone(self.book.replace(b1.order_id, price=1.))
+
+    def test_iterates_in_arrival_order(self):
+        b1, s1, b2 = self.limit(1, 100.), self.limit(-1, 101.), self.limit(1, 99.)
+        self.book.replace(b1.order_id, price=98.)
+        self.book.cancel(s1.order_id)
+        self.assertEqual(list(self.book), [b1, b2])
+        self.assertEqual(self.book.symbols(), ['GCG6'])
+
+
+class TestRestingOrderFills(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cache = DayDataCache(loader=load_quotes)
+        cls.data = cls.cache.get(SYMBOLS, START)
+
+    def check_same(self, seed, limit_fill_probability):
+        flow = make_flow(seed, len(self.data))
+        expected = run_flow(make_execution(ScanExecution, self.cache, limit_fill_probability), flow, self.data, seed)
+        fills = run_flow(make_execution(BacktestExecution, self.cache, limit_fill_probability), flow, self.data, seed)
+        self.assertGreater(len(expected), 20)
+        self.assertEqual(fills, expected)
+
+    def test_crossing_fills_match_scan(self):
+        for seed in range(2):
+            self.check_same(seed, 0)
+
+    def test_probabilistic_fills_match_scan(self):
+        for seed in range(2):
+            self.check_same(seed, .1)
+
+    def test_orders_rest_until_the_next_day(self):
+        execution = make_execution(BacktestExecution, self.cache)
+        execution.process_new_order(OrderEvent(execution.products[0], 1, 'LIMIT', 1., self.data.index[5]))
+        self.assertEqual(len(execution.resting_orders), 1)
+        next_day = self.cache.get(SYMBOLS, START.replace(day=2))
+        execution.process_resting_orders(MarketEvent(next_day.index[0].to_pydatetime(), None))
+        self.assertEqual(len(execution.resting_orders), 0)
+        self.assertEqual(len(execution.events), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import numpy as np
+import pandas as pd
+import datetime as dt
+import pandas.util.testing as pdt
+from backtest.test.fixtures import load_quotes, make_products, START
+from backtest.test.reference_strategies import Momentum, run_events, run_vectorized
+from backtest.signal_backtest import SignalStrategy
+from backtest.data_utils.day_data_cache import DayDataCache
+
+END = dt.datetime(2015, 12, 3)
+
+
+class SpreadReversion(SignalStrategy):
+    """
+    Two contracts against each other when the spread of the two mids is away from its 20 bar mean.
+    """
+    def target_positions(self, block):
+        mids = [(block.column(p.symbol, 'level_1_price_buy') + block.column(p.symbol, 'level_1_price_sell'))/2.
+                for p in self.products]
+        spread = mids[0] - mids[1]
+        mean = pd.Series(spread).rolling(20, min_periods=1).mean().values
+        side = np.where(spread > mean + .01, -2, np.where(spread < mean - .01, 2, 0))
+        return np.column_stack([side, -side])
+
+
+class TestSignalBacktest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = DayDataCache(loader=load_quotes)
+
+    def check_same(self, strategy_class, n_products, commission=0):
+        expected = run_events(strategy_class, make_products(n_products), START, END, self.cache, commission)
+        results = run_vectorized(strategy_class, make_products(n_products), START, END, self.cache, commission)
+        self.assertGreater(len(expected.transactions), 10)
+        pdt.assert_frame_equal(results.transactions, expected.transactions)
+        pdt.assert_frame_equal(results.positions, expected.positions)
+        pdt.assert_series_equal(results.pnl, expected.pnl)
+        return results
+
+    def test_momentum(self):
+        results = self.check_same(Momentum, 1)
+        self.assertEqual(len(results.pnl), 3*400)
+        self.assertEqual(list(results.positions.columns), ['GCG6'])
+
+    def test_spread_reversion_with_commission(self):
+        results = self.check_same(SpreadReversion, 2, commission=2.5)
+        self.assertTrue((results.transactions['commission'] == 2.5).all())
+        self.assertEqual(set(results.transactions['symbol']), {'GCG6', 'SIG6'})
+
+    def test_fills_cross_the_spread(self):
+        results = run_vectorized(Momentum, make_products(1), START, END, self.cache)
+        data = self.cache.get(['GCG6'], START)
+        buys = results.transactions[results.transactions['amount'] > 0]
+        buys = buys[buys.index < START + dt.timedelta(days=1)]
+        asks = data[('GCG6', 'level_1_price_sell')]
+        np.testing.assert_array_equal(buys['price'].values, asks.asof(buys.index).values)
+        self.assertTrue((buys.index >= buys['order_time']).all())
+        self.assertTrue((buys.index - buys['order_time'] <= pd.Timedelta(milliseconds=10)).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
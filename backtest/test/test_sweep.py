@@ -0,0 +1,92 @@
+import unittest
+import datetime as dt
+import numpy as np
+import pandas.util.testing as pdt
+from collections import OrderedDict
+from backtest.test.fixtures import load_quotes, make_products, CountingLoader, START
+from backtest.test.reference_strategies import MeanReversion, run_events
+from backtest.sweep import parameter_grid, SweepBacktest, run_sweep, METRIC_COLUMNS
+from backtest.signal_backtest import SignalStrategy
+from backtest.data_utils.day_data_cache import DayDataCache
+from trading.futures_contract import FuturesContract
+from trading.roll_schedule import RollSchedule
+
+END = dt.datetime(2015, 12, 3)
+GRID = {'window': [5, 40], 'threshold': [.05, .2]}
+
+
+class AlwaysLong(SignalStrategy):
+    """
+    Long one contract of the first product on every bar.
+    """
+    def target_positions(self, block):
+        return np.ones((len(block), 1), dtype=int)
+
+
+class TestParameterGrid(unittest.TestCase):
+
+    def test_every_combination_in_a_stable_order(self):
+        self.assertEqual(parameter_grid({'b': [1, 2], 'a': ['x', 'y']}),
+                         [{'a': 'x', 'b': 1}, {'a': 'x', 'b': 2}, {'a': 'y', 'b': 1}, {'a': 'y', 'b': 2}])
+
+
+class TestSweepBacktest(unittest.TestCase):
+
+    def test_members_match_separate_backtests(self):
+        loader = CountingLoader()
+        configs = parameter_grid(GRID)
+        sweep = SweepBacktest(MeanReversion, configs, make_products(), START, END, commission=1.5,
+                              day_cache=DayDataCache(loader=loader))
+        results = sweep.run()
+        self.assertEqual(len(loader.dates), 3)  # every day loaded once for the 4 configurations
+
+        for params, member, result in zip(configs, sweep.members, results):
+            expected = run_events(MeanReversion, make_products(), START, END, DayDataCache(loader=load_quotes),
+                                  commission=1.5, **params)
+            actual = member.strategy.results()
+            self.assertGreater(len(expected.transactions), 0)
+            pdt.assert_frame_equal(actual.transactions, expected.transactions)
+            pdt.assert_series_equal(actual.pnl, expected.pnl)
+            # the sweep's own end of day marks agree with the strategy's accounting
+            self.assertEqual(result['metrics']['fills'], len(expected.transactions))
+            self.assertAlmostEqual(sum(pnl for _, pnl in result['daily_pnl']),
+                                   member.strategy.signal_cash + member.value)
+            self.assertEqual(member.holdings, member.strategy.holdings)
+
+    def test_process_pool_matches_one_process(self):
+        one = run_sweep(MeanReversion, GRID, make_products(), START, END, loader=load_quotes)
+        pooled = run_sweep(MeanReversion, GRID, make_products(), START, END, processes=3, loader=load_quotes)
+        self.assertEqual(list(one.table.columns), ['threshold', 'window'] + METRIC_COLUMNS)
+        self.assertEqual(len(one.table), 4)
+        pdt.assert_frame_equal(pooled.table, one.table)
+        pdt.assert_frame_equal(pooled.daily_pnl, one.daily_pnl)
+        self.assertEqual(list(one.daily_pnl.index), [dt.datetime(2015, 12, 1), dt.datetime(2015, 12, 2),
+                                                     dt.datetime(2015, 12, 3)])
+        best = one.best('pnl')
+        self.assertEqual(one.table.loc[best, 'pnl'], one.table['pnl'].max())
+        self.assertEqual(one.params(best), {'threshold': one.table.loc[best, 'threshold'],
+                                            'window': one.table.loc[best, 'window']})
+
+    def test_marks_span_a_roll(self):
+        # GC rolls from GCG6 to GCJ6 on the second day, the GCG6 contract is still held
+        schedule = RollSchedule('GC', OrderedDict([(dt.date(2015, 12, 1), 'GCG6'), (dt.date(2015, 12, 2), 'GCJ6'),
+                                                   (dt.date(2015, 12, 3), 'GCJ6')]))
+        product = FuturesContract('GC', continuous=True, roll_schedule=schedule)
+        cache = DayDataCache(loader=lambda symbols, date, **kwargs:
+                             load_quotes(symbols, date).fillna(method='bfill'))
+        sweep = SweepBacktest(AlwaysLong, [{}], [product], START, END, day_cache=cache)
+        result = sweep.run()[0]
+        self.assertEqual([positions for _, positions in result['daily_positions']],
+                         [{'GCG6': 1}, {'GCG6': 1, 'GCJ6': 1}, {'GCG6': 1, 'GCJ6': 1}])
+        self.assertFalse(np.isnan([pnl for _, pnl in result['daily_pnl']]).any())
+        self.assertFalse(np.isnan(result['metrics']['sharpe']))
+
+        first = cache.get(['GCG6'], START)
+        mids = (first[('GCG6', 'level_1_price_buy')] + first[('GCG6', 'level_1_price_sell')])/2.
+        fills = [(amount, price) for _, amount, price, symbol, _, _ in result['transactions'] if symbol == 'GCG6']
+        self.assertAlmostEqual(result['daily_pnl'][0][1], product.contract_multiplier*sum(
+            amount*(mids.values[-1] - price) for amount, price in fills))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import datetime as dt
+import numpy as np
+import pandas.util.testing as pdt
+from backtest.test.fixtures import load_quotes, make_products, CountingLoader, START
+from backtest.test.reference_strategies import MeanReversion
+from backtest.day_parallel import run_sequential
+from backtest.sweep import run_sweep
+from backtest.walk_forward import walk_forward_windows, WalkForward, WalkForwardWindow
+from trading.trading_calendar import TradingCalendar
+
+END = dt.datetime(2015, 12, 11)
+GRID = {'window': [5, 40], 'threshold': [.05, .2]}
+
+
+class TestWalkForwardWindows(unittest.TestCase):
+
+    def test_out_of_sample_windows_tile_the_range(self):
+        sessions = range(9)
+        self.assertEqual(walk_forward_windows(sessions, 4, 2),
+                         [WalkForwardWindow(0, 3, 4, 5), WalkForwardWindow(2, 5, 6, 7), WalkForwardWindow(4, 7, 8, 8)])
+
+    def test_step(self):
+        self.assertEqual(walk_forward_windows(range(6), 3, 1, step=2),
+                         [WalkForwardWindow(0, 2, 3, 3), WalkForwardWindow(2, 4, 5, 5)])
+
+
+class TestWalkForward(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.loader = CountingLoader()
+        cls.results = WalkForward(MeanReversion, GRID, make_products(), START, END, in_sample=3, out_of_sample=2,
+                                  metric='pnl', loader=cls.loader, commission=1.).run()
+        cls.sessions = TradingCalendar().sessions(START, END)
+
+    def test_out_of_sample_pnl_is_stitched(self):
+        self.assertEqual(len(self.results.windows), 3)
+        self.assertEqual(list(self.results.daily_pnl.index), self.sessions[3:9])
+        pdt.assert_series_equal(self.results.returns(1000.), self.results.daily_pnl/1000.)
+
+    def test_best_in_sample_parameters_run_out_of_sample(self):
+        for (_, row), search in zip(self.results.windows.iterrows(), self.results.searches):
+            expected = run_sweep(MeanReversion, GRID, make_products(), row['is_start'], row['is_end'],
+                                 loader=load_quotes, commission=1.)
+            pdt.assert_frame_equal(search.table, expected.table)
+            params = expected.params(expected.best('pnl'))
+            self.assertEqual(dict((name, row[name]) for name in params), params)
+            self.assertEqual(row['is_pnl'], expected.table['pnl'].max())
+
+            oos = run_sequential(MeanReversion, make_products(), row['oos_start'], row['oos_end'], params=params,
+                                 loader=load_quotes, commission=1.)
+            pdt.assert_series_equal(self.results.daily_pnl[row['oos_start']:row['oos_end']], oos.daily_pnl)
+            self.assertAlmostEqual(row['oos_pnl'], oos.daily_pnl.sum())
+
+    def test_days_are_loaded_once(self):
+        self.assertEqual(sorted(self.loader.dates), self.sessions)
+
+    def test_process_pool(self):
+        results = WalkForward(MeanReversion, GRID, make_products(), START, END, in_sample=3, out_of_sample=2,
+                              metric='pnl', processes=2, loader=load_quotes, commission=1.).run()
+        pdt.assert_frame_equal(results.windows, self.results.windows)
+        pdt.assert_series_equal(results.daily_pnl, self.results.daily_pnl)
+
+
+class NaNWindowsWalkForward(WalkForward):
+    """
+    Walk-forward whose in-sample metric is NaN for every configuration in the windows numbered nan_windows.
+    """
+
+    def __init__(self, nan_windows, *args, **kwargs):
+        super(NaNWindowsWalkForward, self).__init__(*args, **kwargs)
+        self.nan_windows = [self.windows[i] for i in nan_windows]
+
+    def search(self, window, pool=None):
+        search = super(NaNWindowsWalkForward, self).search(window, pool)
+        if window in self.nan_windows:
+            search.table[self.metric] = np.nan
+        return search
+
+
+class TestWalkForwardWithoutMetric(unittest.TestCase):
+
+    def run_walk_forward(self, nan_windows):
+        return NaNWindowsWalkForward(nan_windows, MeanReversion, GRID, make_products(), START, END, in_sample=3,
+                                     out_of_sample=2, metric='pnl', loader=load_quotes, commission=1.).run()
+
+    def test_in_sample_too_short_for_the_metric(self):
+        self.assertRaises(ValueError, WalkForward, MeanReversion, {'window': [5, 40], 'threshold': [.05]},
+                          make_products(), START, END, in_sample=1, out_of_sample=1, metric='sharpe',
+                          loader=load_quotes)
+        self.assertRaises(ValueError, WalkForward, MeanReversion, GRID, make_products(), START, END, in_sample=3,
+                          out_of_sample=2, metric='profit', loader=load_quotes)
+
+    def test_best_is_none_without_metric(self):
+        search = run_sweep(MeanReversion, GRID, make_products(), START, START, loader=load_quotes)
+        self.assertIsNone(search.best('sharpe'))
+
+    def test_previous_parameters_are_kept(self):
+        expected = self.run_walk_forward([])
+        results = self.run_walk_forward([1])
+        self.assertEqual(list(results.windows['choice']), ['best', 'previous', 'best'])
+        self.assertTrue(np.isnan(results.windows['is_pnl'][1]))
+        first, second = results.windows.iloc[0], results.windows.iloc[1]
+        params = dict((name, first[name]) for name in GRID)
+        self.assertEqual(dict((name, second[name]) for name in GRID), params)
+        oos = run_sequential(MeanReversion, make_products(), second['oos_start'], second['oos_end'], params=params,
+                             loader=load_quotes, commission=1.)
+        pdt.assert_series_equal(results.daily_pnl[second['oos_start']:second['oos_end']], oos.daily_pnl)
+        pdt.assert_frame_equal(results.windows.drop(1), expected.windows.drop(1))
+
+    def test_flat_without_previous_parameters(self):
+        results = self.run_walk_forward([0])
+        self.assertEqual(list(results.windows['choice']), ['flat', 'best', 'best'])
+        first = results.windows.iloc[0]
+        self.assertTrue(all(np.isnan(first[name]) for name in GRID))
+        self.assertEqual(first['oos_pnl'], 0.)
+        self.assertEqual(list(results.daily_pnl.index), TradingCalendar().sessions(START, END)[3:9])
+        self.assertTrue((results.daily_pnl[first['oos_start']:first['oos_end']] == 0).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+"""
+Walk-forward optimization.
+
+The sessions from start_date to end_date are split into consecutive windows of in_sample sessions followed by
+out_of_sample sessions, moving forward by step sessions (out_of_sample by default, so the out-of-sample windows
+tile the range). In every window the parameter grid is swept in-sample (run_sweep, sharded over a process pool) and
+the configuration with the best in-sample metric is backtested out-of-sample. The out-of-sample daily pnls are
+stitched into one continuous series:
+
+    results = WalkForward(MyStrategy, {'window': [20, 60], 'threshold': [.1, .2]}, products, start_date, end_date,
+                          in_sample=20, out_of_sample=5, processes=4).run()
+    tears.create_returns_tear_sheet(results.returns(capital=100000))
+
+A window whose in-sample metric is NaN for every configuration (e.g. the sharpe of a grid that did not trade) reuses
+the previous window's parameters, or stays flat (zero pnl) when there is no previous window; results.windows
+records the choice.
+
+The pool's workers and the out-of-sample runs keep their day caches for the whole walk-forward, so days shared by
+overlapping windows are loaded once per process.
+"""
+import logging
+import numpy as np
+import pandas as pd
+from collections import namedtuple
+from sweep import SweepBacktest, run_sweep, make_pool, METRIC_COLUMNS, METRIC_MIN_SESSIONS
+from data_utils.day_data_cache import DayDataCache, DAY_DATA_CACHE
+from trading.trading_calendar import TradingCalendar
+log = logging.getLogger('Backtest')
+
+
+class WalkForwardWindow(namedtuple('WalkForwardWindow', ('is_start', 'is_end', 'oos_start', 'oos_end'))):
+    """
+    First and last sessions of an in-sample window and of the out-of-sample window following it.
+    """
+    __slots__ = ()
+
+
+def walk_forward_windows(sessions, in_sample, out_of_sample, step=None):
+    """
+    :param sessions: (list) of DateTime, in order
+    :param in_sample: (int) sessions per in-sample window
+    :param out_of_sample: (int) sessions per out-of-sample window
+    :param step: (int) sessions between the starts of consecutive windows, defaults to out_of_sample
+    :return: (list) of WalkForwardWindow, the last out-of-sample window may be shorter
+    """
+    step = step if step is not None else out_of_sample
+    windows = []
+    for start in range(0, len(sessions) - in_sample, step):
+        oos = sessions[start + in_sample:start + in_sample + out_of_sample]
+        windows.append(WalkForwardWindow(sessions[start], sessions[start + in_sample - 1], oos[0], oos[-1]))
+    return windows
+
+
+class WalkForwardResults(object):
+    """
+    Results of a walk-forward.
+        windows: (DataFrame) a row per window: its dates, the parameters chosen in-sample, their in-sample metric,
+            their out-of-sample pnl and how they were chosen ('best' in-sample, 'previous' window's parameters when
+            no configuration has an in-sample metric, 'flat' when there are none either)
+        daily_pnl: (Series) out-of-sample pnl of every session, stitched over the windows
+        searches: (list) the in-sample SweepResults of every window
+    """
+
+    def __init__(self, windows, daily_pnl, searches):
+        self.windows = windows
+        self.daily_pnl = daily_pnl
+        self.searches = searches
+
+    def returns(self, capital):
+        """
+        :param capital: (float) the capital the pnl is made on
+        :return: (Series) out-of-sample daily returns, as analytics.tears takes them
+        """
+        return self.daily_pnl/float(capital)
+
+
+class WalkForward(object):
+
+    def __init__(self, strategy_class, grid, products, start_date, end_date, in_sample, out_of_sample, step=None,
+                 metric='sharpe', processes=1, loader=None, calendar=None, **kwargs):
+        """
+        :param strategy_class: (class) Strategy taking the grid's parameters as keyword arguments, importable
+        :param grid: (dict) parameter: (list) of values, or (list) of (dict) params
+        :param products: (list) (FuturesContract)
+        :param start_date: (DateTime)
+        :param end_date: (DateTime)
+        :param in_sample: (int) sessions per in-sample window
+        :param out_of_sample: (int) sessions per out-of-sample window
+        :param step: (int) sessions between windows, defaults to out_of_sample
+        :param metric: (str) in-sample metric to maximize, one of sweep.METRIC_COLUMNS, in_sample must be long
+            enough for it (2 sessions for the sharpe)
+        :param processes: (int) worker processes of the in-sample searches
+        :param loader: (function) day loader (see DayDataCache), defaults to the process-wide DAY_DATA_CACHE
+        :param calendar: (TradingCalendar) defaults to the calendar of the products
+        :param kwargs: passed to every backtest (initial_cash, commission, start_time, end_time, bars, ...)
+        """
+        if metric not in METRIC_COLUMNS:
+            raise ValueError("Unknown metric {}, use one of {}".format(metric, METRIC_COLUMNS))
+        if in_sample < METRIC_MIN_SESSIONS.get(metric, 1):
+            raise ValueError("in_sample of {} sessions is too short for the {}, it needs {}".format(
+                in_sample, metric, METRIC_MIN_SESSIONS[metric]))
+        self.strategy_class = strategy_class
+        self.grid = grid
+        self.products = products
+        self.metric = metric
+        self.processes = processes
+        self.loader = loader
+        self.calendar = calendar if calendar is not None else TradingCalendar.for_products(products)
+        self.kwargs = dict(kwargs, calendar=self.calendar)
+        self.day_cache = DayDataCache(loader=loader) if loader is not None else DAY_DATA_CACHE
+        self.windows = walk_forward_windows(self.calendar.sessions(start_date, end_date), in_sample, out_of_sample,
+                                            step)
+
+    def run(self):
+        """
+        :return: (WalkForwardResults)
+        """
+        pool = make_pool(self.processes, self.loader) if self.processes > 1 else None
+        try:
+            rows, daily_pnl, searches = [], [], []
+            params = None
+            for window in self.windows:
+                search = self.search(window, pool)
+                searches.append(search)
+                best = search.best(self.metric)
+                row = window._asdict()
+                if best is not None:
+                    params = search.params(best)
+                    row['is_' + self.metric] = search.table.loc[best, self.metric]
+                    row['choice'] = 'best'
+                else:
+                    row['is_' + self.metric] = np.nan
+                    row['choice'] = 'previous' if params is not None else 'flat'
+                    log.warning("Walk-forward {} to {}: no configuration has an in-sample {}, {}".format(
+                        window.oos_start.strftime("%Y-%m-%d"), window.oos_end.strftime("%Y-%m-%d"), self.metric,
+                        "keeping {}".format(params) if params is not None else "staying flat"))
+
+                if params is None:
+                    row['oos_pnl'] = 0.
+                    rows.append(row)
+                    daily_pnl.extend((date, 0.) for date in self.calendar.sessions(window.oos_start, window.oos_end))
+                    continue
+                oos = SweepBacktest(self.strategy_class, [params], self.products, window.oos_start, window.oos_end,
+                                    day_cache=self.day_cache, **self.kwargs).run()[0]
+                log.info("Walk-forward {} to {}: {} (in-sample {} {:.4g}), out-of-sample pnl {:.2f}".format(
+                    window.oos_start.strftime("%Y-%m-%d"), window.oos_end.strftime("%Y-%m-%d"), params, self.metric,
+                    row['is_' + self.metric], oos['metrics']['pnl']))
+
+                row.update(params)
+                row['oos_pnl'] = oos['metrics']['pnl']
+                rows.append(row)
+                daily_pnl.extend(oos['daily_pnl'])
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        columns = list(WalkForwardWindow._fields) + sorted(searches[0].params(0)) if searches else []
+        windows = pd.DataFrame(rows, columns=columns + ['is_' + self.metric, 'oos_pnl', 'choice'])
+        index = pd.DatetimeIndex([date for date, _ in daily_pnl], name='date')
+        return WalkForwardResults(windows, pd.Series([pnl for _, pnl in daily_pnl], index=index, name='pnl',
+                                                     dtype=np.float64), searches)
+
+    def search(self, window, pool=None):
+        """
+        Sweep the grid over a window's in-sample sessions.
+        :return: (SweepResults)
+        """
+        return run_sweep(self.strategy_class, self.grid, self.products, window.is_start, window.is_end,
+                         processes=self.processes, pool=pool, day_cache=self.day_cache, **self.kwargs)
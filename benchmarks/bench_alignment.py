@@ -0,0 +1,43 @@
+"""
+Multi-symbol day alignment time: pairwise union + Series.asof + dict_to_df vs the searchsorted as-of join.
+
+    python -m benchmarks.bench_alignment --symbols 5 --updates 20000
+"""
+import time
+import shutil
+import argparse
+import tempfile
+import pandas as pd
+import backtest.data_utils.data_path as data_path
+from backtest.data_utils.alignment import align_asof, aligned_frame
+from backtest.test.reference_data import align_reference, make_days
+
+
+def align_searchsorted(data):
+    return aligned_frame(*align_asof(data))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=5)
+    parser.add_argument('--updates', type=int, default=20000, help='book updates per symbol')
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    data_path.DATA_DIR = tmp_dir
+    try:
+        data = make_days(args.symbols, args.updates)
+        print("{} symbols, {:,} parsed rows".format(len(data), sum(len(d) for d in data.values())))
+        print("{:<14} {:>10}".format('alignment', 'time (s)'))
+        results = {}
+        for name, align in [('asof', align_reference), ('searchsorted', align_searchsorted)]:
+            start = time.time()
+            results[name] = align(data)
+            print("{:<14} {:>10.3f}".format(name, time.time() - start))
+        pd.util.testing.assert_frame_equal(results['searchsorted'], results['asof'])
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Market event stream throughput (ticks/sec): DataFrame.iterrows vs the DayBlock bar cursor.
+
+    python -m benchmarks.bench_bar_cursor --rows 20000 --symbols 2
+
+Each tick builds a MarketEvent and reads bar[symbol]['level_1_price_buy'] for every symbol, as a strategy would.
+"""
+import time
+import argparse
+import datetime as dt
+import numpy as np
+import pandas as pd
+from trading.events import MarketEvent
+from backtest.bar_cursor import DayBlock, BarView, BarCursor
+
+SYMBOLS = ['GCG6', 'CLF6', 'ESZ5', 'SIH6']
+
+
+def make_day(n_symbols, rows):
+    """
+    A second-bar day with the same column layout get_data_multi produces for level 2 data.
+    """
+    rng = np.random.RandomState(0)
+    fields = ['depth_buy', 'depth_sell']
+    for i in range(1, 6):
+        for side in ['buy', 'sell']:
+            fields += ['level_{}_{}_{}'.format(i, name, side) for name in ['price', 'volume', 'orders']]
+    index = pd.date_range(dt.datetime(year=2015, month=12, day=1, hour=3), periods=rows, freq='s', name='time')
+    columns = pd.MultiIndex.from_product([SYMBOLS[:n_symbols], fields])
+    return pd.DataFrame(rng.rand(rows, len(columns)), index=index, columns=columns)
+
+
+def run_iterrows(data, symbols):
+    for timestamp, bar in data.iterrows():
+        event = MarketEvent(timestamp.to_datetime(), bar)
+        for symbol in symbols:
+            event.data[symbol]['level_1_price_buy']
+
+
+def run_cursor(data, symbols):
+    block = DayBlock.from_frame(data)
+    for position in BarCursor(block):
+        bar = BarView(block, position)
+        event = MarketEvent(block.datetimes[position], bar)
+        for symbol in symbols:
+            event.data[symbol]['level_1_price_buy']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--symbols', type=int, default=2)
+    args = parser.parse_args()
+
+    data = make_day(args.symbols, args.rows)
+    symbols = SYMBOLS[:args.symbols]
+    print("{} ticks, {} symbols, {} columns".format(len(data), args.symbols, len(data.columns)))
+    print("{:<10} {:>10} {:>14}".format('stream', 'time (s)', 'ticks/sec'))
+    for name, run in [('iterrows', run_iterrows), ('cursor', run_cursor)]:
+        start = time.time()
+        run(data, symbols)
+        seconds = time.time() - start
+        print("{:<10} {:>10.3f} {:>14,.0f}".format(name, seconds, len(data)/seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Raw CME Level 2 file to parsed frame throughput (rows/sec): per-row regex parser vs the vectorized parser.
+
+    python -m benchmarks.bench_cme_parser                     # synthetic file
+    python -m benchmarks.bench_cme_parser --fpath data/CME_Level_2/GCG6/20151201.csv
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import datetime as dt
+import pandas as pd
+from backtest.data_utils.quantgo_utils import _parse_cme_level2_data
+from backtest.test.synthetic import write_cme_level2_file
+from backtest.test.reference_data import parse_cme_level2_data_regex
+
+
+def _time_parser(parser, fpath, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        parser(fpath)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fpath', help='raw QuantGo CME_Level_2 file')
+    parser.add_argument('--updates', type=int, default=50000, help='book updates in the synthetic file')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    tmp_dir = None
+    fpath = args.fpath
+    if fpath is None:
+        tmp_dir = tempfile.mkdtemp()
+        fpath = write_cme_level2_file(os.path.join(tmp_dir, 'GCG6', '20151201.csv'), 'GCG6',
+                                      dt.datetime(year=2015, month=12, day=1), n_updates=args.updates)
+    try:
+        with open(fpath) as f:
+            rows = sum(1 for _ in f) - 1
+        pd.util.testing.assert_frame_equal(_parse_cme_level2_data(fpath), parse_cme_level2_data_regex(fpath))
+
+        print("{} raw rows".format(rows))
+        print("{:<12} {:>10} {:>14}".format('parser', 'time (s)', 'rows/sec'))
+        for name, parse in [('regex', parse_cme_level2_data_regex), ('vectorized', _parse_cme_level2_data)]:
+            seconds = _time_parser(parse, fpath, args.repeat)
+            print("{:<12} {:>10.3f} {:>14,.0f}".format(name, seconds, rows/seconds))
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
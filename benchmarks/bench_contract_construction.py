@@ -0,0 +1,32 @@
+"""
+FuturesContract construction rate: parsing contract_specs.csv and the trading times on every construction vs
+the shared instrument master.
+
+    python -m benchmarks.bench_contract_construction --contracts 20000
+"""
+import time
+import argparse
+from trading.futures_contract import FuturesContract
+from trading.test.reference_contracts import contract_attributes_reference, BASE_SYMBOLS
+
+
+def construct_master(base_symbol):
+    return FuturesContract(base_symbol, exp_year=2016, exp_month=6)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--contracts', type=int, default=20000)
+    args = parser.parse_args()
+
+    print("{:<10} {:>10} {:>16}".format('specs', 'time (s)', 'contracts/sec'))
+    for name, construct in [('csv', contract_attributes_reference), ('master', construct_master)]:
+        start = time.time()
+        for i in range(args.contracts):
+            construct(BASE_SYMBOLS[i % len(BASE_SYMBOLS)])
+        elapsed = time.time() - start
+        print("{:<10} {:>10.3f} {:>16,.0f}".format(name, elapsed, args.contracts/elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Per-day load time and peak RSS: legacy CSV caches vs the binary day cache.
+
+    python -m benchmarks.bench_day_cache                      # synthetic day
+    python -m benchmarks.bench_day_cache --symbol GCG6 --date 2015-12-01
+
+Each load runs in a fresh process so that the reported peak RSS belongs to that load only.
+"""
+import os
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import datetime as dt
+import multiprocessing
+import backtest.data_utils.data_path as data_path
+from backtest.data_utils.day_cache import get_cache_path, read_day_cache, read_csv_day, write_day_cache
+from backtest.data_utils.data_aggregation import make_second_bars
+from backtest.data_utils.quantgo_utils import _parse_cme_level2_data
+from backtest.test.synthetic import write_cme_level2_file
+
+SUBSCRIPTION = 'CME_Level_2'
+
+
+def _load(loader, fpath, repeat, results):
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    times = []
+    for _ in range(repeat):
+        start = time.time()
+        data = loader(fpath)
+        times.append(time.time() - start)
+        del data
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((min(times), rss_after, rss_after - rss_before))
+
+
+def run_load(loader, fpath, repeat):
+    results = multiprocessing.Queue()
+    p = multiprocessing.Process(target=_load, args=(loader, fpath, repeat, results))
+    p.start()
+    result = results.get()
+    p.join()
+    return result
+
+
+def _read_mmap(fpath):
+    return read_day_cache(fpath, mmap=True)
+
+
+def _read_no_mmap(fpath):
+    return read_day_cache(fpath, mmap=False)
+
+
+def prepare_synthetic(n_updates):
+    symbol = 'GCG6'
+    date = dt.datetime(year=2015, month=12, day=1)
+    raw_fpath = data_path.get_file_path(symbol, date, SUBSCRIPTION)
+    write_cme_level2_file(raw_fpath, symbol, date, n_updates=n_updates)
+    parsed = _parse_cme_level2_data(raw_fpath)
+    parsed.to_csv(data_path.get_file_path(symbol, date, SUBSCRIPTION, extension='_parsed'))
+    write_day_cache(parsed, get_cache_path(symbol, date, SUBSCRIPTION, extension='_parsed'))
+    second_bars = make_second_bars(parsed, SUBSCRIPTION, save=True, load_if_exists=False)
+    second_bars.to_csv(data_path.get_file_path(symbol, date, SUBSCRIPTION, extension='_second_bars'))
+    return symbol, date
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbol')
+    parser.add_argument('--date', help='YYYY-MM-DD')
+    parser.add_argument('--updates', type=int, default=100000, help='book updates in the synthetic day')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    tmp_dir = None
+    if args.symbol is None:
+        tmp_dir = tempfile.mkdtemp()
+        data_path.DATA_DIR = tmp_dir
+        symbol, date = prepare_synthetic(args.updates)
+    else:
+        symbol, date = args.symbol, dt.datetime.strptime(args.date, "%Y-%m-%d")
+
+    try:
+        print("{:<14} {:<8} {:>10} {:>14} {:>16}".format('file', 'format', 'load (s)', 'peak RSS (MB)',
+                                                        'load RSS (MB)'))
+        for extension in ['_parsed', '_second_bars']:
+            csv_fpath = data_path.get_file_path(symbol, date, SUBSCRIPTION, extension=extension)
+            cache_fpath = get_cache_path(symbol, date, SUBSCRIPTION, extension=extension)
+            for name, loader, fpath in [('csv', read_csv_day, csv_fpath),
+                                        ('col', _read_no_mmap, cache_fpath),
+                                        ('col-mmap', _read_mmap, cache_fpath)]:
+                if not os.path.exists(fpath):
+                    continue
+                seconds, peak_rss, load_rss = run_load(loader, fpath, args.repeat)
+                print("{:<14} {:<8} {:>10.4f} {:>14.1f} {:>16.1f}".format(extension, name, seconds, peak_rss/1024.,
+                                                                         load_rss/1024.))
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Scaling of day-parallel backtests over worker processes: a sequential run vs run_days on 1..N processes.
+
+    python -m benchmarks.bench_day_parallel --days 8 --rows 5000 --max-processes 4
+
+Runs IntradayMeanReversion, which is flat at the end of every day, and checks every parallel run stitches back to
+exactly the sequential results.
+"""
+import time
+import logging
+import argparse
+import datetime as dt
+from backtest.day_parallel import run_days, run_sequential
+from backtest.test.fixtures import SlowLoader, make_products, START
+from backtest.test.reference_strategies import IntradayMeanReversion, assert_same
+from trading.trading_calendar import TradingCalendar
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=8)
+    parser.add_argument('--rows', type=int, default=5000, help='bars per day')
+    parser.add_argument('--max-processes', type=int, default=4)
+    parser.add_argument('--load-ms', type=float, default=200.)
+    args = parser.parse_args()
+    logging.getLogger('trading.strategy').setLevel(logging.WARNING)
+    logging.getLogger('Backtest').setLevel(logging.WARNING)
+
+    end_date = TradingCalendar().sessions(START, START + dt.timedelta(days=2*args.days))[args.days - 1]
+    products = make_products()
+    loader = SlowLoader(args.rows, args.load_ms/1000.)
+
+    start = time.time()
+    expected = run_sequential(IntradayMeanReversion, products, START, end_date, loader=loader)
+    sequential = time.time() - start
+    print("{} days of {} bars, {} fills".format(args.days, args.rows, len(expected.transactions)))
+    print("{:<14} {:>10} {:>10}".format('processes', 'time (s)', 'speedup'))
+    print("{:<14} {:>10.3f} {:>10.2f}".format('sequential', sequential, 1.))
+    for processes in sorted(set([1, 2, 4, 8, args.max_processes]) & set(range(1, args.max_processes + 1))):
+        start = time.time()
+        results = run_days(IntradayMeanReversion, products, START, end_date, processes=processes, loader=loader)
+        elapsed = time.time() - start
+        assert_same(results, expected)
+        print("{:<14} {:>10.3f} {:>10.2f}".format(processes, elapsed, sequential/elapsed))
+
+
+if __name__ == '__main__':
+    main()
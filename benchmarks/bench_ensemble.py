@@ -0,0 +1,73 @@
+"""
+Monte-Carlo execution ensembles: time of K seeded members run as separate backtests vs run_ensemble on 1..N
+processes, and the spread of their results.
+
+    python -m benchmarks.bench_ensemble --members 16 --days 4 --rows 2000 --max-processes 4
+
+Runs Quoter, a limit order strategy, with random limit fills and latency jitter. The separate runs are seeded
+from the ensemble's manifest, so every run must match its member exactly.
+"""
+import time
+import random
+import logging
+import argparse
+import datetime as dt
+from backtest.ensemble import run_ensemble, seed_manifest
+from backtest.sweep import SweepBacktest
+from backtest.data_utils.day_data_cache import DayDataCache
+from backtest.test.fixtures import SlowLoader, make_products, START
+from backtest.test.reference_strategies import Quoter, QUOTER_EXECUTION
+from trading.trading_calendar import TradingCalendar
+
+def run_separately(manifest, products, start_date, end_date, loader):
+    """
+    A backtest per member, each loading its own days, seeded as the ensemble member.
+    :return: (list) of SweepMember.result()
+    """
+    results = []
+    for member, seeds in manifest.iterrows():
+        member_kwargs = {member: {'fill_rng': random.Random(int(seeds['fill_seed'])),
+                                  'latency_rng': random.Random(int(seeds['latency_seed']))}}
+        results.extend(SweepBacktest(Quoter, [(member, {})], products, start_date, end_date,
+                                     day_cache=DayDataCache(loader=loader), member_kwargs=member_kwargs,
+                                     **QUOTER_EXECUTION).run())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--members', type=int, default=16)
+    parser.add_argument('--days', type=int, default=4)
+    parser.add_argument('--rows', type=int, default=2000, help='bars per day')
+    parser.add_argument('--max-processes', type=int, default=4)
+    parser.add_argument('--load-ms', type=float, default=200.)
+    args = parser.parse_args()
+    logging.getLogger('trading.strategy').setLevel(logging.WARNING)
+    logging.getLogger('Backtest').setLevel(logging.WARNING)
+
+    end_date = TradingCalendar().sessions(START, START + dt.timedelta(days=2*args.days))[args.days - 1]
+    products = make_products()
+    loader = SlowLoader(args.rows, args.load_ms/1000.)
+    manifest = seed_manifest(args.members)
+
+    start = time.time()
+    expected = dict((result['config_id'], result['daily_pnl'])
+                    for result in run_separately(manifest, products, START, end_date, loader))
+    separate = time.time() - start
+    print("{} members, {} days of {} bars".format(args.members, args.days, args.rows))
+    print("{:<14} {:>10} {:>10}".format('processes', 'time (s)', 'speedup'))
+    print("{:<14} {:>10.3f} {:>10.2f}".format('separate', separate, 1.))
+    for processes in sorted(set([1, 2, 4, 8, args.max_processes]) & set(range(1, args.max_processes + 1))):
+        start = time.time()
+        results = run_ensemble(Quoter, products, START, end_date, members=manifest, processes=processes,
+                               loader=loader, **QUOTER_EXECUTION)
+        elapsed = time.time() - start
+        for member in manifest.index:
+            assert list(results.daily_pnl[member].values) == [pnl for _, pnl in expected[member]]
+        print("{:<14} {:>10.3f} {:>10.2f}".format(processes, elapsed, separate/elapsed))
+
+    print("\n{}".format(results.summary()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+Event dispatch throughput (events/sec) of the backtest loop: Queue.Queue drained with get(False) until Empty vs
+the event buses.
+
+    python -m benchmarks.bench_event_bus --ticks 200000 --order-every 10
+
+Every tick puts a market event and drains the bus; every order_every-th market event the strategy puts an order,
+which the execution answers with a fill, as in Backtest.event_handler.
+"""
+import time
+import argparse
+from trading.event_bus import BacktestEventBus, LiveEventBus
+from trading.test.reference_events import run_queue, run_bus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ticks', type=int, default=200000)
+    parser.add_argument('--order-every', type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [('Queue', lambda: run_queue(args.ticks, args.order_every)),
+            ('LiveEventBus', lambda: run_bus(LiveEventBus(), args.ticks, args.order_every)),
+            ('BacktestEventBus', lambda: run_bus(BacktestEventBus(), args.ticks, args.order_every))]
+    print("{:<18} {:>10} {:>14}".format('bus', 'time (s)', 'events/sec'))
+    expected = None
+    for name, run in runs:
+        start = time.time()
+        counts = run()
+        elapsed = time.time() - start
+        assert expected is None or counts == expected
+        expected = counts
+        print("{:<18} {:>10.3f} {:>14,.0f}".format(name, elapsed, sum(counts.values())/elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Event creation + dispatch throughput (events/sec) and size: dict-backed events dispatched on their type string vs
+__slots__ events dispatched on their integer code.
+
+    python -m benchmarks.bench_events --ticks 300000 --order-every 10
+
+Every tick creates a market event and dispatches it; every order_every-th tick the strategy creates an order
+without a time (as Strategy.order may) and the execution answers with a fill.
+"""
+import sys
+import time
+import argparse
+import datetime as dt
+from trading.events import MarketEvent, FillEvent
+from trading.test.reference_events import LegacyMarketEvent, LegacyFillEvent, run_legacy, run_slots
+
+
+def event_bytes(event):
+    return sys.getsizeof(event) + (sys.getsizeof(event.__dict__) if hasattr(event, '__dict__') else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ticks', type=int, default=300000)
+    parser.add_argument('--order-every', type=int, default=10)
+    args = parser.parse_args()
+
+    start = dt.datetime(2015, 12, 1)
+    sizes = {'dict': (event_bytes(LegacyMarketEvent(start, None)),
+                      event_bytes(LegacyFillEvent(start, 'GCG6', 1, 1060., 1060., 'CME'))),
+             'slots': (event_bytes(MarketEvent(start, None)),
+                       event_bytes(FillEvent(start, 'GCG6', 1, 1060., 1060., 'CME')))}
+
+    print("{:<8} {:>10} {:>14} {:>14} {:>12}".format('events', 'time (s)', 'events/sec', 'market bytes',
+                                                     'fill bytes'))
+    expected = None
+    for name, run in [('dict', run_legacy), ('slots', run_slots)]:
+        begin = time.time()
+        counts = run(args.ticks, args.order_every)
+        elapsed = time.time() - begin
+        assert expected is None or counts == expected
+        expected = counts
+        print("{:<8} {:>10.3f} {:>14,.0f} {:>14} {:>12}".format(name, elapsed, sum(counts)/elapsed, *sizes[name]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+Order fill time (orders/sec) of BacktestExecution: the fill time and prices looked up with Series.asof on the day
+frame vs one searchsorted per order on the day's int64 time array, reused by every price lookup.
+
+    python -m benchmarks.bench_fill_lookup --orders 20000 --rows 50000
+
+Market orders at random times of the day (half buys, half sells); both must send the same fills.
+"""
+import argparse
+from backtest.execution import BacktestExecution
+from backtest.data_utils.day_data_cache import DayDataCache
+from backtest.test.fixtures import load_quotes, make_orders, START
+from backtest.test.reference_executions import AsofExecution, make_execution, run_orders, fill_tuples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--rows', type=int, default=50000, help='rows of the day')
+    args = parser.parse_args()
+
+    cache = DayDataCache(loader=lambda symbols, date, **kwargs: load_quotes(symbols, date, rows=args.rows))
+    execution = make_execution(BacktestExecution, cache)
+    data = cache.get([product.symbol for product in execution.products], START)
+    orders = make_orders(execution.products, data, args.orders)
+
+    print("{:<10} {:>10} {:>14}".format('lookup', 'time (s)', 'orders/sec'))
+    results = []
+    for name, execution_class in [('asof', AsofExecution), ('arrays', BacktestExecution)]:
+        fills, elapsed = run_orders(make_execution(execution_class, cache), orders)
+        results.append(fill_tuples(fills))
+        print("{:<10} {:>10.3f} {:>14,.0f}".format(name, elapsed, len(orders)/elapsed))
+    assert results[0] == results[1]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Market order fills at the best bid/offer vs walking the book: fill time (orders/sec) and the average cost of the
+walk over the top of book (ticks per contract), by order size.
+
+    python -m benchmarks.bench_market_impact --orders 20000 --rows 50000 --sizes 1 10 50 100
+
+The walk is a few array operations on the book levels at the fill row, so its cost per order does not grow with
+the order size (only with the number of levels).
+"""
+import argparse
+import numpy as np
+from backtest.data_utils.day_data_cache import DayDataCache
+from backtest.execution import BacktestExecution
+from backtest.test.fixtures import load_depth, make_orders, SYMBOLS, START, TICK
+from backtest.test.reference_executions import make_execution, run_orders
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--rows', type=int, default=50000, help='rows of the day')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 50, 100])
+    args = parser.parse_args()
+
+    cache = DayDataCache(loader=lambda symbols, date, **kwargs: load_depth(symbols, date, rows=args.rows))
+    execution = make_execution(BacktestExecution, cache, market_impact=True)
+    data = cache.get(SYMBOLS, START)
+    orders = make_orders(execution.products, data, args.orders)
+
+    run_orders(make_execution(BacktestExecution, cache, market_impact=True), orders[:100])
+    print("{:>6} {:>13} {:>13} {:>14} {:>14}".format('size', 'top orders/s', 'walk orders/s', 'fills/order',
+                                                      'ticks/contract'))
+    for size in args.sizes:
+        for order in orders:
+            order.quantity = size if order.quantity > 0 else -size
+        top, top_time = run_orders(make_execution(BacktestExecution, cache), orders)
+        walk, walk_time = run_orders(make_execution(BacktestExecution, cache, market_impact=True), orders)
+        partial, _ = run_orders(make_execution(BacktestExecution, cache, market_impact=True, partial_fills=True),
+                                orders)
+        valid = [(t, w) for t, w in zip(top, walk) if not np.isnan(t.fill_price)]
+        cost = np.mean([(w.fill_price - t.fill_price)*np.sign(t.quantity) for t, w in valid])/TICK
+        print("{:>6} {:>13,.0f} {:>13,.0f} {:>14.2f} {:>14.2f}".format(
+            size, len(orders)/top_time, len(orders)/walk_time, len(partial)/float(len(orders)), cost))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Concise book building time: per-row make_lists apply vs the vectorized OrderBook.
+
+    python -m benchmarks.bench_order_book --updates 20000
+"""
+import time
+import shutil
+import argparse
+import tempfile
+import datetime as dt
+import backtest.data_utils.data_path as data_path
+from backtest.data_utils.order_book import OrderBook
+from backtest.data_utils.data_aggregation import make_concise
+from backtest.data_utils.quantgo_utils import _parse_cme_level2_data
+from backtest.test.synthetic import write_cme_level2_file
+from backtest.test.reference_data import make_concise_apply
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--updates', type=int, default=20000, help='book updates in the synthetic day')
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    data_path.DATA_DIR = tmp_dir
+    try:
+        date = dt.datetime(year=2015, month=12, day=1)
+        fpath = write_cme_level2_file(data_path.get_file_path('GCG6', date, 'CME_Level_2'), 'GCG6', date,
+                                      n_updates=args.updates)
+        data = _parse_cme_level2_data(fpath)
+        numeric = data[[name for name in data.columns if data[name].dtype.kind in 'biuf'] + ['symbol']]
+
+        print("{:,} parsed rows".format(len(data)))
+        print("{:<22} {:>10} {:>14}".format('builder', 'time (s)', 'rows/sec'))
+        for name, build in [('make_lists apply', make_concise_apply), ('make_concise', make_concise),
+                            ('OrderBook.from_frame', OrderBook.from_frame)]:
+            start = time.time()
+            build(numeric)
+            seconds = time.time() - start
+            print("{:<22} {:>10.3f} {:>14,.0f}".format(name, seconds, len(data)/seconds))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
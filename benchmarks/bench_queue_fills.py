@@ -0,0 +1,47 @@
+"""
+Queue position limit fills (ticks/sec) with a ladder of limit orders: the volume ahead of every resting order
+tracked row by row vs the fill row of each order found once, from the cumulative volume removed from its level over
+the day (QueuePositions).
+
+    python -m benchmarks.bench_queue_fills --ticks 2000 --ladder 20 100 --seeds 5
+
+Both must send the same fills. The fills of the random limit fill model change with the seed, the queue ones don't.
+"""
+import argparse
+from backtest.execution import BacktestExecution
+from backtest.data_utils.day_data_cache import DayDataCache
+from backtest.test.fixtures import load_depth, make_flow, SYMBOLS, START
+from backtest.test.reference_executions import RowQueueExecution, make_execution, run_flow
+from benchmarks.bench_resting_orders import run_ladder
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ticks', type=int, default=2000)
+    parser.add_argument('--ladder', type=int, nargs='+', default=[20, 100])
+    parser.add_argument('--seeds', type=int, default=5)
+    args = parser.parse_args()
+
+    cache = DayDataCache(loader=lambda symbols, date, **kwargs: load_depth(symbols, date, rows=args.ticks))
+    data = cache.get(SYMBOLS, START)
+
+    print("{:>8} {:>14} {:>15} {:>10}".format('ladder', 'rows ticks/s', 'queue ticks/s', 'speedup'))
+    for ladder in args.ladder:
+        rows = run_ladder(make_execution(RowQueueExecution, cache, queue_fills=True), data, args.ticks, ladder)
+        queue = run_ladder(make_execution(BacktestExecution, cache, queue_fills=True), data, args.ticks, ladder)
+        print("{:>8} {:>14,.0f} {:>15,.0f} {:>10.1f}".format(ladder, args.ticks/rows, args.ticks/queue, rows/queue))
+
+    flow = make_flow(0, args.ticks)
+    counts = {'random': [], 'queue': []}
+    for seed in range(args.seeds):
+        counts['random'].append(len(run_flow(make_execution(BacktestExecution, cache, .1), flow, data, seed)))
+        fills = run_flow(make_execution(BacktestExecution, cache, queue_fills=True), flow, data, seed)
+        assert fills == run_flow(make_execution(RowQueueExecution, cache, queue_fills=True), flow, data, seed)
+        counts['queue'].append(len(fills))
+    print("\nfills of the same order flow over {} seeds".format(args.seeds))
+    for model in ('random', 'queue'):
+        print("{:>8} {:>6} to {:<6}".format(model, min(counts[model]), max(counts[model])))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Resting order processing (ticks/sec) with a ladder of limit orders: the list scan of every resting order on every
+tick vs the RestingOrderBook, which only pops the orders crossing the spread.
+
+    python -m benchmarks.bench_resting_orders --ticks 1000 --ladder 20 100
+
+Every tick re-quotes the ladder orders that filled, so the ladder stays full. Both must send the same fills.
+"""
+import time
+import argparse
+from backtest.execution import BacktestExecution
+from backtest.data_utils.day_data_cache import DayDataCache
+from backtest.test.fixtures import load_quotes, make_flow, SYMBOLS, START
+from backtest.test.reference_executions import ScanExecution, make_execution, run_flow
+from trading.events import MarketEvent, OrderEvent
+
+def run_ladder(execution, data, ticks, ladder):
+    """
+    Keeps ladder limit orders resting, one tick apart below the bid and above the ask, re-quoting the filled ones.
+    :return: (float) seconds spent processing resting orders
+    """
+    product = execution.products[0]
+    symbol = product.symbol
+    bids = data[(symbol, 'level_1_price_buy')].fillna(method='bfill').values
+    asks = data[(symbol, 'level_1_price_sell')].fillna(method='bfill').values
+    elapsed = 0.
+    resting = 0
+    for i, time_ in enumerate(data.index[:ticks]):
+        order_time = time_.to_pydatetime()
+        start = time.time()
+        execution.process_resting_orders(MarketEvent(order_time, None))
+        elapsed += time.time() - start
+        resting -= len(execution.events)
+        while execution.events.get() is not None:
+            pass
+        for k in range(resting, ladder):
+            side = 1 if k % 2 else -1
+            price = bids[i] - .1*(k//2) if side == 1 else asks[i] + .1*(k//2)
+            execution.process_new_order(OrderEvent(product, side, 'LIMIT', round(price, 1), order_time))
+        resting = ladder
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ticks', type=int, default=1000)
+    parser.add_argument('--ladder', type=int, nargs='+', default=[20, 100])
+    args = parser.parse_args()
+
+    cache = DayDataCache(loader=lambda symbols, date, **kwargs: load_quotes(symbols, date, rows=args.ticks))
+    data = cache.get(SYMBOLS, START)
+
+    print("{:>8} {:>14} {:>14} {:>10}".format('ladder', 'scan ticks/s', 'book ticks/s', 'speedup'))
+    for ladder in args.ladder:
+        scan = run_ladder(make_execution(ScanExecution, cache), data, args.ticks, ladder)
+        book = run_ladder(make_execution(BacktestExecution, cache), data, args.ticks, ladder)
+        print("{:>8} {:>14,.0f} {:>14,.0f} {:>10.1f}".format(ladder, args.ticks/scan, args.ticks/book, scan/book))
+
+    flow = make_flow(0, args.ticks)
+    assert run_flow(make_execution(ScanExecution, cache), flow, data) == \
+        run_flow(make_execution(BacktestExecution, cache), flow, data)
+
+
+if __name__ == '__main__':
+    main()
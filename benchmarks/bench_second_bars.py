@@ -0,0 +1,55 @@
+"""
+Second bar building time: groupby-lambda + reindex(ffill) vs the vectorized bar engine.
+
+    python -m benchmarks.bench_second_bars --days 3 --updates 50000
+"""
+import time
+import shutil
+import argparse
+import tempfile
+import datetime as dt
+import pandas as pd
+import backtest.data_utils.data_path as data_path
+from backtest.data_utils.data_aggregation import make_second_bars
+from backtest.data_utils.quantgo_utils import _parse_cme_level2_data
+from backtest.test.synthetic import write_cme_level2_file
+from backtest.test.reference_data import make_second_bars_groupby
+
+
+def make_second_bars_vectorized(data):
+    return make_second_bars(data, load_if_exists=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=3)
+    parser.add_argument('--updates', type=int, default=50000, help='book updates per synthetic day')
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    data_path.DATA_DIR = tmp_dir
+    try:
+        days = []
+        for i in range(args.days):
+            date = dt.datetime(year=2015, month=12, day=1 + i)
+            fpath = write_cme_level2_file(data_path.get_file_path('GCG6', date, 'CME_Level_2'), 'GCG6', date,
+                                          n_updates=args.updates, seed=i)
+            days.append(_parse_cme_level2_data(fpath))
+
+        print("{} days, {:,} parsed rows".format(len(days), sum(len(d) for d in days)))
+        print("{:<12} {:>10} {:>14}".format('builder', 'time (s)', 'sec/day'))
+        results = {}
+        for name, build in [('groupby', make_second_bars_groupby), ('vectorized', make_second_bars_vectorized)]:
+            start = time.time()
+            results[name] = [build(day) for day in days]
+            seconds = time.time() - start
+            print("{:<12} {:>10.3f} {:>14.4f}".format(name, seconds, seconds/len(days)))
+
+        for expected, actual in zip(results['groupby'], results['vectorized']):
+            pd.util.testing.assert_frame_equal(actual, expected)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+Backtest time of a signal strategy: the event-driven Backtest vs the vectorized SignalBacktest.
+
+    python -m benchmarks.bench_signal_backtest --days 5 --rows 20000
+
+Both run the same Momentum strategy on the same cached days (top of book on an irregular millisecond grid) and
+must produce the same transactions, positions and pnl.
+"""
+import time
+import logging
+import argparse
+import datetime as dt
+import pandas.util.testing as pdt
+from backtest.data_utils.day_data_cache import DayDataCache
+from backtest.test.fixtures import load_quotes, make_products, START
+from backtest.test.reference_strategies import Momentum, run_events, run_vectorized
+from trading.trading_calendar import TradingCalendar
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--rows', type=int, default=20000, help='bars per day')
+    args = parser.parse_args()
+    logging.getLogger('trading.strategy').setLevel(logging.WARNING)
+
+    end_date = TradingCalendar().sessions(START, START + dt.timedelta(days=2*args.days))[args.days - 1]
+    cache = DayDataCache(loader=lambda symbols, date, **kwargs: load_quotes(symbols, date, rows=args.rows))
+    for date in TradingCalendar().sessions(START, end_date):
+        cache.get(['GCG6'], date, start_time=dt.time(3), end_time=dt.time(20))
+
+    print("{:<12} {:>10} {:>14} {:>8}".format('engine', 'time (s)', 'bars/sec', 'fills'))
+    results = {}
+    for name, run in [('events', run_events), ('vectorized', run_vectorized)]:
+        start = time.time()
+        results[name] = run(Momentum, make_products(), START, end_date, cache)
+        elapsed = time.time() - start
+        print("{:<12} {:>10.3f} {:>14,.0f} {:>8}".format(name, elapsed, len(results[name].pnl)/elapsed,
+                                                        len(results[name].transactions)))
+    pdt.assert_frame_equal(results['vectorized'].transactions, results['events'].transactions)
+    pdt.assert_series_equal(results['vectorized'].pnl, results['events'].pnl)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Parameter sweep time: one Backtest per configuration (each loading and iterating the data) vs one SweepBacktest
+pass for all of them, in one process and sharded over a process pool.
+
+    python -m benchmarks.bench_sweep --days 3 --rows 5000 --processes 4
+
+The configurations are a grid of MeanReversion windows and thresholds. Every day load sleeps --load-ms to stand in
+for reading the day from disk.
+"""
+import time
+import logging
+import argparse
+import datetime as dt
+from backtest.sweep import parameter_grid, SweepBacktest, run_sweep
+from backtest.data_utils.day_data_cache import DayDataCache
+from backtest.test.fixtures import SlowLoader, make_products, START
+from backtest.test.reference_strategies import MeanReversion, run_events
+from trading.trading_calendar import TradingCalendar
+
+GRID = {'window': [10, 20, 50, 100], 'threshold': [.05, .1, .2]}
+
+
+def run_separately(configs, products, start_date, end_date, loader):
+    """
+    The legacy sweep: a Backtest per configuration, each with its own data pass.
+    """
+    return [run_events(MeanReversion, products, start_date, end_date, DayDataCache(loader=loader), **params)
+            for params in configs]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=3)
+    parser.add_argument('--rows', type=int, default=5000, help='bars per day')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--load-ms', type=float, default=200.)
+    args = parser.parse_args()
+    logging.getLogger('trading.strategy').setLevel(logging.WARNING)
+    logging.getLogger('Backtest').setLevel(logging.WARNING)
+
+    end_date = TradingCalendar().sessions(START, START + dt.timedelta(days=2*args.days))[args.days - 1]
+    products = make_products()
+    loader = SlowLoader(args.rows, args.load_ms/1000.)
+    configs = parameter_grid(GRID)
+
+    print("{} configurations, {} days of {} bars".format(len(configs), args.days, args.rows))
+    print("{:<24} {:>10} {:>14}".format('runner', 'time (s)', 'configs/sec'))
+    runs = [('separate backtests', lambda: run_separately(configs, products, START, end_date, loader)),
+            ('sweep', lambda: SweepBacktest(MeanReversion, configs, products, START, end_date,
+                                            day_cache=DayDataCache(loader=loader)).run()),
+            ('sweep, {} processes'.format(args.processes),
+             lambda: run_sweep(MeanReversion, GRID, products, START, end_date, processes=args.processes,
+                               loader=loader))]
+    for name, run in runs:
+        start = time.time()
+        run()
+        elapsed = time.time() - start
+        print("{:<24} {:>10.3f} {:>14.2f}".format(name, elapsed, len(configs)/elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,9 @@
-from queue import Empty
+from trading.event_bus import make_event_bus
+from trading.events import MARKET, ORDER, FILL
 
 class IBTrade(object):
     def __init__(self, events, strategy, data, execution, **kwargs):
-        self.events = events
+        self.events = make_event_bus(events)
         self.strategy = strategy
         self.data = data
         self.execution = execution
@@ -13,11 +14,10 @@ class IBTrade(object):
         self.event_handler()
 
     def event_handler(self):
-        event_handlers = {
-            'MARKET': self._handle_market_event,
-            'ORDER': self._handle_order_event,
-            'FILL': self._handle_fill_event,
-        }
+        event_handlers = [None]*3
+        event_handlers[MARKET] = self._handle_market_event
+        event_handlers[ORDER] = self._handle_order_event
+        event_handlers[FILL] = self._handle_fill_event
 
         while True:
             if self.running:
@@ -25,14 +25,10 @@ class IBTrade(object):
             else:
                 self.strategy.finished()
                 return
-            while True:
-                try:
-                    event = self.events.get(False)
-                except Empty:
-                    break
-                else:
-                    if event is not None:
-                        event_handlers[event.type](event)
+            event = self.events.get()
+            while event is not None:
+                event_handlers[event.code](event)
+                event = self.events.get()
 
     def _handle_market_event(self, market_event):
         self.strategy.new_tick_update(market_event)
@@ -1,9 +1,10 @@
-import datetime as dt
+import logging
 import utils.yahoo_finance as yf
 from trading.events import MarketEvent
 from trading.data import BacktestDataHandler
 from bokeh.client import push_session
 from bokeh.plotting import figure, curdoc, vplot
+log = logging.getLogger('Backtest')
 
 class StockBacktestDataHandler(BacktestDataHandler):
     def __init__(self, events, products, start_date, end_date, **kwargs):
@@ -21,6 +22,8 @@ class StockBacktestDataHandler(BacktestDataHandler):
         self.all_symbol_data = yf.get_stock_data_multiple(self.symbols, start_date=start_date, end_date=end_date)
         self.continue_backtest = True
 
+        self.sessions = self._find_sessions(start_date, end_date)
+        self.session_position = 0
         self.curr_dt = start_date
         self.last_bar = {product.symbol: {} for product in self.products}
 
@@ -41,16 +44,29 @@ class StockBacktestDataHandler(BacktestDataHandler):
         self.ds.trigger('data', self.ds.data, self.ds.data)
 
 
+    def _find_sessions(self, start_date, end_date):
+        """
+        The days every symbol has data for. Days only some symbols have data for are reported and skipped.
+        """
+        days = set()
+        sessions = None
+        for symbol in self.symbols:
+            index = self.all_symbol_data[symbol].index
+            symbol_days = set(index[(index >= start_date) & (index <= end_date)])
+            days |= symbol_days
+            sessions = symbol_days if sessions is None else sessions & symbol_days
+        sessions = sorted(sessions or [])
+        for day in sorted(days.difference(sessions)):
+            log.warning("Skipping {}: data missing for some of {}".format(day.strftime("%Y-%m-%d"), self.symbols))
+        return sessions
+
     def update(self):
-        if self.curr_dt > self.end_date:
+        if self.session_position >= len(self.sessions):
             self.continue_backtest = False
             return
-        try:
-            self._push_next_data()
-            self.curr_dt += dt.timedelta(days=1)
-        except KeyError:
-            self.curr_dt += dt.timedelta(days=1)
-            self.update()
+        self.curr_dt = self.sessions[self.session_position]
+        self.session_position += 1
+        self._push_next_data()
 
     def _push_next_data(self):
         """
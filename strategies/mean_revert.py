@@ -6,10 +6,9 @@ import json
 import pandas as pd
 import numpy as np
 import datetime as dt
-from Queue import Queue
+from trading.event_bus import BacktestEventBus
 from backtest.backtest import Backtest
-from backtest.data import BacktestData
-from backtest.execution import BacktestExecution
+from backtest.execution import make_handlers
 from trading.strategy import Strategy
 from trading.futures_contract import FuturesContract
 from plotting.plot import plot_backtest, FIGS_DIR
@@ -495,12 +494,9 @@ def run_backtest():
     #     symbols[0]: 1.45
     # }
 
-    events = Queue()
+    events = BacktestEventBus()
     products = [FuturesContract(symbol, continuous=True)]
-    data = BacktestData(events, products, start_date, end_date, start_time=start_time, end_time=closing_time)
-    products = [FuturesContract('GC', continuous=True)]
-    data = BacktestData(events, products, start_date, end_date, start_time=start_time, end_time=closing_time)
-    execution = BacktestExecution(events, products)
+    data, execution = make_handlers(events, products, start_date, end_date, start_time, closing_time)
     strategy = MeanrevertStrategy(data, events, products,
                                   initial_cash=100000,
                                   # contract_multiplier=contract_multiplier,
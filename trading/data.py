@@ -1,4 +1,5 @@
 from abc import ABCMeta, abstractmethod
+from trading.event_bus import make_event_bus
 
 
 class DataHandler(object):
@@ -17,7 +18,7 @@ class DataHandler(object):
     __metaclass__ = ABCMeta
 
     def __init__(self, events, **kwargs):
-        self.events = events
+        self.events = make_event_bus(events)
 
     @abstractmethod
     def update(self):
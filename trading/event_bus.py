@@ -0,0 +1,99 @@
+"""
+Event buses carrying events between the data handler, strategy and execution handler.
+
+Producers put() events, the trading loop takes them with get(), which returns None once the bus is empty rather
+than raising, so draining the bus costs no exception per tick:
+
+    event = events.get()
+    while event is not None:
+        handlers[event.code](event)
+        event = events.get()
+
+BacktestEventBus is a plain deque for the single-threaded backtest loop, LiveEventBus a Queue.Queue for live
+trading where broker and market data threads put events.
+"""
+from abc import ABCMeta, abstractmethod
+from collections import deque
+from Queue import Queue, Empty
+
+
+class EventBus(object):
+
+    __metaclass__ = ABCMeta
+
+    @abstractmethod
+    def put(self, event):
+        raise NotImplementedError("EventBus.put()")
+
+    @abstractmethod
+    def get(self):
+        """
+        :return: (Event) the oldest event, None if there are none
+        """
+        raise NotImplementedError("EventBus.get()")
+
+    @abstractmethod
+    def __len__(self):
+        raise NotImplementedError("EventBus.__len__()")
+
+    def empty(self):
+        return len(self) == 0
+
+
+class BacktestEventBus(EventBus):
+    """
+    FIFO of events for a single thread, no locking.
+    """
+
+    def __init__(self):
+        self._events = deque()
+
+    def put(self, event):
+        self._events.append(event)
+
+    def get(self):
+        return self._events.popleft() if self._events else None
+
+    def __len__(self):
+        return len(self._events)
+
+
+class LiveEventBus(EventBus):
+    """
+    Thread-safe FIFO of events, backed by a Queue.Queue.
+    """
+
+    def __init__(self, queue=None):
+        """
+        :param queue: (Queue) to share with code putting on it directly, a new one by default
+        """
+        self.queue = queue if queue is not None else Queue()
+
+    def put(self, event):
+        self.queue.put(event)
+
+    def get(self, timeout=None):
+        """
+        :param timeout: (float) seconds to wait for an event, by default None is returned straight away
+        """
+        try:
+            if timeout is None:
+                return self.queue.get(False)
+            return self.queue.get(True, timeout)
+        except Empty:
+            return None
+
+    def __len__(self):
+        return self.queue.qsize()
+
+
+def make_event_bus(events=None):
+    """
+    :param events: (EventBus) returned as is, (Queue) wrapped in a LiveEventBus, None for a new BacktestEventBus
+    :return: (EventBus)
+    """
+    if events is None:
+        return BacktestEventBus()
+    if isinstance(events, EventBus):
+        return events
+    return LiveEventBus(events)
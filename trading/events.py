@@ -1,6 +1,15 @@
-import datetime as dt
-from abc import ABCMeta, abstractmethod
-from collections import OrderedDict
+import itertools
+from abc import ABCMeta
+
+# Integer event type codes, the index of the event's handler in the trading loop's handler list
+MARKET = 0
+ORDER = 1
+FILL = 2
+NEW_DAY = 3
+EVENT_TYPES = ('MARKET', 'ORDER', 'FILL', 'NEW_DAY')
+
+_order_ids = itertools.count(1)
+
 
 class Event(object):
     """
@@ -9,16 +18,27 @@ class Event(object):
         NEW_DAY
         ORDER
         FILL
+
+    code is the integer type code to dispatch on, type the type name. Both are class attributes and events use
+    __slots__, so creating an event allocates only its fields.
     """
     __metaclass__ = ABCMeta
+    __slots__ = ()
+    code = None
+    type = None
 
 
 class MarketEvent(Event):
     """
     Handles the event of receiving a new market update.
+    :param dt: (DateTime)
+    :param data: the bar, indexable as data[symbol][column] (a BarView position into the day in backtests)
     """
+    __slots__ = ('dt', 'data')
+    code = MARKET
+    type = 'MARKET'
+
     def __init__(self, dt, data):
-        self.type = 'MARKET'
         self.dt = dt
         self.data = data
 
@@ -41,14 +61,20 @@ class MarketEvent(Event):
 class OrderEvent(Event):
     """
     Handles the event of sending an Order to an execution system.
-    :param order_time: (DateTime) order time
-    :param symbol: (str)
-    :param order_type: (str) 'MARKET', 'LIMIT'
+    :param product: (FuturesContract)
     :param quantity: (int)
+    :param order_type: (str) 'MARKET', 'LIMIT'
     :param price: (float)
+    :param order_time: (DateTime) order time, the strategy's current time when sent by Strategy.order (the event
+        itself never reads the clock)
+    order_id is unique in the process and increasing, to cancel or replace a resting order by.
     """
+    __slots__ = ('order_id', 'product', 'symbol', 'order_type', 'quantity', 'price', 'order_time')
+    code = ORDER
+    type = 'ORDER'
+
     def __init__(self, product, quantity, order_type='MARKET', price=None, order_time=None):
-        self.type = 'ORDER'
+        self.order_id = next(_order_ids)
         self.product = product
         self.symbol = product.symbol
         assert order_type == 'MARKET' or order_type == 'LIMIT'
@@ -62,11 +88,11 @@ class OrderEvent(Event):
             except TypeError:
                 print "LIMIT order has invalid price."
 
-        self.order_time = order_time if order_time is not None else dt.datetime.now()
+        self.order_time = order_time
 
     def __str__(self):
-        return "ORDER | Time: {}, Symbol: {}, Type: {}, Qty: {}"\
-            .format(self.order_time, self.symbol, self.order_type, self.quantity)
+        return "ORDER | Id: {}, Time: {}, Symbol: {}, Type: {}, Qty: {}"\
+            .format(self.order_id, self.order_time, self.symbol, self.order_type, self.quantity)
 
     @classmethod
     def from_json(cls):
@@ -74,6 +100,10 @@ class OrderEvent(Event):
 
 
 class FillEvent(Event):
+    __slots__ = ('fill_time', 'symbol', 'quantity', 'fill_price', 'fill_cost', 'exchange', 'commission')
+    code = FILL
+    type = 'FILL'
+
     def __init__(self, fill_time, symbol, quantity, fill_price, fill_cost, exchange, commission=0):
         """
         Encapsulates the notion of a Filled Order, as returned from a brokerage.
@@ -88,7 +118,6 @@ class FillEvent(Event):
         :param commission: (float)
         :return:
         """
-        self.type = 'FILL'
         self.fill_time = fill_time
         self.symbol = symbol
         self.quantity = quantity
@@ -101,6 +130,8 @@ class FillEvent(Event):
         return "FILL | Time: {}, Symbol: {}, Qty: {}, Price: {}, Cost: {}, Commission: {} "\
             .format(self.fill_time, self.symbol, self.quantity, self.fill_price, self.fill_cost, self.commission)
 
+
 class NewDayEvent(Event):
-    def __init__(self):
-        self.type = 'NEW_DAY'
\ No newline at end of file
+    __slots__ = ()
+    code = NEW_DAY
+    type = 'NEW_DAY'
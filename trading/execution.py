@@ -1,10 +1,11 @@
 from abc import ABCMeta, abstractmethod
+from trading.event_bus import make_event_bus
 
 
 class ExecutionHandler(object):
     """
      The ExecutionHandler simulates a connection to a brokerage. The job of the handler
-     is to take OrderEvents from the Queue and execute them, either via a simulated approach
+     is to take OrderEvents from the EventBus and execute them, either via a simulated approach
      or an actual connection to a liver brokerage. Once orders are executed the handler
      creates FillEvents, which describe what was actually transacted, including fees,
      commission and slippage (if modelled).
@@ -13,7 +14,7 @@ class ExecutionHandler(object):
     __metaclass__ = ABCMeta
 
     def __init__(self, events):
-        self.events = events
+        self.events = make_event_bus(events)
 
     @abstractmethod
     def process_new_order(self, order_event):
@@ -1,44 +1,82 @@
 import datetime as dt
 import futures_utils as fut
+from roll_schedule import VolumeRoll, get_roll_schedule, ROLL_SCHEDULE_HORIZON
+from instrument_master import INSTRUMENT_MASTER
 # from ib.utils import create_ib_futures_contract
 # from futures_utils import build_contract, get_contract_specs, get_mkt_times, get_highest_volume_contract
 
 class FuturesContract(object):
-    def __init__(self, base_symbol, exp_year=None, exp_month=None, continuous=False):
+    """
+    A futures contract of base_symbol, its specs (name, point and tick values, trading times...) read from the
+    shared INSTRUMENT_MASTER record.
+    """
+    __slots__ = ('base_symbol', 'exp_year', 'exp_month', 'symbol', 'spec', 'continuous', 'roll_rule',
+                 'roll_schedule')
+
+    def __init__(self, base_symbol, exp_year=None, exp_month=None, continuous=False, roll_rule=None,
+                 roll_schedule=None):
+        """
+        :param base_symbol: (str) e.g. 'GC'
+        :param exp_year: (int)
+        :param exp_month: (int)
+        :param continuous: (bool) roll to the front contract every day
+        :param roll_rule: (VolumeRoll) or (FixedOffsetRoll) how the front contract is chosen, VolumeRoll by default
+        :param roll_schedule: (RollSchedule) precomputed schedule, otherwise loaded or built on the first roll
+        """
         self.exp_year = exp_year if exp_year is not None else dt.datetime.now().year
         self.exp_month = exp_month if exp_month is not None else dt.datetime.now().month
 
         self.base_symbol = base_symbol
         self.symbol = fut.build_contract(self.base_symbol, self.exp_year, self.exp_month)
+        self.spec = INSTRUMENT_MASTER[self.base_symbol]
 
-        specs = fut.get_contract_specs(self.base_symbol)
-        self.name = specs['Name']
-        self.exchange = specs['Exchange']
-        self.tick_value = float(specs['Tick Value'])
-        self.contract_size = specs['Contract Size']
-        self.active = specs['Active']
-        self.deliver_months = specs['Delivery Months']
-        self.units = specs['Units']
-        self.currency = specs['Currency']
-        self.trading_times = specs['Trading Times']
-        self.min_tick_value =  (specs['Minimum Tick Value'])
-        self.full_point_value = float(specs['Full Point Value'])
-        self.terminal_point_value = float(specs['Terminal Point Value'])
-
-        self.contract_multiplier = self.full_point_value*self.terminal_point_value
-
-        self.mkt_open, self.mkt_close = fut.get_mkt_times(self.trading_times)
         # self.ib_contract = create_ib_futures_contract(self.base_symbol,
         #                                               exp_month=self.exp_month,
         #                                               exp_year=self.exp_year,
         #                                               exchange=self.exchange,
         #                                               currency=self.currency)
 
-
         self.continuous = continuous
+        self.roll_rule = roll_rule if roll_rule is not None else VolumeRoll()
+        self.roll_schedule = roll_schedule
+
+    name = property(lambda self: self.spec.name)
+    exchange = property(lambda self: self.spec.exchange)
+    tick_value = property(lambda self: self.spec.tick_value)
+    min_tick_value = property(lambda self: self.spec.min_tick_value)
+    tick_size = property(lambda self: self.spec.tick_size)
+    contract_size = property(lambda self: self.spec.contract_size)
+    active = property(lambda self: self.spec.active)
+    deliver_months = property(lambda self: self.spec.delivery_months)
+    units = property(lambda self: self.spec.units)
+    currency = property(lambda self: self.spec.currency)
+    trading_times = property(lambda self: self.spec.trading_times)
+    full_point_value = property(lambda self: self.spec.full_point_value)
+    terminal_point_value = property(lambda self: self.spec.terminal_point_value)
+    contract_multiplier = property(lambda self: self.spec.contract_multiplier)
+    mkt_open = property(lambda self: self.spec.mkt_open)
+    mkt_close = property(lambda self: self.spec.mkt_close)
 
     def update(self, year, month, day):
-        self.symbol = fut.get_highest_volume_contract(self.base_symbol, year, month, day)
+        self.set_symbol(self.roll_symbol(year, month, day))
+
+    def roll_symbol(self, year, month, day):
+        """
+        The contract symbol update() would switch to on the given day, without changing the contract.
+        Only continuous contracts roll, from a roll schedule covering a year from the first day asked for. A saved
+        schedule whose data ends before that day is rebuilt from the newer data first.
+        :return: (str) e.g. 'GCM6'
+        """
+        if not self.continuous:
+            return self.symbol
+        date = dt.date(year, month, day)
+        if self.roll_schedule is None or not self.roll_schedule.covers(date, date):
+            self.roll_schedule = get_roll_schedule(self.base_symbol, date, date + ROLL_SCHEDULE_HORIZON,
+                                                   self.roll_rule, backed_until=date)
+        return self.roll_schedule.symbol(date)
+
+    def set_symbol(self, symbol):
+        self.symbol = symbol
         self.exp_year = fut.get_exp_year_from_symbol(self.symbol)
         self.exp_month = fut.get_exp_month_from_symbol(self.symbol)
 
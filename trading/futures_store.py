@@ -0,0 +1,217 @@
+"""
+Local store of daily futures data, one CSV per contract, in front of the Quandl client.
+
+Contracts are fetched once (get, or in bulk with populate) and read from disk and memory afterwards. refresh
+fetches only a date range (by default from the last stored day on) and merges it in; get refreshes a stored
+contract that was still trading when it was stored (it had rows in the week before) once its file is older than
+refresh_after, keeping the stored rows if that fails. Contracts the client does not know are remembered, so scans
+over listed and unlisted months (e.g. roll schedules) do not retry them, until missing_ttl has passed for the
+contracts that were not delivered yet when they were found missing (they may have been listed since).
+"""
+import os
+import json
+import time
+import logging
+import threading
+import datetime as dt
+import pandas as pd
+import Quandl as Qd
+from dateutil.relativedelta import relativedelta
+
+log = logging.getLogger(__name__)
+
+FUTURES_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'data', 'futures')
+MISSING_FILE = 'missing.json'
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+EXPIRED_AFTER = dt.timedelta(days=7)  # a contract without rows in this long before it was stored has expired
+
+
+class FuturesDataNotFound(KeyError):
+    """
+    No data for a contract (or day), raised by the store in place of the client's DatasetNotFound.
+    """
+    pass
+
+
+class FuturesStore(object):
+
+    def __init__(self, dataset_code, store_dir=None, client=Qd, authtoken=None,
+                 missing_ttl=dt.timedelta(days=7), refresh_after=dt.timedelta(days=1)):
+        """
+        :param dataset_code: (function) dataset_code(symbol, exp_year, exp_month) -> (str) e.g. 'CME/GCK2016'
+        :param store_dir: (str) defaults to FUTURES_STORE_DIR
+        :param client: module or object with get(dataset, authtoken=, trim_start=, trim_end=) (Quandl)
+        :param authtoken: (str)
+        :param missing_ttl: (timedelta) how long a contract not delivered yet is known to be missing
+        :param refresh_after: (timedelta) age of a stored contract's file after which get fetches its new rows,
+            None to never refresh on get
+        """
+        self.dataset_code = dataset_code
+        self.store_dir = store_dir if store_dir is not None else FUTURES_STORE_DIR
+        self.client = client
+        self.authtoken = authtoken
+        self.missing_ttl = missing_ttl
+        self.refresh_after = refresh_after
+        self.remote_calls = 0
+        self._data = {}
+        self._lock = threading.RLock()
+        self._missing = None
+
+    def path(self, code):
+        return os.path.join(self.store_dir, code.replace('/', os.sep) + '.csv')
+
+    def _missing_codes(self):
+        """
+        :return: (dict) code: (str) time it was found missing, None if it is never checked again
+        """
+        if self._missing is None:
+            fpath = os.path.join(self.store_dir, MISSING_FILE)
+            missing = json.load(open(fpath)) if os.path.exists(fpath) else {}
+            if isinstance(missing, list):
+                # written before missing entries expired, check them all again
+                missing = dict((code, dt.datetime(1970, 1, 1).strftime(TIME_FORMAT)) for code in missing)
+            self._missing = missing
+        return self._missing
+
+    def _is_missing(self, code):
+        missing = self._missing_codes()
+        if code not in missing:
+            return False
+        if missing[code] is None:
+            return True
+        return dt.datetime.now() < dt.datetime.strptime(missing[code], TIME_FORMAT) + self.missing_ttl
+
+    def _write_missing(self):
+        if not os.path.exists(self.store_dir):
+            os.makedirs(self.store_dir)
+        with open(os.path.join(self.store_dir, MISSING_FILE), 'w') as f:
+            json.dump(self._missing, f, sort_keys=True, indent=0)
+
+    def _mark_missing(self, code, delivery=None):
+        """
+        :param delivery: (DateTime) first day of the contract's delivery month, a contract delivered before today
+            is never listed later and is not checked again
+        """
+        now = dt.datetime.now()
+        self._missing_codes()[code] = now.strftime(TIME_FORMAT) if delivery is None or delivery > now else None
+        self._write_missing()
+
+    def _unmark_missing(self, code):
+        if code in self._missing_codes():
+            del self._missing[code]
+            self._write_missing()
+
+    def _fetch(self, code, start_date=None, end_date=None, delivery=None):
+        kwargs = {'authtoken': self.authtoken}
+        if start_date is not None:
+            kwargs['trim_start'] = start_date.strftime('%Y-%m-%d')
+        if end_date is not None:
+            kwargs['trim_end'] = end_date.strftime('%Y-%m-%d')
+        self.remote_calls += 1
+        try:
+            return self.client.get(dataset=str(code), **kwargs)
+        except Qd.DatasetNotFound:
+            self._mark_missing(code, delivery)
+            raise FuturesDataNotFound(code)
+
+    def _save(self, code, data):
+        fpath = self.path(code)
+        if not os.path.exists(os.path.dirname(fpath)):
+            os.makedirs(os.path.dirname(fpath))
+        data.to_csv(fpath + '.tmp')
+        os.rename(fpath + '.tmp', fpath)
+        self._data[code] = data
+
+    def __contains__(self, key):
+        code = self.dataset_code(*key)
+        return code in self._data or os.path.exists(self.path(code))
+
+    def _is_stale(self, fpath, data):
+        """
+        The stored data of a contract may miss rows: the file was written more than refresh_after ago, while the
+        contract was still trading.
+        """
+        if self.refresh_after is None:
+            return False
+        written = os.path.getmtime(fpath)
+        if time.time() - written <= self.refresh_after.total_seconds():
+            return False
+        return not len(data) or data.index[-1] >= dt.datetime.fromtimestamp(written) - EXPIRED_AFTER
+
+    def get(self, symbol, exp_year, exp_month):
+        """
+        Daily data of a contract, fetched and stored on the first request. A stored contract still trading is
+        refreshed (see refresh) when its file is older than refresh_after, the stored data is returned if the
+        refresh fails.
+        :param symbol: (str) base symbol e.g. 'GC'
+        :param exp_year: (int)
+        :param exp_month: (int)
+        :return: (DataFrame) indexed on date, treat as read-only
+        """
+        code = self.dataset_code(symbol, exp_year, exp_month)
+        delivery = dt.datetime(exp_year, exp_month, 1)
+        with self._lock:
+            data = self._data.get(code)
+            if data is not None:
+                return data
+            if self._is_missing(code):
+                raise FuturesDataNotFound(code)
+            fpath = self.path(code)
+            if os.path.exists(fpath):
+                data = pd.read_csv(fpath, index_col=0, parse_dates=True)
+                self._data[code] = data
+                if self._is_stale(fpath, data):
+                    try:
+                        data = self.refresh(symbol, exp_year, exp_month)
+                    except (FuturesDataNotFound, Qd.ErrorDownloading) as e:
+                        log.warning("Could not refresh {}, using the stored data up to {}: {!r}".format(
+                            code, data.index[-1].strftime('%Y-%m-%d') if len(data) else None, e))
+                        self._unmark_missing(code)
+            else:
+                data = self._fetch(code, delivery=delivery)
+                self._save(code, data)
+                self._unmark_missing(code)
+            return data
+
+    def refresh(self, symbol, exp_year, exp_month, start_date=None, end_date=None):
+        """
+        Fetch start_date to end_date of a contract and merge it into the stored data, fetched rows replace stored
+        ones. start_date defaults to the last stored day (which may have been incomplete).
+        :return: (DataFrame)
+        """
+        code = self.dataset_code(symbol, exp_year, exp_month)
+        with self._lock:
+            self._unmark_missing(code)
+            if code not in self._data and not os.path.exists(self.path(code)):
+                return self.get(symbol, exp_year, exp_month)
+            stored = self.get(symbol, exp_year, exp_month)
+            if start_date is None and len(stored):
+                start_date = stored.index[-1].to_datetime()
+            fetched = self._fetch(code, start_date, end_date, delivery=dt.datetime(exp_year, exp_month, 1))
+            data = pd.concat([stored[~stored.index.isin(fetched.index)], fetched]).sort_index()
+            self._save(code, data)
+            return data
+
+    def populate(self, symbols, start_date, end_date, months_ahead=8):
+        """
+        Fetch every monthly contract of symbols that can trade from start_date to end_date (the contracts
+        expiring up to months_ahead months after end_date), skipping contracts already stored.
+        :param symbols: (list) base symbols
+        :return: (int) number of contracts available in the store
+        """
+        first_month = dt.datetime(start_date.year, start_date.month, 1)
+        n_months = (end_date.year - first_month.year)*12 + end_date.month - first_month.month + months_ahead
+        available = 0
+        for symbol in symbols:
+            for i in range(n_months):
+                month = first_month + relativedelta(months=i)
+                try:
+                    self.get(symbol, month.year, month.month)
+                    available += 1
+                except FuturesDataNotFound:
+                    pass
+        return available
+
+    def clear_memory(self):
+        with self._lock:
+            self._data.clear()
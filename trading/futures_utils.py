@@ -1,24 +1,34 @@
 import os
-import csv
 import json
 import datetime as dt
 import Quandl as Qd
 from dateutil.tz import tzlocal
 from dateutil.relativedelta import relativedelta
+from futures_store import FuturesStore
+from instrument_master import INSTRUMENT_MASTER
 __location__ = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
 
 QUANDL_KEY = "SyH7V4ywJGho77EC6W7C"
 
+# raised by get_futures_data (or a lookup into its result) when a contract or day has no data
+DATA_NOT_FOUND_ERRORS = (Qd.DatasetNotFound, KeyError)
+
+_month_codes = None
+_mkt_times = {}
+
 
 def _load_cme_month_codes():
-    f_path = os.path.join(__location__, 'cme_month_codes.json')
-    month_codes = json.load(open(f_path, 'r'))
-    for k, v in month_codes.items():
-        try:
-            month_codes[int(k)] = v
-        except ValueError:
-            pass
-    return month_codes
+    global _month_codes
+    if _month_codes is None:
+        f_path = os.path.join(__location__, 'cme_month_codes.json')
+        month_codes = json.load(open(f_path, 'r'))
+        for k, v in month_codes.items():
+            try:
+                month_codes[int(k)] = v
+            except ValueError:
+                pass
+        _month_codes = month_codes
+    return _month_codes
 
 
 def get_contract_month_code(exp_month):
@@ -31,6 +41,14 @@ def get_contract_month_code(exp_month):
     return month_codes[exp_month]
 
 
+def get_month_from_code(month_code):
+    """
+    :param month_code: (char) e.g. 'M'
+    :return: (int) e.g. 6
+    """
+    return _load_cme_month_codes()[month_code]
+
+
 def build_contract(symbol, exp_year, exp_month):
     """
     Build the contract ticker.
@@ -70,7 +88,7 @@ def get_quandl_future_code(symbol, exp_year, exp_month):
 
 def get_futures_data(symbol, exp_year, exp_month):
     """
-    Get's inter-day futures data from Quandl.
+    Get's inter-day futures data, from the local FUTURES_STORE (fetched from Quandl on the first request).
     :param symbol: (str)
     :param exp_year: (int)
     :param exp_month: (int)
@@ -88,8 +106,10 @@ def get_futures_data(symbol, exp_year, exp_month):
     | 2016-03-09 00:00:00 | 1262.6 | 1263.1 | 1245   | 1252.2 |      5.5 |   1257.9 |      227 |             157 |
     | 2016-03-10 00:00:00 | 1250.6 | 1274.5 | 1240.1 | 1274   |     15.4 |   1273.3 |      249 |             309 |
     """
-    quandl_future_code = get_quandl_future_code(symbol, exp_year, exp_month)
-    return Qd.get(dataset=str(quandl_future_code), authtoken=QUANDL_KEY)
+    return FUTURES_STORE.get(symbol, exp_year, exp_month)
+
+
+FUTURES_STORE = FuturesStore(get_quandl_future_code, authtoken=QUANDL_KEY)
 
 
 def get_highest_volume_contract(base_symbol, year, month, day):
@@ -114,7 +134,7 @@ def get_highest_volume_contract(base_symbol, year, month, day):
             if volume >= max_volume:
                 highest_volume_contract = build_contract(base_symbol, date.year, date.month)
                 max_volume = volume
-        except (Qd.DatasetNotFound, KeyError):
+        except DATA_NOT_FOUND_ERRORS:
             pass
 
     return highest_volume_contract
@@ -122,22 +142,20 @@ def get_highest_volume_contract(base_symbol, year, month, day):
 
 def get_contract_specs(symbol):
     """
-
-    :param symbol:
-    :return:
+    The contract_specs.csv row of symbol, from the INSTRUMENT_MASTER (use INSTRUMENT_MASTER[symbol] for the
+    parsed specs).
+    :param symbol: (str) base symbol e.g. 'GC'
+    :return: (dict) column: (str) value
     """
-    reader = csv.DictReader(open(os.path.join(__location__, 'contract_specs.csv')))
-    contracts = {}
-    for row in reader:
-        k = row['Symbol']
-        contracts[k] = row
-    specs = contracts[symbol]
-    return specs
+    return INSTRUMENT_MASTER[symbol].row()
 
 
 def get_mkt_times(trading_times_str):
-    mkt_open_str = trading_times_str.split('-')[0].rstrip()
-    mkt_close_str = trading_times_str.split('-')[1].lstrip()
-    mkt_open = dt.datetime.strptime(mkt_open_str, '%H:%M').replace(tzinfo=tzlocal()).time()
-    mkt_close = dt.datetime.strptime(mkt_close_str, '%H:%M').replace(tzinfo=tzlocal()).time()
-    return mkt_open, mkt_close
+    mkt_times = _mkt_times.get(trading_times_str)
+    if mkt_times is None:
+        mkt_open_str = trading_times_str.split('-')[0].rstrip()
+        mkt_close_str = trading_times_str.split('-')[1].lstrip()
+        mkt_open = dt.datetime.strptime(mkt_open_str, '%H:%M').replace(tzinfo=tzlocal()).time()
+        mkt_close = dt.datetime.strptime(mkt_close_str, '%H:%M').replace(tzinfo=tzlocal()).time()
+        mkt_times = _mkt_times[trading_times_str] = (mkt_open, mkt_close)
+    return mkt_times
@@ -0,0 +1,129 @@
+"""
+Instrument master: the contract specs of every product, loaded once and shared.
+
+contract_specs.csv is parsed on the first lookup into immutable InstrumentSpec records with the numeric fields
+converted and the trading times parsed, indexed on symbol (and on exchange). Products keep a reference to their
+spec instead of copying and re-deriving its fields on every construction.
+
+    spec = INSTRUMENT_MASTER['GC']
+    spec.tick_size, spec.contract_multiplier, spec.mkt_open
+"""
+import os
+import csv
+import threading
+from collections import namedtuple
+from trading_calendar import parse_trading_times
+
+CONTRACT_SPECS_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'contract_specs.csv')
+
+_SPEC_FIELDS = ('symbol', 'exchange', 'quandl_code', 'name', 'session_type', 'active', 'terminal_point_value',
+                'full_point_value', 'currency', 'contract_size', 'units', 'min_tick_value', 'tick_value',
+                'delivery_months', 'start_date', 'trading_times', 'notes')
+_CSV_COLUMNS = ('Symbol', 'Exchange', 'Quandl Code', 'Name', 'Session Type', 'Active', 'Terminal Point Value',
+                'Full Point Value', 'Currency', 'Contract Size', 'Units', 'Minimum Tick Value', 'Tick Value',
+                'Delivery Months', 'Start Date', 'Trading Times', 'Additional Notes')
+_FLOAT_FIELDS = ('terminal_point_value', 'full_point_value', 'tick_value')
+
+
+class InstrumentSpec(namedtuple('InstrumentSpec', _SPEC_FIELDS + ('mkt_open', 'mkt_close', 'raw'))):
+    """
+    Contract specs of one product. The point values and tick_value are floats (min_tick_value is the csv string, as
+    FuturesContract has always had it), mkt_open and mkt_close dt.time and raw the csv row as (column, value) pairs.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        :param row: (dict) a contract_specs.csv row
+        """
+        values = dict((field, row.get(column) or '') for field, column in zip(_SPEC_FIELDS, _CSV_COLUMNS))
+        for field in _FLOAT_FIELDS:
+            values[field] = float(values[field]) if values[field] else float('nan')
+        mkt_open, mkt_close = parse_trading_times(values['trading_times']) if values['trading_times'] else (None, None)
+        return cls(mkt_open=mkt_open, mkt_close=mkt_close, raw=tuple(sorted(row.items())), **values)
+
+    @property
+    def contract_multiplier(self):
+        return self.full_point_value*self.terminal_point_value
+
+    @property
+    def tick_size(self):
+        """
+        Minimum price increment, e.g. 0.1 for GC ($10 ticks of a $100 point).
+        """
+        return self.tick_value/self.full_point_value
+
+    def row(self):
+        """
+        :return: (dict) the contract_specs.csv row (string values), as get_contract_specs returns it
+        """
+        return dict(self.raw)
+
+
+class InstrumentMaster(object):
+    """
+    Read-only registry of InstrumentSpec by symbol, loaded from specs_path on first use.
+    """
+
+    def __init__(self, specs_path=CONTRACT_SPECS_PATH):
+        self.specs_path = specs_path
+        self._specs = None
+        self._by_exchange = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._specs is None:
+                specs = {}
+                with open(self.specs_path) as f:
+                    for row in csv.DictReader(f):
+                        spec = InstrumentSpec.from_row(row)
+                        specs[spec.symbol] = spec  # a symbol listed twice takes its last row
+                by_exchange = {}
+                for spec in specs.values():
+                    by_exchange.setdefault(spec.exchange, []).append(spec.symbol)
+                self._by_exchange = dict((exchange, tuple(sorted(symbols)))
+                                         for exchange, symbols in by_exchange.items())
+                self._specs = specs
+        return self._specs
+
+    @property
+    def specs(self):
+        return self._specs if self._specs is not None else self._load()
+
+    def __getitem__(self, symbol):
+        return self.specs[symbol]
+
+    def __contains__(self, symbol):
+        return symbol in self.specs
+
+    def __iter__(self):
+        return iter(sorted(self.specs))
+
+    def __len__(self):
+        return len(self.specs)
+
+    def get(self, symbol, default=None):
+        return self.specs.get(symbol, default)
+
+    def symbols(self, exchange=None):
+        """
+        :param exchange: (str) e.g. 'CME', defaults to every exchange
+        :return: (tuple) of symbols, sorted
+        """
+        if exchange is None:
+            return tuple(self)
+        if self._by_exchange is None:
+            self._load()
+        return self._by_exchange.get(exchange, ())
+
+    def contract_multipliers(self, symbols):
+        """
+        :param symbols: (list) base symbols
+        :return: (dict) symbol: contract multiplier, as the strategies' contract_multiplier parameter
+        """
+        return dict((symbol, self[symbol].contract_multiplier) for symbol in symbols)
+
+
+INSTRUMENT_MASTER = InstrumentMaster()
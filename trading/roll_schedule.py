@@ -0,0 +1,274 @@
+"""
+Continuous contract roll schedules: the front contract of a base symbol for every day of a date range.
+
+A schedule is built once per (base symbol, roll rule) from daily futures data, saved as a CSV under
+ROLL_SCHEDULE_DIR and loaded from there afterwards, so rolling a continuous contract is a dict lookup. Past the
+last day of the futures data (data_end) a schedule carries the last front contract forward; a saved schedule is
+rebuilt when it is asked for days past its data_end, once newer data may exist.
+
+    VolumeRoll()            highest volume of the next 8 monthly contracts (as get_highest_volume_contract)
+    FixedOffsetRoll(10)     nearest delivery month contract, rolled 10 days before its delivery month starts
+"""
+import os
+import csv
+import datetime as dt
+from collections import OrderedDict
+from dateutil.relativedelta import relativedelta
+from dateutil.rrule import rrule, DAILY
+import futures_utils as fut
+from instrument_master import INSTRUMENT_MASTER
+from trading_calendar import TradingCalendar
+
+ROLL_SCHEDULE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'data',
+                                 'roll_schedules')
+ROLL_SCHEDULE_HORIZON = relativedelta(years=1)
+WEEKDAYS = TradingCalendar(holidays=())
+
+
+def _month_start(date):
+    return dt.datetime(date.year, date.month, 1)
+
+
+class VolumeRoll(object):
+    """
+    The front contract is the highest volume contract of the months_ahead monthly contracts starting with the
+    current month (ties go to the later contract). Days without any volume data (weekends, holidays) keep the
+    previous day's contract.
+    """
+
+    def __init__(self, months_ahead=8, load_data=None):
+        """
+        :param months_ahead: (int)
+        :param load_data: (function) load_data(base_symbol, exp_year, exp_month) -> DataFrame with a 'Volume'
+            column indexed on date, defaults to futures_utils.get_futures_data
+        """
+        self.months_ahead = months_ahead
+        self.load_data = load_data
+
+    @property
+    def key(self):
+        return 'volume_{}'.format(self.months_ahead)
+
+    def _load_volumes(self, base_symbol, start_date, end_date):
+        """
+        :return: (dict) (exp_year, exp_month): {date: volume} for every contract that can be front on the range
+        """
+        load_data = self.load_data if self.load_data is not None else fut.get_futures_data
+        first_month = _month_start(start_date)
+        n_months = (end_date.year - first_month.year)*12 + end_date.month - first_month.month + self.months_ahead
+        volumes = {}
+        for i in range(n_months):
+            month = first_month + relativedelta(months=i)
+            try:
+                data = load_data(base_symbol, month.year, month.month)
+                volume = data['Volume']
+            except fut.DATA_NOT_FOUND_ERRORS:
+                continue
+            volumes[(month.year, month.month)] = dict(zip([d.date() for d in volume.index.to_pydatetime()],
+                                                          volume.values))
+        return volumes
+
+    def front_contracts(self, base_symbol, days):
+        """
+        :param base_symbol: (str)
+        :param days: (list) of dt.date, consecutive
+        :return: (list) of contract symbols, (dt.date) last day with volume data or None
+        """
+        volumes = self._load_volumes(base_symbol, days[0], days[-1])
+        symbols = []
+        front = None
+        data_end = None
+        for day in days:
+            day_front = None
+            max_volume = 0
+            month = _month_start(day)
+            for i in range(self.months_ahead):
+                contract_month = month + relativedelta(months=i)
+                volume = volumes.get((contract_month.year, contract_month.month), {}).get(day)
+                if volume is not None and volume >= max_volume:
+                    day_front = fut.build_contract(base_symbol, contract_month.year, contract_month.month)
+                    max_volume = volume
+            if day_front is not None:
+                front = day_front
+                data_end = day
+            elif front is None:
+                front = fut.build_contract(base_symbol, day.year, day.month)
+            symbols.append(front)
+        return symbols, data_end
+
+
+class FixedOffsetRoll(object):
+    """
+    The front contract is the nearest delivery month contract, rolled to the next one days_before days before
+    the first day of its delivery month. Needs no market data.
+    """
+
+    def __init__(self, days_before=10, delivery_months=None):
+        """
+        :param days_before: (int) calendar days
+        :param delivery_months: (str) month codes, e.g. 'GJMQVZ', defaults to the instrument master's
+        """
+        self.days_before = days_before
+        self.delivery_months = delivery_months
+
+    @property
+    def key(self):
+        return 'offset_{}'.format(self.days_before) + ('_' + self.delivery_months if self.delivery_months else '')
+
+    def front_contracts(self, base_symbol, days):
+        """
+        :return: (list) of contract symbols, (dt.date) the last day, the rule needs no data
+        """
+        delivery_months = self.delivery_months
+        if delivery_months is None:
+            delivery_months = INSTRUMENT_MASTER[base_symbol].delivery_months
+        months = sorted(fut.get_month_from_code(code) for code in delivery_months)
+        if not months:
+            raise ValueError("No delivery months for {}".format(base_symbol))
+        offset = dt.timedelta(days=self.days_before)
+
+        symbols = []
+        for day in days:
+            # first delivery month whose roll date (its first day - offset) is still ahead
+            year = day.year
+            front = None
+            while front is None:
+                for month in months:
+                    if day < (dt.date(year, month, 1) - offset):
+                        front = fut.build_contract(base_symbol, year, month)
+                        break
+                year += 1
+            symbols.append(front)
+        return symbols, days[-1]
+
+
+class RollSchedule(object):
+    """
+    Front contract of base_symbol for every calendar day from start to end, backed by market data up to data_end
+    (None when no day is).
+    """
+
+    def __init__(self, base_symbol, symbols, rule_key=None, data_end=None):
+        """
+        :param base_symbol: (str)
+        :param symbols: (OrderedDict) dt.date: contract symbol, consecutive days
+        :param rule_key: (str)
+        :param data_end: (dt.date) last day the rule had data for, the days after carry its front contract forward
+        """
+        self.base_symbol = base_symbol
+        self.symbols = symbols
+        self.rule_key = rule_key
+        self.data_end = data_end
+        days = list(symbols.keys())
+        self.start = days[0]
+        self.end = days[-1]
+
+    @classmethod
+    def build(cls, base_symbol, start_date, end_date, rule=None):
+        """
+        :param base_symbol: (str)
+        :param start_date: (DateTime)
+        :param end_date: (DateTime)
+        :param rule: (VolumeRoll) or (FixedOffsetRoll), defaults to VolumeRoll()
+        :return: (RollSchedule)
+        """
+        rule = rule if rule is not None else VolumeRoll()
+        days = [d.date() for d in rrule(DAILY, dtstart=_to_datetime(start_date), until=_to_datetime(end_date))]
+        symbols, data_end = rule.front_contracts(base_symbol, days)
+        return cls(base_symbol, OrderedDict(zip(days, symbols)), rule.key, data_end)
+
+    @classmethod
+    def load(cls, fpath):
+        symbols = OrderedDict()
+        with open(fpath) as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            base_symbol, rule_key = header[:2]
+            # schedules saved without their data end are treated as backed by no data
+            data_end = _parse_date(header[2]) if len(header) > 2 and header[2] else None
+            for date_str, symbol in reader:
+                symbols[_parse_date(date_str)] = symbol
+        return cls(base_symbol, symbols, rule_key, data_end)
+
+    def save(self, fpath):
+        if not os.path.exists(os.path.dirname(fpath)):
+            os.makedirs(os.path.dirname(fpath))
+        with open(fpath, 'w') as f:
+            writer = csv.writer(f)
+            writer.writerow([self.base_symbol, self.rule_key,
+                             self.data_end.strftime('%Y-%m-%d') if self.data_end is not None else ''])
+            for date, symbol in self.symbols.items():
+                writer.writerow([date.strftime('%Y-%m-%d'), symbol])
+        return fpath
+
+    def covers(self, start_date, end_date):
+        return self.start <= _to_date(start_date) and _to_date(end_date) <= self.end
+
+    def is_backed(self, date):
+        """
+        :return: (bool) the front contract on date was chosen from market data, or carried over days without a
+            session (weekends) from the last day with data
+        """
+        if self.data_end is None:
+            return False
+        return not WEEKDAYS.sessions(self.data_end + dt.timedelta(days=1), _to_date(date))
+
+    def symbol(self, date):
+        """
+        :param date: (DateTime) or (dt.date)
+        :return: (str) front contract on date
+        """
+        try:
+            return self.symbols[_to_date(date)]
+        except KeyError:
+            raise ValueError("{} is outside the {} roll schedule ({} to {})".format(date, self.base_symbol,
+                                                                                    self.start, self.end))
+
+    def rolls(self):
+        """
+        :return: (list) of (dt.date, from symbol, to symbol) for every roll in the schedule
+        """
+        rolls = []
+        previous = None
+        for date, symbol in self.symbols.items():
+            if previous is not None and symbol != previous:
+                rolls.append((date, previous, symbol))
+            previous = symbol
+        return rolls
+
+
+def _to_date(date):
+    return date.date() if isinstance(date, dt.datetime) else date
+
+
+def _parse_date(date_str):
+    return dt.datetime.strptime(date_str, '%Y-%m-%d').date()
+
+
+def _to_datetime(date):
+    return date if isinstance(date, dt.datetime) else dt.datetime(date.year, date.month, date.day)
+
+
+def get_roll_schedule(base_symbol, start_date, end_date, rule=None, save=True, backed_until=None):
+    """
+    The roll schedule of base_symbol covering start_date to end_date, loaded from ROLL_SCHEDULE_DIR if a saved
+    schedule covers the range and is backed by data up to backed_until, built (and saved) over both ranges
+    otherwise.
+    :param backed_until: (DateTime) last day whose front contract must come from market data, defaults to
+        end_date
+    :return: (RollSchedule)
+    """
+    rule = rule if rule is not None else VolumeRoll()
+    backed_until = backed_until if backed_until is not None else end_date
+    fpath = os.path.join(ROLL_SCHEDULE_DIR, '{}_{}.csv'.format(base_symbol, rule.key))
+    if os.path.exists(fpath):
+        schedule = RollSchedule.load(fpath)
+        if schedule.covers(start_date, end_date) and schedule.is_backed(backed_until):
+            return schedule
+        start_date = min(_to_date(start_date), schedule.start)
+        end_date = max(_to_date(end_date), schedule.end)
+
+    schedule = RollSchedule.build(base_symbol, start_date, end_date, rule)
+    if save:
+        schedule.save(fpath)
+    return schedule
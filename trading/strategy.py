@@ -1,19 +1,25 @@
 import logging
+import datetime as dt
 from abc import ABCMeta, abstractmethod
 from trading.position import Position
 from trading.events import OrderEvent
+from trading.event_bus import make_event_bus
 
 
 class Strategy(object):
 
     __metaclass__ = ABCMeta
 
+    # True if every trading day can be backtested on its own: the strategy is flat at the end of every day and
+    # keeps no state from one day to the next (see backtest.day_parallel)
+    day_independent = False
+
     def __init__(self, events, data, products, initial_cash, live=False, *args, **kwargs):
         """
         The Strategy is an ABC that presents an interface for taking market data and
         generating corresponding OrderEvents which are sent to the ExecutionHandler.
 
-        :param events: (Queue)
+        :param events: (EventBus) or (Queue)
         :param data: (DataHandler)
         :param products: (list) (FuturesContract)
         :param initial_cash: (float)
@@ -22,7 +28,7 @@ class Strategy(object):
         """
         self.live = live
 
-        self.events = events
+        self.events = make_event_bus(events)
         self.data = data
         self.products = products
         self.symbols = [product.symbol for product in self.products]
@@ -72,6 +78,11 @@ class Strategy(object):
         raise NotImplementedError("Strategy.new_fill()")
 
     def new_day(self):
+        """
+        Call back for the start of every session, before its first tick.
+        Updated before this callback:
+            self.symbols (continuous contracts rolled to the session's contracts)
+        """
         pass
 
     @abstractmethod
@@ -91,12 +102,16 @@ class Strategy(object):
         :param order_type: (str) 'MARKET' or 'LIMIT'
         :param quantity: (int)
         :param price: (float)
-        :param order_time: (DateTime)
+        :param order_time: (DateTime) defaults to the current bar time (the wall clock only when live without one)
+        :return: (OrderEvent) the order sent, its order_id cancels or replaces it while it rests
         """
         order_time = order_time if order_time is not None else self.curr_dt
+        if order_time is None and self.live:
+            order_time = dt.datetime.now()
         order = OrderEvent(product, quantity, order_type, price, order_time)
-        self.log.info(str(order))
+        self.log.info('%s', order)
         self.events.put(order)
+        return order
 
     def new_tick_update(self, market_event):
         """
@@ -124,6 +139,8 @@ class Strategy(object):
 
         :param fill_event: (FillEvent))
         """
+        if fill_event.symbol not in self.positions:  # a continuous contract rolled
+            self.positions[fill_event.symbol] = Position(fill_event.symbol)
         self.positions[fill_event.symbol].update(fill_event)
         self.cash -= fill_event.fill_cost
         self.transactions_series.append(fill_event)
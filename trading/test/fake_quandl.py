@@ -0,0 +1,62 @@
+"""
+In-memory stand-in for the Quandl client: serves generated daily futures data for any CME dataset code of a
+listed contract month and raises Quandl.DatasetNotFound for the others, without touching the network.
+
+    store = FuturesStore(fut.get_quandl_future_code, store_dir=tmp_dir, client=FakeQuandl())
+"""
+import datetime as dt
+import numpy as np
+import pandas as pd
+import Quandl as Qd
+import trading.futures_utils as fut
+
+COLUMNS = ['Open', 'High', 'Low', 'Last', 'Change', 'Settle', 'Volume', 'Open Interest']
+
+
+def make_contract_data(exp_year, exp_month, listed_days=240, peak_days=45, seed=0):
+    """
+    Business-daily data of a contract listed listed_days before its delivery month, with volume peaking
+    peak_days before the delivery month starts.
+    """
+    delivery = dt.datetime(exp_year, exp_month, 1)
+    index = pd.bdate_range(delivery - dt.timedelta(days=listed_days), delivery + dt.timedelta(days=20), name='Date')
+    rng = np.random.RandomState(seed + exp_year*12 + exp_month)
+    settle = 1000 + np.cumsum(rng.randn(len(index)))
+    days_to_peak = np.array([(delivery - dt.timedelta(days=peak_days) - d).days for d in index.to_pydatetime()])
+    volume = np.maximum(0, 1000 - 8*np.abs(days_to_peak)).astype(np.float64)
+    data = pd.DataFrame({'Open': settle - .5, 'High': settle + 1, 'Low': settle - 1, 'Last': settle,
+                         'Change': np.concatenate([[0], np.diff(settle)]), 'Settle': settle,
+                         'Volume': volume, 'Open Interest': volume*10}, index=index, columns=COLUMNS)
+    return data
+
+
+class FakeQuandl(object):
+
+    def __init__(self, delivery_months='GJMQVZ', end_date=None):
+        """
+        :param delivery_months: (str) listed month codes, other months raise DatasetNotFound
+        :param end_date: (DateTime) last day with data ("today"), defaults to all generated days
+        """
+        self.delivery_months = set(fut.get_month_from_code(code) for code in delivery_months)
+        self.end_date = end_date
+        self.calls = []
+
+    def get(self, dataset, authtoken=None, trim_start=None, trim_end=None):
+        self.calls.append((dataset, trim_start, trim_end))
+        code = dataset.split('/')[-1]
+        try:
+            exp_month = fut.get_month_from_code(code[-5])
+            exp_year = int(code[-4:])
+        except (KeyError, ValueError):
+            raise Qd.DatasetNotFound()
+        if exp_month not in self.delivery_months:
+            raise Qd.DatasetNotFound()
+
+        data = make_contract_data(exp_year, exp_month)
+        if self.end_date is not None:
+            data = data[data.index <= self.end_date]
+        if trim_start is not None:
+            data = data[data.index >= pd.Timestamp(trim_start)]
+        if trim_end is not None:
+            data = data[data.index <= pd.Timestamp(trim_end)]
+        return data.copy()
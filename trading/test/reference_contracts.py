@@ -0,0 +1,49 @@
+"""
+The original FuturesContract spec handling the instrument master is checked against, shared by the trading tests
+and the benchmarks.
+
+    attributes = contract_attributes_reference('GC')
+"""
+import csv
+import datetime as dt
+import trading.futures_utils as fut
+from dateutil.tz import tzlocal
+from trading.instrument_master import CONTRACT_SPECS_PATH
+
+BASE_SYMBOLS = ['GC', 'CL', 'ES', 'SI', 'NQ', 'HG']
+SPEC_ATTRIBUTES = ['name', 'exchange', 'tick_value', 'min_tick_value', 'contract_size', 'active', 'deliver_months',
+                   'units', 'currency', 'trading_times', 'full_point_value', 'terminal_point_value',
+                   'contract_multiplier', 'mkt_open', 'mkt_close']
+
+
+def contract_attributes_reference(base_symbol):
+    """
+    The original FuturesContract.__init__ spec handling of a June 2016 contract: read the csv, copy the row,
+    convert the fields and parse the trading times.
+    :return: (dict) attribute: value
+    """
+    reader = csv.DictReader(open(CONTRACT_SPECS_PATH))
+    contracts = {}
+    for row in reader:
+        contracts[row['Symbol']] = row
+    specs = dict(contracts[base_symbol])
+    attributes = {
+        'name': specs['Name'],
+        'exchange': specs['Exchange'],
+        'tick_value': float(specs['Tick Value']),
+        'min_tick_value': specs['Minimum Tick Value'],
+        'contract_size': specs['Contract Size'],
+        'active': specs['Active'],
+        'deliver_months': specs['Delivery Months'],
+        'units': specs['Units'],
+        'currency': specs['Currency'],
+        'trading_times': specs['Trading Times'],
+        'full_point_value': float(specs['Full Point Value']),
+        'terminal_point_value': float(specs['Terminal Point Value']),
+    }
+    attributes['contract_multiplier'] = attributes['full_point_value']*attributes['terminal_point_value']
+    mkt_open_str, mkt_close_str = [t.strip() for t in attributes['trading_times'].split('-')]
+    attributes['mkt_open'] = dt.datetime.strptime(mkt_open_str, '%H:%M').replace(tzinfo=tzlocal()).time()
+    attributes['mkt_close'] = dt.datetime.strptime(mkt_close_str, '%H:%M').replace(tzinfo=tzlocal()).time()
+    attributes['symbol'] = fut.build_contract(base_symbol, 2016, 6)
+    return attributes
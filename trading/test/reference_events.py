@@ -0,0 +1,168 @@
+"""
+The original event loop (Queue.Queue drained with get(False) until Empty) and dict-backed events the event buses
+and __slots__ events are checked against, shared by the trading tests and the benchmarks.
+
+Every tick puts a market event and drains the events; every order_every-th market event the strategy puts an order,
+which the execution answers with a fill, as in Backtest.event_handler. The runners return the dispatch counts.
+
+    assert run_bus(BacktestEventBus(), ticks, order_every) == run_queue(ticks, order_every)
+"""
+import datetime as dt
+from Queue import Queue, Empty
+from trading.events import MarketEvent, OrderEvent, FillEvent, MARKET, ORDER, FILL
+
+
+class Product(object):
+    symbol = 'GCG6'
+
+
+def make_handlers(events, order_every):
+    order = OrderEvent(Product(), 1, order_time=dt.datetime(2015, 12, 1))
+    fill = FillEvent(dt.datetime(2015, 12, 1), 'GCG6', 1, 1060., 1060., 'CME')
+    counts = {'MARKET': 0, 'ORDER': 0, 'FILL': 0}
+
+    def market(event):
+        counts['MARKET'] += 1
+        if counts['MARKET'] % order_every == 0:
+            events.put(order)
+
+    def order_handler(event):
+        counts['ORDER'] += 1
+        events.put(fill)
+
+    def fill_handler(event):
+        counts['FILL'] += 1
+
+    return {'MARKET': market, 'ORDER': order_handler, 'FILL': fill_handler}, counts
+
+
+def run_queue(ticks, order_every):
+    """
+    The original loop.
+    """
+    events = Queue()
+    event_handlers, counts = make_handlers(events, order_every)
+    market = MarketEvent(dt.datetime(2015, 12, 1), None)
+    for _ in xrange(ticks):
+        events.put(market)
+        while True:
+            try:
+                event = events.get(False)
+            except Empty:
+                break
+            else:
+                if event is not None:
+                    event_handlers[event.type](event)
+    return counts
+
+
+def run_bus(events, ticks, order_every):
+    event_handlers, counts = make_handlers(events, order_every)
+    market = MarketEvent(dt.datetime(2015, 12, 1), None)
+    get_event = events.get
+    for _ in xrange(ticks):
+        events.put(market)
+        event = get_event()
+        while event is not None:
+            event_handlers[event.type](event)
+            event = get_event()
+    return counts
+
+
+class LegacyMarketEvent(object):
+    """
+    The original events.
+    """
+    def __init__(self, dt, data):
+        self.type = 'MARKET'
+        self.dt = dt
+        self.data = data
+
+
+class LegacyOrderEvent(object):
+    def __init__(self, product, quantity, order_type='MARKET', price=None, order_time=None):
+        self.type = 'ORDER'
+        self.product = product
+        self.symbol = product.symbol
+        assert order_type == 'MARKET' or order_type == 'LIMIT'
+        self.order_type = order_type
+        self.quantity = quantity
+        self.price = price
+        self.order_time = order_time if order_time is not None else dt.datetime.now()
+
+
+class LegacyFillEvent(object):
+    def __init__(self, fill_time, symbol, quantity, fill_price, fill_cost, exchange, commission=0):
+        self.type = 'FILL'
+        self.fill_time = fill_time
+        self.symbol = symbol
+        self.quantity = quantity
+        self.fill_price = fill_price
+        self.fill_cost = fill_cost
+        self.exchange = exchange
+        self.commission = commission
+
+
+def run_legacy(ticks, order_every):
+    """
+    The dict-backed events dispatched on their type string, orders created without a time (as Strategy.order may).
+    :return: (tuple) market, order, fill counts
+    """
+    product = Product()
+    start = dt.datetime(2015, 12, 1)
+    pending = []
+    counts = {'MARKET': 0, 'ORDER': 0, 'FILL': 0}
+
+    def market(event):
+        counts['MARKET'] += 1
+        if counts['MARKET'] % order_every == 0:
+            pending.append(LegacyOrderEvent(product, 1))
+
+    def order(event):
+        counts['ORDER'] += 1
+        pending.append(LegacyFillEvent(event.order_time, event.symbol, event.quantity, 1060., 1060., 'CME'))
+
+    def fill(event):
+        counts['FILL'] += 1
+
+    event_handlers = {'MARKET': market, 'ORDER': order, 'FILL': fill}
+    for i in xrange(ticks):
+        pending.append(LegacyMarketEvent(start, i))
+        while pending:
+            event = pending.pop()
+            event_handlers[event.type](event)
+    return counts['MARKET'], counts['ORDER'], counts['FILL']
+
+
+def run_slots(ticks, order_every):
+    """
+    The __slots__ events dispatched on their integer code.
+    :return: (tuple) market, order, fill counts
+    """
+    product = Product()
+    start = dt.datetime(2015, 12, 1)
+    pending = []
+    counts = [0, 0, 0]
+
+    def market(event):
+        counts[MARKET] += 1
+        if counts[MARKET] % order_every == 0:
+            pending.append(OrderEvent(product, 1, order_time=event.dt))
+
+    def order(event):
+        counts[ORDER] += 1
+        pending.append(FillEvent(event.order_time, event.symbol, event.quantity, 1060., 1060., 'CME'))
+
+    def fill(event):
+        counts[FILL] += 1
+
+    event_handlers = [None]*3
+    event_handlers[MARKET] = market
+    event_handlers[ORDER] = order
+    event_handlers[FILL] = fill
+    for i in xrange(ticks):
+        pending.append(MarketEvent(start, i))
+        while pending:
+            event = pending.pop()
+            event_handlers[event.code](event)
+    return tuple(counts)
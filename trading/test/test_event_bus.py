@@ -0,0 +1,68 @@
+import unittest
+import threading
+from Queue import Queue
+from trading.test.reference_events import run_queue, run_bus
+from trading.event_bus import BacktestEventBus, LiveEventBus, make_event_bus
+from trading.execution import ExecutionHandler
+
+
+class TestEventBus(unittest.TestCase):
+
+    def check_fifo(self, events):
+        self.assertTrue(events.empty())
+        self.assertIsNone(events.get())
+        for i in range(3):
+            events.put(i)
+        self.assertEqual(len(events), 3)
+        events.put(None)
+        self.assertEqual([events.get() for _ in range(3)], [0, 1, 2])
+        self.assertIsNone(events.get())
+        self.assertTrue(events.empty())
+
+    def test_backtest_bus(self):
+        self.check_fifo(BacktestEventBus())
+
+    def test_live_bus(self):
+        self.check_fifo(LiveEventBus())
+
+    def test_live_bus_threads(self):
+        events = LiveEventBus()
+        threads = [threading.Thread(target=lambda: [events.put(i) for i in range(1000)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        received = []
+        while len(received) < 4000:
+            received.append(events.get(timeout=1))
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(received), sorted(range(1000)*4))
+
+    def test_make_event_bus(self):
+        bus = BacktestEventBus()
+        self.assertIs(make_event_bus(bus), bus)
+        self.assertIsInstance(make_event_bus(), BacktestEventBus)
+        queue = Queue()
+        live = make_event_bus(queue)
+        live.put('event')
+        self.assertEqual(queue.get(False), 'event')
+
+    def test_handlers_share_the_bus(self):
+        class Execution(ExecutionHandler):
+            def process_new_order(self, order_event):
+                self.events.put(order_event)
+
+        bus = BacktestEventBus()
+        execution = Execution(bus)
+        self.assertIs(execution.events, bus)
+        execution.process_new_order('order')
+        self.assertEqual(bus.get(), 'order')
+
+    def test_dispatch_matches_queue(self):
+        expected = run_queue(1000, 7)
+        self.assertEqual(expected['FILL'], 1000 // 7)
+        self.assertEqual(run_bus(BacktestEventBus(), 1000, 7), expected)
+        self.assertEqual(run_bus(LiveEventBus(), 1000, 7), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import datetime as dt
+from trading.test.reference_events import run_legacy, run_slots
+from backtest.events import CMEBacktestFillEvent
+from trading.events import MarketEvent, OrderEvent, FillEvent, NewDayEvent, EVENT_TYPES, MARKET, ORDER, FILL
+from trading.event_bus import BacktestEventBus
+from trading.strategy import Strategy
+
+
+class Product(object):
+    symbol = 'GCG6'
+
+
+class NullStrategy(Strategy):
+    def new_tick(self):
+        pass
+
+    def new_fill(self, fill_event):
+        pass
+
+    def finished(self):
+        pass
+
+
+class TestEvents(unittest.TestCase):
+
+    def test_codes(self):
+        time = dt.datetime(2015, 12, 1, 3)
+        events = [MarketEvent(time, None), OrderEvent(Product(), 1, order_time=time),
+                  FillEvent(time, 'GCG6', 1, 1060., 1060., 'CME'), NewDayEvent()]
+        for code, event in enumerate(events):
+            self.assertEqual(event.code, code)
+            self.assertEqual(event.type, EVENT_TYPES[code])
+            self.assertFalse(hasattr(event, '__dict__'))
+        self.assertEqual((MARKET, ORDER, FILL), (0, 1, 2))
+
+        fill = CMEBacktestFillEvent(time, time, 'GCG6', 1, 1060., 1060.)
+        self.assertEqual(fill.code, FILL)
+        self.assertFalse(hasattr(fill, '__dict__'))
+        self.assertIn('OrderTime: 2015-12-01 03:00:00', str(fill))
+
+    def test_order_time(self):
+        self.assertIsNone(OrderEvent(Product(), 1).order_time)
+        events = BacktestEventBus()
+        strategy = NullStrategy(events, None, [Product()], initial_cash=0)
+        strategy.curr_dt = dt.datetime(2015, 12, 1, 3)
+        strategy.order(Product(), 1)
+        self.assertEqual(events.get().order_time, dt.datetime(2015, 12, 1, 3))
+
+        strategy.curr_dt = None
+        strategy.order(Product(), 1)
+        self.assertIsNone(events.get().order_time)
+        strategy.live = True
+        strategy.order(Product(), 1)
+        self.assertIsNotNone(events.get().order_time)
+
+    def test_dispatch_matches_legacy(self):
+        self.assertEqual(run_slots(1000, 7), run_legacy(1000, 7))
+
+
+if __name__ == '__main__':
+    unittest.main()
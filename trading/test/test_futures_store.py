@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+import datetime as dt
+import pandas.util.testing as pdt
+import trading.futures_utils as fut
+from trading.futures_store import FuturesStore, FuturesDataNotFound
+from trading.roll_schedule import RollSchedule, VolumeRoll
+from trading.test.fake_quandl import FakeQuandl, make_contract_data
+
+
+class TestFuturesStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store_dir = tempfile.mkdtemp()
+        self.client = FakeQuandl()
+        self.store = FuturesStore(fut.get_quandl_future_code, store_dir=self.store_dir, client=self.client)
+
+    def tearDown(self):
+        shutil.rmtree(self.store_dir)
+
+    def test_get_is_stored(self):
+        data = self.store.get('GC', 2016, 6)
+        self.assertEqual(self.client.calls, [('CME/GCM2016', None, None)])
+        self.assertTrue(os.path.exists(os.path.join(self.store_dir, 'CME', 'GCM2016.csv')))
+        self.assertIs(self.store.get('GC', 2016, 6), data)
+
+        reopened = FuturesStore(fut.get_quandl_future_code, store_dir=self.store_dir, client=self.client)
+        pdt.assert_frame_equal(reopened.get('GC', 2016, 6), data, check_names=False)
+        self.assertEqual(len(self.client.calls), 1)
+        self.assertIn(('GC', 2016, 6), reopened)
+
+    def test_missing_contracts_are_remembered(self):
+        self.assertRaises(FuturesDataNotFound, self.store.get, 'GC', 2016, 5)
+        self.assertRaises(KeyError, self.store.get, 'GC', 2016, 5)
+        reopened = FuturesStore(fut.get_quandl_future_code, store_dir=self.store_dir, client=self.client)
+        self.assertRaises(FuturesDataNotFound, reopened.get, 'GC', 2016, 5)
+        self.assertEqual(len(self.client.calls), 1)
+
+    def test_missing_contracts_expire_until_delivered(self):
+        self.assertRaises(FuturesDataNotFound, self.store.get, 'GC', 2016, 5)
+        self.assertRaises(FuturesDataNotFound, self.store.get, 'GC', 2030, 3)
+        self.assertRaises(FuturesDataNotFound, self.store.get, 'GC', 2030, 3)
+        self.assertEqual(len(self.client.calls), 2)
+
+        self.client.delivery_months.add(3)  # listed since
+        expired = FuturesStore(fut.get_quandl_future_code, store_dir=self.store_dir, client=self.client,
+                               missing_ttl=dt.timedelta(0))
+        self.assertRaises(FuturesDataNotFound, expired.get, 'GC', 2016, 5)  # delivered, never checked again
+        self.assertEqual(len(self.client.calls), 2)
+        self.assertEqual(expired.get('GC', 2030, 3).index[-1], dt.datetime(2030, 3, 21))
+        self.assertEqual(len(self.client.calls), 3)
+        self.assertNotIn('CME/GCH2030', json.load(open(os.path.join(self.store_dir, 'missing.json'))))
+
+    def test_get_refreshes_contracts_still_trading(self):
+        self.client.end_date = dt.datetime(2016, 3, 1)
+        self.store.get('GC', 2016, 6)
+        self.store.get('GC', 2016, 2)
+        stored = time.mktime(dt.datetime(2016, 3, 3).timetuple())
+        for code in ['GCM2016', 'GCG2016']:
+            os.utime(os.path.join(self.store_dir, 'CME', code + '.csv'), (stored, stored))
+
+        self.client.end_date = dt.datetime(2016, 3, 15)
+        n_calls = len(self.client.calls)
+        reopened = FuturesStore(fut.get_quandl_future_code, store_dir=self.store_dir, client=self.client)
+        self.assertEqual(reopened.get('GC', 2016, 6).index[-1], dt.datetime(2016, 3, 15))
+        self.assertEqual(self.client.calls[n_calls:], [('CME/GCM2016', '2016-03-01', None)])
+        # the February contract had no rows in the week before it was stored: expired, not refreshed
+        self.assertEqual(reopened.get('GC', 2016, 2).index[-1], dt.datetime(2016, 2, 19))
+        self.assertEqual(len(self.client.calls), n_calls + 1)
+
+        fresh = FuturesStore(fut.get_quandl_future_code, store_dir=self.store_dir, client=self.client)
+        fresh.get('GC', 2016, 6)
+        self.assertEqual(len(self.client.calls), n_calls + 1)
+
+    def test_get_keeps_stored_data_when_refresh_fails(self):
+        self.client.end_date = dt.datetime(2016, 3, 1)
+        stored = self.store.get('GC', 2016, 6)
+        written = time.mktime(dt.datetime(2016, 3, 3).timetuple())
+        os.utime(os.path.join(self.store_dir, 'CME', 'GCM2016.csv'), (written, written))
+
+        self.client.delivery_months = set()  # the refresh raises DatasetNotFound
+        reopened = FuturesStore(fut.get_quandl_future_code, store_dir=self.store_dir, client=self.client)
+        pdt.assert_frame_equal(reopened.get('GC', 2016, 6), stored, check_names=False)
+        self.assertEqual(self.client.calls[-1], ('CME/GCM2016', '2016-03-01', None))
+        self.assertFalse(reopened._is_missing('CME/GCM2016'))
+
+    def test_refresh(self):
+        self.client.end_date = dt.datetime(2016, 3, 1)
+        stored = self.store.get('GC', 2016, 6)
+        self.assertEqual(stored.index[-1], dt.datetime(2016, 3, 1))
+
+        self.client.end_date = dt.datetime(2016, 3, 15)
+        refreshed = self.store.refresh('GC', 2016, 6)
+        self.assertEqual(self.client.calls[-1], ('CME/GCM2016', '2016-03-01', None))
+        self.assertEqual(refreshed.index[-1], dt.datetime(2016, 3, 15))
+        self.assertFalse(refreshed.index.has_duplicates)
+        expected = make_contract_data(2016, 6)
+        pdt.assert_frame_equal(refreshed, expected[expected.index <= dt.datetime(2016, 3, 15)], check_names=False)
+
+    def test_populate(self):
+        available = self.store.populate(['GC'], dt.datetime(2016, 1, 1), dt.datetime(2016, 3, 31))
+        self.assertEqual(available, 5)  # G J M Q V of the 10 months from January
+        self.assertEqual(len(self.client.calls), 10)
+        self.store.populate(['GC'], dt.datetime(2016, 1, 1), dt.datetime(2016, 3, 31))
+        self.assertEqual(len(self.client.calls), 10)
+
+    def test_futures_utils_read_from_store(self):
+        default_store = fut.FUTURES_STORE
+        fut.FUTURES_STORE = self.store
+        try:
+            self.assertEqual(fut.get_highest_volume_contract('GC', 2016, 4, 6), 'GCM6')
+            schedule = RollSchedule.build('GC', dt.datetime(2016, 1, 1), dt.datetime(2016, 6, 30), VolumeRoll())
+            n_calls = len(self.client.calls)
+            for day in [dt.datetime(2016, 1, 4), dt.datetime(2016, 4, 6), dt.datetime(2016, 6, 1)]:
+                self.assertEqual(schedule.symbol(day), fut.get_highest_volume_contract('GC', day.year, day.month,
+                                                                                       day.day))
+            self.assertEqual(len(self.client.calls), n_calls)
+        finally:
+            fut.FUTURES_STORE = default_store
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import trading.futures_utils as fut
+from trading.test.reference_contracts import contract_attributes_reference, SPEC_ATTRIBUTES, BASE_SYMBOLS
+from trading.futures_contract import FuturesContract
+from trading.instrument_master import InstrumentMaster, INSTRUMENT_MASTER
+
+
+class TestInstrumentMaster(unittest.TestCase):
+
+    def test_lazy_load(self):
+        master = InstrumentMaster()
+        self.assertIsNone(master._specs)
+        self.assertIn('GC', master)
+        self.assertIs(master['GC'], master['GC'])
+        self.assertEqual(len(master), len(set(master.symbols())))
+
+    def test_spec(self):
+        spec = INSTRUMENT_MASTER['GC']
+        self.assertEqual(spec.name, 'Gold-COMEX')
+        self.assertEqual(spec.delivery_months, 'GHJKMQVZ')
+        self.assertEqual(spec.contract_multiplier, 1000.)
+        self.assertAlmostEqual(spec.tick_size, 0.1)
+        self.assertEqual(spec.row()['Tick Value'], '10')
+        self.assertRaises(AttributeError, setattr, spec, 'tick_value', 1.)
+        self.assertRaises(KeyError, INSTRUMENT_MASTER.__getitem__, 'XXXX')
+
+    def test_symbols_by_exchange(self):
+        nymex = INSTRUMENT_MASTER.symbols('NYMEX')
+        self.assertIn('GC', nymex)
+        self.assertTrue(all(INSTRUMENT_MASTER[symbol].exchange == 'NYMEX' for symbol in nymex))
+        self.assertEqual(INSTRUMENT_MASTER.contract_multipliers(['GC'])['GC'], 1000.)
+
+    def test_get_contract_specs(self):
+        specs = fut.get_contract_specs('GC')
+        specs['Name'] = 'changed'
+        self.assertEqual(fut.get_contract_specs('GC')['Name'], 'Gold-COMEX')
+
+    def test_futures_contract_matches_reference(self):
+        for base_symbol in BASE_SYMBOLS:
+            contract = FuturesContract(base_symbol, exp_year=2016, exp_month=6)
+            expected = contract_attributes_reference(base_symbol)
+            self.assertEqual(contract.symbol, expected['symbol'])
+            for attribute in SPEC_ATTRIBUTES:
+                self.assertEqual(getattr(contract, attribute), expected[attribute], (base_symbol, attribute))
+            self.assertIs(contract.spec, INSTRUMENT_MASTER[base_symbol])
+            self.assertFalse(hasattr(contract, '__dict__'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import shutil
+import tempfile
+import unittest
+import datetime as dt
+import pandas as pd
+import trading.futures_utils as fut
+import trading.roll_schedule as roll_schedule
+from trading.futures_contract import FuturesContract
+from trading.roll_schedule import RollSchedule, VolumeRoll, FixedOffsetRoll, get_roll_schedule
+
+
+def load_volumes(base_symbol, exp_year, exp_month):
+    """
+    Daily volumes of a contract, peaking 45 days before its delivery month. Only even months are listed.
+    """
+    if exp_month % 2:
+        raise KeyError("{} {}/{} not listed".format(base_symbol, exp_month, exp_year))
+    delivery = dt.datetime(exp_year, exp_month, 1)
+    index = pd.bdate_range(delivery - dt.timedelta(days=240), delivery + dt.timedelta(days=20))
+    volume = [max(0, 1000 - 8*abs((delivery - dt.timedelta(days=45) - d).days)) for d in index]
+    return pd.DataFrame({'Volume': volume}, index=index)
+
+
+class TestRollSchedule(unittest.TestCase):
+
+    def setUp(self):
+        self.schedule_dir = tempfile.mkdtemp()
+        self.default_schedule_dir = roll_schedule.ROLL_SCHEDULE_DIR
+        roll_schedule.ROLL_SCHEDULE_DIR = self.schedule_dir
+        self.start = dt.datetime(2015, 11, 1)
+        self.end = dt.datetime(2016, 4, 30)
+
+    def tearDown(self):
+        roll_schedule.ROLL_SCHEDULE_DIR = self.default_schedule_dir
+        shutil.rmtree(self.schedule_dir)
+
+    def test_volume_roll_matches_highest_volume_contract(self):
+        schedule = RollSchedule.build('GC', self.start, self.end, VolumeRoll(load_data=load_volumes))
+        get_futures_data = fut.get_futures_data
+        fut.get_futures_data = load_volumes
+        try:
+            for day in pd.bdate_range(self.start, self.end).to_pydatetime():
+                self.assertEqual(schedule.symbol(day),
+                                 fut.get_highest_volume_contract('GC', day.year, day.month, day.day))
+        finally:
+            fut.get_futures_data = get_futures_data
+        # weekends keep the Friday contract
+        self.assertEqual(schedule.symbol(dt.date(2016, 1, 16)), schedule.symbol(dt.date(2016, 1, 15)))
+        self.assertEqual([to for _, _, to in schedule.rolls()], ['GCZ5', 'GCG6', 'GCJ6', 'GCM6'])
+
+    def test_fixed_offset_roll(self):
+        schedule = RollSchedule.build('GC', self.start, self.end, FixedOffsetRoll(10, delivery_months='GJMQVZ'))
+        self.assertEqual(schedule.symbol(dt.date(2015, 11, 1)), 'GCZ5')
+        self.assertEqual(schedule.symbol(dt.date(2015, 11, 20)), 'GCZ5')
+        self.assertEqual(schedule.symbol(dt.date(2015, 11, 21)), 'GCG6')
+        self.assertEqual(schedule.rolls(), [(dt.date(2015, 11, 21), 'GCZ5', 'GCG6'),
+                                            (dt.date(2016, 1, 22), 'GCG6', 'GCJ6'),
+                                            (dt.date(2016, 3, 22), 'GCJ6', 'GCM6')])
+        self.assertRaises(ValueError, schedule.symbol, dt.date(2016, 5, 1))
+
+    def test_saved_and_loaded(self):
+        loads = []
+
+        def counting_load(*args):
+            loads.append(args)
+            return load_volumes(*args)
+
+        rule = VolumeRoll(load_data=counting_load)
+        schedule = get_roll_schedule('GC', self.start, self.end, rule)
+        self.assertTrue(os.path.exists(os.path.join(self.schedule_dir, 'GC_volume_8.csv')))
+        n_loads = len(loads)
+        loaded = get_roll_schedule('GC', self.start + dt.timedelta(days=30), self.end, rule)
+        self.assertEqual(len(loads), n_loads)
+        self.assertEqual(loaded.symbols, schedule.symbols)
+
+        # a wider range rebuilds over the union
+        wider = get_roll_schedule('GC', self.start, self.end + dt.timedelta(days=60), rule)
+        self.assertTrue(wider.covers(self.start, self.end + dt.timedelta(days=60)))
+
+    def test_rebuilt_past_its_data(self):
+        today = [dt.datetime(2016, 1, 8)]
+        loads = []
+
+        def load_until_today(*args):
+            loads.append(args)
+            data = load_volumes(*args)
+            return data[data.index <= today[0]]
+
+        rule = VolumeRoll(load_data=load_until_today)
+        early = get_roll_schedule('GC', self.start, self.end, rule, backed_until=today[0])
+        self.assertEqual(early.data_end, dt.date(2016, 1, 8))
+        self.assertTrue(early.is_backed(dt.date(2016, 1, 10)))  # the weekend after the data
+        self.assertFalse(early.is_backed(dt.date(2016, 1, 11)))
+        # past its data the schedule keeps the last front contract
+        self.assertEqual(early.symbol(dt.date(2016, 3, 15)), early.symbol(dt.date(2016, 1, 8)))
+
+        n_loads = len(loads)
+        self.assertEqual(get_roll_schedule('GC', self.start, self.end, rule, backed_until=today[0]).symbols,
+                         early.symbols)
+        self.assertEqual(len(loads), n_loads)
+
+        today[0] = self.end
+        current = get_roll_schedule('GC', self.start, self.end, rule, backed_until=dt.datetime(2016, 3, 15))
+        self.assertGreater(len(loads), n_loads)
+        self.assertEqual(current.data_end, dt.date(2016, 4, 29))
+        self.assertEqual(current.symbols, RollSchedule.build('GC', self.start, self.end,
+                                                             VolumeRoll(load_data=load_volumes)).symbols)
+        self.assertEqual(RollSchedule.load(os.path.join(self.schedule_dir, 'GC_volume_8.csv')).data_end,
+                         dt.date(2016, 4, 29))
+
+    def test_futures_contract_rolls_from_schedule(self):
+        schedule = RollSchedule.build('GC', self.start, self.end, FixedOffsetRoll(10, delivery_months='GJMQVZ'))
+        contract = FuturesContract('GC', continuous=True, roll_schedule=schedule)
+        contract.update(2016, 2, 1)
+        self.assertEqual((contract.symbol, contract.exp_year, contract.exp_month), ('GCJ6', 2016, 4))
+
+        fixed = FuturesContract('GC', exp_year=2016, exp_month=6)
+        self.assertEqual(fixed.roll_symbol(2016, 2, 1), 'GCM6')
+
+        lazy = FuturesContract('GC', continuous=True, roll_rule=FixedOffsetRoll(10, delivery_months='GJMQVZ'))
+        self.assertEqual(lazy.roll_symbol(2016, 2, 1), 'GCJ6')
+        self.assertTrue(lazy.roll_schedule.covers(dt.date(2016, 2, 1), dt.date(2017, 2, 1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import shutil
+import logging
+import tempfile
+import unittest
+import datetime as dt
+from trading.trading_calendar import TradingCalendar, parse_trading_times, load_holidays, log
+
+
+class RecordingHandler(logging.Handler):
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class TestTradingCalendar(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.calendar = TradingCalendar()
+
+    def test_parse_trading_times(self):
+        self.assertEqual(parse_trading_times('18:00 - 17:15'), (dt.time(18), dt.time(17, 15)))
+
+    def test_sessions_skip_weekends_and_holidays(self):
+        sessions = self.calendar.sessions(dt.datetime(2015, 12, 21), dt.datetime(2016, 1, 3))
+        self.assertEqual([d.day for d in sessions], [21, 22, 23, 24, 28, 29, 30, 31])
+        self.assertTrue(all(isinstance(d, dt.datetime) for d in sessions))
+        self.assertFalse(self.calendar.is_session(dt.date(2015, 12, 25)))
+        self.assertEqual(self.calendar.next_session(dt.datetime(2015, 12, 24)), dt.datetime(2015, 12, 28))
+
+    def test_session_bounds(self):
+        self.assertTrue(self.calendar.overnight)
+        self.assertEqual(self.calendar.session_bounds(dt.date(2015, 12, 21)),
+                         (dt.datetime(2015, 12, 20, 18), dt.datetime(2015, 12, 21, 17, 15)))
+        day_session = TradingCalendar('08:30 - 15:00', holidays=())
+        self.assertEqual(day_session.session_bounds(dt.date(2015, 12, 25)),
+                         (dt.datetime(2015, 12, 25, 8, 30), dt.datetime(2015, 12, 25, 15)))
+        self.assertTrue(day_session.is_session(dt.date(2015, 12, 25)))
+
+    def test_for_products(self):
+        class Product(object):
+            trading_times = '08:30 - 15:00'
+        self.assertEqual(TradingCalendar.for_products([object(), Product()]).mkt_open, dt.time(8, 30))
+        self.assertEqual(TradingCalendar.for_products([object()]).trading_times, '18:00 - 17:15')
+
+    def test_load_holidays(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            fpath = os.path.join(tmp_dir, 'holidays.csv')
+            with open(fpath, 'w') as f:
+                f.write("Date,Holiday\n2018-03-30,Good Friday\n2018-12-25,Christmas\n")
+            calendar = TradingCalendar(holidays=load_holidays(fpath))
+        finally:
+            shutil.rmtree(tmp_dir)
+        self.assertEqual(calendar.holiday_years, (2018, 2018))
+        self.assertFalse(calendar.is_session(dt.date(2018, 3, 30)))
+        self.assertTrue(calendar.is_session(dt.date(2015, 12, 25)))
+
+    def test_warns_outside_holiday_years(self):
+        handler = RecordingHandler()
+        log.addHandler(handler)
+        try:
+            calendar = TradingCalendar()
+            self.assertEqual(calendar.holiday_years, (2014, 2017))
+            calendar.sessions(dt.datetime(2017, 12, 20), dt.datetime(2018, 1, 10))
+            calendar.is_session(dt.date(2018, 12, 25))
+            self.assertEqual(len(handler.messages), 1)
+            self.assertIn('2018', handler.messages[0])
+            TradingCalendar('08:30 - 15:00', holidays=()).is_session(dt.date(2018, 12, 25))
+            self.assertEqual(len(handler.messages), 1)
+        finally:
+            log.removeHandler(handler)
+
+    def test_sunday_is_not_a_session(self):
+        self.assertFalse(self.calendar.is_session(dt.date(2015, 12, 20)))
+        self.assertEqual(self.calendar.session_bounds(self.calendar.next_session(dt.date(2015, 12, 20)))[0],
+                         dt.datetime(2015, 12, 20, 18))
+
+
+if __name__ == '__main__':
+    unittest.main()
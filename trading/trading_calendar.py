@@ -0,0 +1,115 @@
+import os
+import csv
+import logging
+import datetime as dt
+from dateutil.rrule import rrule, DAILY
+log = logging.getLogger(__name__)
+
+CME_TRADING_TIMES = '18:00 - 17:15'
+# Days Globex is closed for the whole session (early closes still trade)
+CME_HOLIDAYS_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'cme_holidays.csv')
+
+
+def load_holidays(fpath=CME_HOLIDAYS_PATH):
+    """
+    :param fpath: (str) csv with a Date column (YYYY-MM-DD) of the days without a session
+    :return: (frozenset) of dt.date
+    """
+    with open(fpath) as f:
+        return frozenset(dt.datetime.strptime(row['Date'], '%Y-%m-%d').date() for row in csv.DictReader(f))
+
+
+CME_HOLIDAYS = load_holidays()
+
+
+def parse_trading_times(trading_times):
+    """
+    :param trading_times: (str) as in contract_specs.csv, e.g. '18:00 - 17:15'
+    :return: (dt.time) open, (dt.time) close
+    """
+    mkt_open, mkt_close = [dt.datetime.strptime(t.strip(), '%H:%M').time() for t in trading_times.split('-')]
+    return mkt_open, mkt_close
+
+
+class TradingCalendar(object):
+    """
+    Trading sessions of an exchange: weekdays that are not holidays.
+
+    A session is named after the day it closes on. When the market opens before it closes (e.g. 18:00 - 17:15)
+    the session starts the evening before, so the Monday session starts Sunday evening. The day data is keyed by
+    calendar date though, and Sunday is never a session: the updates of a Sunday file (from the Sunday evening
+    open) are not loaded, where the backtests used to load every day that had data.
+
+    The holidays are only known for the years they cover (trading/cme_holidays.csv for the CME); a warning is
+    logged the first time a day of another year is checked, its holidays are traded as regular sessions.
+    """
+
+    def __init__(self, trading_times=CME_TRADING_TIMES, holidays=CME_HOLIDAYS, holiday_years=None):
+        """
+        :param trading_times: (str) e.g. '18:00 - 17:15'
+        :param holidays: (iterable) of dt.date, days without a session, see load_holidays
+        :param holiday_years: (tuple) first and last year covered by holidays, defaults to the years of the
+            first and last holiday
+        """
+        self.trading_times = trading_times
+        self.mkt_open, self.mkt_close = parse_trading_times(trading_times)
+        self.holidays = frozenset(self._to_date(d) for d in holidays)
+        if holiday_years is None and self.holidays:
+            holiday_years = min(self.holidays).year, max(self.holidays).year
+        self.holiday_years = holiday_years
+        self._warned_years = set()
+
+    @classmethod
+    def for_products(cls, products, holidays=CME_HOLIDAYS, holiday_years=None):
+        """
+        Calendar of the first product with trading times (e.g. FuturesContract), the CME calendar otherwise.
+        """
+        for product in products:
+            trading_times = getattr(product, 'trading_times', None)
+            if trading_times:
+                return cls(trading_times, holidays, holiday_years)
+        return cls(holidays=holidays, holiday_years=holiday_years)
+
+    @staticmethod
+    def _to_date(date):
+        return date.date() if isinstance(date, dt.datetime) else date
+
+    @property
+    def overnight(self):
+        return self.mkt_open > self.mkt_close
+
+    def is_session(self, date):
+        date = self._to_date(date)
+        self._check_holiday_years(date.year)
+        return date.weekday() < 5 and date not in self.holidays
+
+    def _check_holiday_years(self, year):
+        if self.holiday_years is None or self.holiday_years[0] <= year <= self.holiday_years[1] or \
+                year in self._warned_years:
+            return
+        self._warned_years.add(year)
+        log.warning("No holidays known for {} (the calendar covers {} to {}), every weekday is a session".format(
+            year, *self.holiday_years))
+
+    def sessions(self, start_date, end_date):
+        """
+        All sessions from start_date to end_date inclusive.
+        :return: (list) of DateTime at midnight, as the day data is keyed
+        """
+        return [d for d in rrule(DAILY, dtstart=dt.datetime.combine(self._to_date(start_date), dt.time(0)),
+                                 until=dt.datetime.combine(self._to_date(end_date), dt.time(0)))
+                if self.is_session(d)]
+
+    def session_bounds(self, date):
+        """
+        :return: (DateTime) open, (DateTime) close of the session closing on date
+        """
+        date = self._to_date(date)
+        open_date = date - dt.timedelta(days=1) if self.overnight else date
+        return dt.datetime.combine(open_date, self.mkt_open), dt.datetime.combine(date, self.mkt_close)
+
+    def next_session(self, date):
+        date = self._to_date(date) + dt.timedelta(days=1)
+        while not self.is_session(date):
+            date += dt.timedelta(days=1)
+        return dt.datetime.combine(date, dt.time(0))